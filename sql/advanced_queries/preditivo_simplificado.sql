@@ -16,7 +16,7 @@ SELECT
         0.3 * log_income -
         0.4 * tenure_years -
         0.6 * has_complained
-    )) AS response_probability,
+    ))) AS response_probability,
     NTILE(100) OVER (ORDER BY response_probability DESC) AS percentile_rank
 FROM CustomerMetrics cm;
 -- Fórmula inspirada em regressão logística com pesos empíricos
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+Resumo por ano de nascimento para as análises por faixa etária.
+
+Guarda, para cada ano de nascimento, a contagem de clientes e a soma de cada
+categoria de gasto (Mnt*), com as somas acumuladas. Como a idade é o ano
+corrente menos Year_Birth, qualquer intervalo do slider de idade ou esquema de
+faixas vira um intervalo de anos de nascimento e é respondido com
+`searchsorted` na tabela (uma linha por ano), sem percorrer os clientes.
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+SPENDING_COLUMNS = ['MntWines', 'MntFruits', 'MntMeatProducts',
+                    'MntFishProducts', 'MntSweetProducts', 'MntGoldProds']
+
+# Faixas etárias dos dashboards: [20, 30), [30, 40), ..., [90, 100)
+AGE_BINS = [20, 30, 40, 50, 60, 70, 80, 90, 100]
+AGE_LABELS = ['20-30', '30-40', '40-50', '50-60', '60-70', '70-80', '80-90', '90-100']
+
+
+def age_bands(ages, bins=AGE_BINS, labels=AGE_LABELS) -> pd.Categorical:
+    """
+    Faixa etária de cada idade, com intervalos fechados à esquerda.
+
+    Equivale a `pd.cut(ages, bins, labels=labels, right=False)`, com uma
+    busca binária nos limites no lugar da classificação linha a linha.
+    Idades fora dos limites (ou ausentes) ficam sem faixa.
+    """
+    idades = np.asarray(ages, dtype=np.float64)
+    codigos = np.searchsorted(np.asarray(bins, dtype=np.float64), idades, side='right') - 1
+    codigos[(codigos < 0) | (codigos >= len(labels)) | np.isnan(idades)] = -1
+    return pd.Categorical.from_codes(codigos, categories=labels, ordered=True)
+
+
+def _prefix(valores: np.ndarray) -> np.ndarray:
+    # Linha de zeros no início: o total do intervalo [i, j) é acumulado[j] - acumulado[i]
+    return np.concatenate([np.zeros((1,) + valores.shape[1:], dtype=valores.dtype), valores.cumsum(axis=0)])
+
+
+def build_age_rollup(df: pd.DataFrame, columns: list = None) -> dict:
+    """
+    Constrói o resumo por ano de nascimento.
+
+    Parâmetros:
+      - df (pd.DataFrame): Dados com 'Year_Birth' e as colunas de gasto.
+      - columns (list, opcional): Colunas somadas (padrão: as de SPENDING_COLUMNS presentes).
+
+    Retorna:
+      - dict: Anos de nascimento (ordenados), contagem e soma por ano × coluna e suas somas acumuladas.
+    """
+    colunas = columns or [c for c in SPENDING_COLUMNS if c in df.columns]
+    df = df.dropna(subset=['Year_Birth'])
+    anos, posicao = np.unique(df['Year_Birth'].to_numpy(dtype=np.int64), return_inverse=True)
+
+    contagem = np.zeros((len(anos), len(colunas)), dtype=np.int64)
+    soma = np.zeros((len(anos), len(colunas)), dtype=np.float64)
+    for j, coluna in enumerate(colunas):
+        valores = df[coluna].to_numpy(dtype=np.float64)
+        validos = ~np.isnan(valores)
+        contagem[:, j] = np.bincount(posicao[validos], minlength=len(anos))
+        soma[:, j] = np.bincount(posicao[validos], weights=valores[validos], minlength=len(anos))
+
+    return {
+        'anos': anos,
+        'colunas': list(colunas),
+        'contagem': contagem,
+        'soma': soma,
+        'contagem_acumulada': _prefix(contagem),
+        'soma_acumulada': _prefix(soma),
+    }
+
+
+def age_limits(rollup: dict, current_year: int = None) -> tuple:
+    """(idade mínima, idade máxima) presentes no resumo."""
+    current_year = current_year or datetime.now().year
+    return current_year - int(rollup['anos'][-1]), current_year - int(rollup['anos'][0])
+
+
+def _birth_year_totals(rollup: dict, column: str, first_years, last_years) -> tuple:
+    """Contagem e soma de `column` nos intervalos inclusivos de anos de nascimento."""
+    j = rollup['colunas'].index(column)
+    inicio = np.searchsorted(rollup['anos'], first_years, side='left')
+    fim = np.maximum(np.searchsorted(rollup['anos'], last_years, side='right'), inicio)
+    n = rollup['contagem_acumulada'][fim, j] - rollup['contagem_acumulada'][inicio, j]
+    soma = rollup['soma_acumulada'][fim, j] - rollup['soma_acumulada'][inicio, j]
+    return n, soma
+
+
+def age_range_totals(rollup: dict, column: str, age_range: tuple, current_year: int = None) -> tuple:
+    """
+    Contagem, soma e média de `column` entre clientes com idade no intervalo (inclusivo).
+
+    Retorna:
+      - tuple: (n, soma, média); a média é NaN sem clientes no intervalo.
+    """
+    current_year = current_year or datetime.now().year
+    n, soma = _birth_year_totals(rollup, column, current_year - age_range[1], current_year - age_range[0])
+    return int(n), float(soma), float(soma / n) if n else float('nan')
+
+
+def age_band_means(rollup: dict, column: str, age_range: tuple = None, current_year: int = None,
+                   bins=AGE_BINS, labels=AGE_LABELS) -> pd.Series:
+    """
+    Média de `column` por faixa etária, opcionalmente restrita a um intervalo de idade.
+
+    Cada faixa [início, fim) corresponde aos anos de nascimento
+    (ano corrente − fim, ano corrente − início]; o intervalo de idade, quando
+    informado, é intersectado com cada faixa.
+
+    Parâmetros:
+      - rollup (dict): Saída de `build_age_rollup`.
+      - column (str): Categoria de gasto.
+      - age_range (tuple, opcional): (idade mínima, idade máxima), inclusivo.
+      - current_year (int, opcional): Ano de referência da idade (padrão: o atual).
+      - bins, labels: Esquema de faixas (padrão: o dos dashboards).
+
+    Retorna:
+      - pd.Series: Média por faixa, indexada pelas faixas (NaN nas faixas sem clientes),
+        como `df.groupby('Faixa_Etaria', observed=False)[column].mean()`.
+    """
+    current_year = current_year or datetime.now().year
+    inicios, fins = np.asarray(bins[:-1]), np.asarray(bins[1:])
+    if age_range is not None:
+        # Idades inteiras: a faixa [início, fim) é o intervalo inclusivo [início, fim - 1]
+        inicios, fins = np.maximum(inicios, age_range[0]), np.minimum(fins, age_range[1] + 1)
+    n, soma = _birth_year_totals(rollup, column, current_year - fins + 1, current_year - inicios)
+    n = np.where(fins > inicios, n, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        medias = np.where(n > 0, soma / n, np.nan)
+    indice = pd.CategoricalIndex(labels, categories=labels, ordered=True, name='Faixa_Etaria')
+    return pd.Series(medias, index=indice, name=column)
@@ -0,0 +1,391 @@
+"""
+Relatórios executivos em lote, sem Streamlit.
+
+Gera, para cada segmento (intervalo de anos de inscrição × estado civil ×
+educação × faixa etária), os mesmos relatórios dos dashboards:
+  - reclamações vs fidelidade (calculate_metrics / generate_insights);
+  - gastos em ouro por faixa etária (generate_insight_blocks);
+  - gastos em carne por estado civil (analisar_gastos_carne_por_estado_civil /
+    gerar_relatorio_executivo).
+
+O dataset é carregado uma única vez no processo principal; os processos do
+pool são criados por fork e herdam esse DataFrame (páginas compartilhadas
+até serem escritas). Em sistemas sem fork, cada processo carrega o
+snapshot mapeado em memória na inicialização. Cada processo grava os
+arquivos dos seus segmentos e devolve apenas um resumo.
+
+Saída (em --saida):
+    index.html, index.md, index.json      resumo de todos os segmentos e vazão
+    segmentos/<segmento>/relatorio.{html,md,json} e as figuras
+
+Figuras estáticas (png/svg) dependem do pacote `kaleido`; se uma exportação
+de teste falhar no início, as figuras são gravadas em HTML interativo. Uma
+falha ao gravar os arquivos de um segmento marca só esse segmento com erro.
+
+Uso:
+    python batch_reports.py
+    python batch_reports.py ../data/processed/marketing_campaign_atualizado.csv --saida ../reports --processos 4
+    python batch_reports.py --estados Single Married --educacao PhD --figuras nenhuma
+"""
+import argparse
+import html
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from age_rollup import AGE_LABELS, SPENDING_COLUMNS
+from data_store import DEFAULT_DATA_PATH, load_columns
+
+DEFAULT_OUTPUT_DIR = '../reports'
+FORMATS = ('html', 'md', 'json')
+FIGURE_FORMATS = ('png', 'svg', 'html', 'nenhuma')
+ALL = 'Todos'
+BASE_COLUMNS = ['Dt_Customer', 'Marital_Status', 'Education', 'Year_Birth', 'Complain', 'Income'] + SPENDING_COLUMNS
+
+# Estado de cada processo do pool (herdado por fork ou preenchido em _init_worker)
+_BASE = None
+_OUTPUT_DIR = None
+_OPTIONS = None
+
+
+def _dashboards():
+    # Importados sob demanda: sem o servidor do Streamlit, as chamadas de página viram no-ops
+    # (os avisos de "bare mode" são silenciados)
+    from streamlit import config
+    from streamlit.logger import set_log_level
+    config.get_config_options()  # a leitura da configuração redefine o nível de log
+    set_log_level('error')
+    import dashboard_campaign
+    import dashboard_gastos_ouro
+    import dashboard_status
+    return dashboard_campaign, dashboard_gastos_ouro, dashboard_status
+
+
+def load_base(csv_path: str = DEFAULT_DATA_PATH) -> pd.DataFrame:
+    """
+    Carrega as colunas usadas pelos três relatórios, com as colunas derivadas
+    dos dashboards (Ano_Inscricao, MntRegularProds, Age e Faixa_Etaria).
+    """
+    _, gastos_ouro, _ = _dashboards()
+    df = load_columns(csv_path, BASE_COLUMNS).dropna(subset=['Dt_Customer'])
+    df['Ano_Inscricao'] = df['Dt_Customer'].dt.year
+    df['MntRegularProds'] = df[SPENDING_COLUMNS].sum(axis=1)
+    return gastos_ouro.calculate_age_and_groups(df)
+
+
+def enumerate_segments(df: pd.DataFrame, estados=None, educacao=None, faixas=None) -> list:
+    """
+    Todas as combinações de intervalo de anos, estado civil, educação e faixa etária.
+
+    Os intervalos de anos são todos os intervalos contíguos entre os anos de
+    inscrição presentes. Cada dimensão também inclui 'Todos' (sem filtro).
+
+    Parâmetros:
+      - df (pd.DataFrame): Saída de `load_base`.
+      - estados, educacao, faixas (list, opcional): Restringe os valores de cada dimensão.
+
+    Retorna:
+      - list: Um dict por segmento ('anos', 'estado', 'educacao', 'faixa').
+    """
+    anos = sorted(int(ano) for ano in df['Ano_Inscricao'].unique())
+    intervalos = [(inicio, fim) for i, inicio in enumerate(anos) for fim in anos[i:]]
+    dimensoes = [
+        [ALL] + sorted(estados or df['Marital_Status'].dropna().astype(str).unique()),
+        [ALL] + sorted(educacao or df['Education'].dropna().astype(str).unique()),
+        [ALL] + list(faixas or AGE_LABELS),
+    ]
+    return [{'anos': intervalo, 'estado': estado, 'educacao': nivel, 'faixa': faixa}
+            for intervalo, (estado, nivel, faixa) in product(intervalos, product(*dimensoes))]
+
+
+def segment_slug(segmento: dict) -> str:
+    """Nome de pasta do segmento (ex.: anos_2012-2013__estado_Single__educacao_Todos__faixa_40-50)."""
+    partes = [f"anos_{segmento['anos'][0]}-{segmento['anos'][1]}", f"estado_{segmento['estado']}",
+              f"educacao_{segmento['educacao']}", f"faixa_{segmento['faixa']}"]
+    return re.sub(r'[^\w.-]', '_', '__'.join(partes))
+
+
+def segment_mask(df: pd.DataFrame, segmento: dict) -> np.ndarray:
+    """Máscara booleana das linhas do segmento."""
+    mascara = df['Ano_Inscricao'].between(*segmento['anos']).to_numpy()
+    for coluna, chave in (('Marital_Status', 'estado'), ('Education', 'educacao'), ('Faixa_Etaria', 'faixa')):
+        if segmento[chave] != ALL:
+            mascara = mascara & (df[coluna] == segmento[chave]).to_numpy()
+    return mascara
+
+
+def _json_ready(valor):
+    # Tipos NumPy/pandas viram tipos nativos e NaN vira null (JSON válido)
+    if isinstance(valor, dict):
+        return {str(chave): _json_ready(item) for chave, item in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_json_ready(item) for item in valor]
+    if isinstance(valor, pd.DataFrame):
+        return _json_ready(valor.to_dict(orient='records'))
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, float) and np.isnan(valor):
+        return None
+    return valor
+
+
+def _unindent(texto: str) -> str:
+    # Os textos dos dashboards vêm indentados (f-strings multilinha); no .md isso viraria bloco de código
+    return '\n'.join(linha.strip() for linha in texto.strip().splitlines())
+
+
+def _markdown_to_html(texto: str) -> str:
+    """Conversão mínima das marcações usadas nos relatórios (###, ** e quebras de linha)."""
+    linhas = []
+    for linha in html.escape(_unindent(texto)).splitlines():
+        linha = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', linha)
+        if linha.startswith('### '):
+            linha = f"<h3>{linha[4:]}</h3>"
+        linhas.append(linha)
+    return '<br>'.join(linhas)
+
+
+def _save_figure(fig, caminho: str, formato: str):
+    if formato == 'html':
+        fig.write_html(f"{caminho}.html", include_plotlyjs='cdn')
+    else:
+        fig.write_image(f"{caminho}.{formato}")
+    return f"{os.path.basename(caminho)}.{formato}"
+
+
+def image_export_available(formato: str = 'png') -> bool:
+    """
+    Indica se o Plotly consegue gravar imagens estáticas no formato pedido.
+
+    Grava uma figura vazia em uma pasta temporária: além do pacote kaleido,
+    a exportação pode depender de um navegador instalado.
+    """
+    try:
+        import plotly.graph_objects as go
+        with tempfile.TemporaryDirectory() as pasta:
+            go.Figure().write_image(os.path.join(pasta, f"teste.{formato}"))
+    except Exception:
+        return False
+    return True
+
+
+def _init_worker(csv_path: str, output_dir: str, options: dict):
+    global _BASE, _OUTPUT_DIR, _OPTIONS
+    _OUTPUT_DIR, _OPTIONS = output_dir, options
+    if _BASE is None:
+        _BASE = load_base(csv_path)
+
+
+def _segment_title(segmento: dict) -> str:
+    return (f"Anos {segmento['anos'][0]}–{segmento['anos'][1]} · Estado civil: {segmento['estado']} · "
+            f"Educação: {segmento['educacao']} · Faixa etária: {segmento['faixa']}")
+
+
+def run_segment(segmento: dict) -> dict:
+    """
+    Calcula e grava os relatórios de um segmento (executado nos processos do pool).
+
+    Retorna:
+      - dict: Resumo do segmento (linhas, valores-p, tempo e situação).
+    """
+    inicio = time.perf_counter()
+    slug = segment_slug(segmento)
+    dados = _BASE[segment_mask(_BASE, segmento)]
+    resumo = {'segmento': segmento, 'slug': slug, 'linhas': len(dados)}
+    if len(dados) < _OPTIONS['minimo']:
+        return {**resumo, 'situacao': 'ignorado', 'segundos': time.perf_counter() - inicio}
+
+    campaign, gastos_ouro, status = _dashboards()
+    from execution import grouped_mean
+    from filter_cube import build_complaint_cube, query_year_counts
+
+    try:
+        metricas = campaign.calculate_metrics(dados[['Complain', 'MntRegularProds']])
+        texto_campanha = campaign.generate_insights(metricas)
+        blocos_ouro = gastos_ouro.generate_insight_blocks(dados)
+        media_ouro = grouped_mean(dados, 'Faixa_Etaria', 'MntGoldProds')
+
+        # Só os testes de Welch: os gráficos são montados adiante, se forem gravados
+        _, insights = status.estatisticas_gastos_carne(dados[['Marital_Status', 'MntMeatProducts', 'Income']])
+        texto_status = status.gerar_relatorio_executivo(insights)
+    except Exception as e:
+        return {**resumo, 'situacao': 'erro', 'erro': str(e), 'segundos': time.perf_counter() - inicio}
+
+    # Uma figura ou arquivo que falha ao ser gravado marca só este segmento com erro
+    try:
+        pasta = os.path.join(_OUTPUT_DIR, 'segmentos', slug)
+        os.makedirs(pasta, exist_ok=True)
+        figuras = {}
+        if _OPTIONS['figuras'] != 'nenhuma':
+            # Montar as figuras do Plotly é a etapa mais cara: só acontece quando elas são gravadas
+            cubo = build_complaint_cube(dados[['Ano_Inscricao', 'Complain', 'MntRegularProds']])
+            _, fig_gastos, fig_renda, fig_scatter, _ = status.analisar_gastos_carne_por_estado_civil(
+                dados[['Marital_Status', 'MntMeatProducts', 'Income']])
+            for nome, fig in (('reclamacoes', campaign.create_complaint_plot(query_year_counts(cubo, segmento['anos']))),
+                              ('gastos_ouro', gastos_ouro.create_gold_spending_plot(dados)),
+                              ('gastos_carne', fig_gastos), ('renda', fig_renda), ('renda_vs_carne', fig_scatter)):
+                figuras[nome] = _save_figure(fig, os.path.join(pasta, nome), _OPTIONS['figuras'])
+
+        titulo = _segment_title(segmento)
+        if 'json' in _OPTIONS['formatos']:
+            conteudo = {
+                'segmento': segmento,
+                'linhas': len(dados),
+                'campanha': metricas,
+                'gastos_ouro': {'media_por_faixa': media_ouro.to_dict()},
+                'gastos_carne': insights,
+                'figuras': figuras,
+            }
+            with open(os.path.join(pasta, 'relatorio.json'), 'w', encoding='utf-8') as arquivo:
+                json.dump(_json_ready(conteudo), arquivo, ensure_ascii=False, indent=2)
+
+        if 'md' in _OPTIONS['formatos']:
+            imagens = ''.join(f"\n![{nome}]({arquivo})\n" if not arquivo.endswith('.html') else f"\n- [{nome}]({arquivo})\n"
+                              for nome, arquivo in figuras.items())
+            markdown = (f"# {titulo}\n\nClientes no segmento: **{len(dados)}**\n\n"
+                        f"## Reclamações vs Fidelidade\n\n{_unindent(texto_campanha)}\n\n"
+                        f"## Gastos em Ouro\n\n{_unindent(''.join(blocos_ouro))}\n\n"
+                        f"## Gastos em Carne por Estado Civil\n\n{_unindent(texto_status)}\n\n"
+                        f"## Figuras\n{imagens}")
+            with open(os.path.join(pasta, 'relatorio.md'), 'w', encoding='utf-8') as arquivo:
+                arquivo.write(markdown)
+
+        if 'html' in _OPTIONS['formatos']:
+            imagens = ''.join(f'<iframe src="{arquivo}" width="100%" height="520" frameborder="0"></iframe>'
+                              if arquivo.endswith('.html') else f'<img src="{arquivo}" alt="{nome}" style="max-width:100%">'
+                              for nome, arquivo in figuras.items())
+            pagina = f"""<!DOCTYPE html>
+    <html lang="pt-BR"><head><meta charset="utf-8"><title>{html.escape(titulo)}</title>
+    <style>body {{ font-family: 'Segoe UI', sans-serif; max-width: 1100px; margin: auto; }}
+    .report-box {{ background-color: #f9f9f9; padding: 20px; border-left: 5px solid #333; border-radius: 10px; }}</style>
+    </head><body>
+    <h1>{html.escape(titulo)}</h1>
+    <p>Clientes no segmento: <strong>{len(dados)}</strong></p>
+    <h2>Reclamações vs Fidelidade</h2><div class="report-box">{_markdown_to_html(texto_campanha)}</div>
+    <h2>Gastos em Ouro</h2>{''.join(blocos_ouro)}
+    <h2>Gastos em Carne por Estado Civil</h2><div class="report-box">{_markdown_to_html(texto_status)}</div>
+    {insights['comparacoes'].to_html(index=False, float_format=lambda v: f'{v:.4f}')}
+    <h2>Figuras</h2>{imagens}
+    </body></html>"""
+            with open(os.path.join(pasta, 'relatorio.html'), 'w', encoding='utf-8') as arquivo:
+                arquivo.write(pagina)
+
+    except Exception as e:
+        return {**resumo, 'situacao': 'erro', 'erro': f"Falha ao gravar o relatório: {e}",
+                'segundos': time.perf_counter() - inicio}
+
+    return {**resumo, 'situacao': 'ok', 'p_value_reclamacoes': metricas['p_value'],
+            'p_value_carne': insights['p_value'], 'segundos': time.perf_counter() - inicio}
+
+
+def _write_index(output_dir: str, resultados: list, resumo: dict):
+    with open(os.path.join(output_dir, 'index.json'), 'w', encoding='utf-8') as arquivo:
+        json.dump(_json_ready({'resumo': resumo, 'segmentos': resultados}), arquivo, ensure_ascii=False, indent=2)
+
+    gerados = [r for r in resultados if r['situacao'] == 'ok']
+    linhas_md = [f"| [{_segment_title(r['segmento'])}](segmentos/{r['slug']}/relatorio.md) | {r['linhas']} | "
+                 f"{r['p_value_reclamacoes']:.4f} | {r['p_value_carne']:.4f} |" for r in gerados]
+    with open(os.path.join(output_dir, 'index.md'), 'w', encoding='utf-8') as arquivo:
+        arquivo.write(f"# Relatórios por segmento\n\n{resumo['gerados']} segmentos gerados em "
+                      f"{resumo['segundos']:.1f} s ({resumo['segmentos_por_segundo']:.1f} segmentos/s).\n\n"
+                      "| Segmento | Clientes | Valor-p reclamações | Valor-p carne |\n|---|---|---|---|\n"
+                      + '\n'.join(linhas_md) + '\n')
+
+    linhas_html = ''.join(f"<tr><td><a href=\"segmentos/{r['slug']}/relatorio.html\">"
+                          f"{html.escape(_segment_title(r['segmento']))}</a></td><td>{r['linhas']}</td>"
+                          f"<td>{r['p_value_reclamacoes']:.4f}</td><td>{r['p_value_carne']:.4f}</td></tr>"
+                          for r in gerados)
+    with open(os.path.join(output_dir, 'index.html'), 'w', encoding='utf-8') as arquivo:
+        arquivo.write(f"""<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>Relatórios por segmento</title></head><body>
+<h1>Relatórios por segmento</h1>
+<p>{resumo['gerados']} segmentos gerados em {resumo['segundos']:.1f} s ({resumo['segmentos_por_segundo']:.1f} segmentos/s).</p>
+<table border="1" cellpadding="4"><tr><th>Segmento</th><th>Clientes</th><th>Valor-p reclamações</th><th>Valor-p carne</th></tr>
+{linhas_html}</table></body></html>""")
+
+
+def generate_reports(csv_path: str = DEFAULT_DATA_PATH, output_dir: str = DEFAULT_OUTPUT_DIR,
+                     processes: int = None, formats=FORMATS, figures: str = 'png', min_rows: int = 10,
+                     estados=None, educacao=None, faixas=None) -> dict:
+    """
+    Gera os relatórios de todos os segmentos em um pool de processos.
+
+    Parâmetros:
+      - csv_path (str): CSV processado.
+      - output_dir (str): Pasta de saída.
+      - processes (int, opcional): Processos do pool (padrão: número de CPUs).
+      - formats (iterable): Formatos dos relatórios ('html', 'md', 'json').
+      - figures (str): Formato das figuras ('png', 'svg', 'html' ou 'nenhuma').
+      - min_rows (int): Segmentos com menos clientes são ignorados.
+      - estados, educacao, faixas (list, opcional): Restringe os segmentos.
+
+    Retorna:
+      - dict: Segmentos gerados, ignorados e com erro, tempo total e vazão (segmentos/s).
+    """
+    global _BASE
+    if figures in ('png', 'svg') and not image_export_available(figures):
+        print("⚠️ Exportação de imagens indisponível (kaleido ausente ou sem navegador): figuras gravadas em HTML.")
+        figures = 'html'
+
+    inicio = time.perf_counter()
+    # Carregado antes de criar o pool: com fork, os processos herdam o DataFrame
+    _BASE = load_base(csv_path)
+    segmentos = enumerate_segments(_BASE, estados, educacao, faixas)
+    os.makedirs(output_dir, exist_ok=True)
+    opcoes = {'formatos': tuple(formats), 'figuras': figures, 'minimo': min_rows}
+
+    metodos = multiprocessing.get_all_start_methods()
+    contexto = multiprocessing.get_context('fork' if 'fork' in metodos else None)
+    processos = processes or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=processos, mp_context=contexto, initializer=_init_worker,
+                             initargs=(csv_path, output_dir, opcoes)) as pool:
+        resultados = list(pool.map(run_segment, segmentos, chunksize=max(1, len(segmentos) // (processos * 8))))
+    segundos = time.perf_counter() - inicio
+
+    situacoes = pd.Series([r['situacao'] for r in resultados])
+    resumo = {
+        'segmentos': len(resultados),
+        'gerados': int((situacoes == 'ok').sum()),
+        'ignorados': int((situacoes == 'ignorado').sum()),
+        'erros': int((situacoes == 'erro').sum()),
+        'processos': processos,
+        'segundos': segundos,
+        'segmentos_por_segundo': len(resultados) / segundos if segundos else float('nan'),
+    }
+    _write_index(output_dir, resultados, resumo)
+    return resumo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera os relatórios executivos de todos os segmentos.")
+    parser.add_argument('csv_path', nargs='?', default=DEFAULT_DATA_PATH, help="CSV processado")
+    parser.add_argument('--saida', default=DEFAULT_OUTPUT_DIR, help="Pasta de saída")
+    parser.add_argument('--processos', type=int, default=None, help="Processos do pool (padrão: CPUs)")
+    parser.add_argument('--formatos', nargs='+', choices=FORMATS, default=list(FORMATS), help="Formatos dos relatórios")
+    parser.add_argument('--figuras', choices=FIGURE_FORMATS, default='png', help="Formato das figuras")
+    parser.add_argument('--minimo', type=int, default=10, help="Mínimo de clientes por segmento")
+    parser.add_argument('--estados', nargs='+', default=None, help="Estados civis (padrão: todos)")
+    parser.add_argument('--educacao', nargs='+', default=None, help="Níveis de educação (padrão: todos)")
+    parser.add_argument('--faixas', nargs='+', choices=AGE_LABELS, default=None, help="Faixas etárias (padrão: todas)")
+    args = parser.parse_args()
+
+    resumo = generate_reports(args.csv_path, args.saida, args.processos, args.formatos, args.figuras,
+                              args.minimo, args.estados, args.educacao, args.faixas)
+    print(f"✅ {resumo['gerados']} segmentos em {resumo['segundos']:.1f} s "
+          f"({resumo['segmentos_por_segundo']:.1f} segmentos/s, {resumo['processos']} processos) -> '{args.saida}'")
+    if resumo['ignorados']:
+        print(f"  - {resumo['ignorados']} segmentos com menos de {args.minimo} clientes ignorados")
+    if resumo['erros']:
+        print(f"⚠️ {resumo['erros']} segmentos com erro (ver index.json)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""
+Benchmark reprodutível das funções de análise dos dashboards.
+
+Gera (uma única vez) dados sintéticos em cada escala pedida, executa cada
+função em um processo separado e mede:
+  - tempo de parede (mediana e mínimo entre as repetições);
+  - pico de RSS do processo antes e depois das execuções;
+  - pico de memória alocada durante uma execução (tracemalloc);
+  - tempo de inicialização de cada dashboard (importação, módulos adiados,
+    primeiro render e render após o aquecimento).
+
+Os resultados são gravados em JSON com o commit atual, para comparação entre
+versões (`--comparar`); o processo termina com código 1 se algum caso ficar
+mais lento que a tolerância.
+
+Uso:
+    python benchmark.py --tamanhos 10000 1000000 10000000
+    python benchmark.py --tamanhos 10000 --comparar ../benchmarks/abc1234.json
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import numpy as np
+
+from data_store import SharedDataset, ensure_snapshot, load_columns, snapshot_path
+from synthetic_data import write_csv
+from warmup import DASHBOARDS, preload_modules
+
+DEFAULT_SIZES = (10_000, 1_000_000, 10_000_000)
+DEFAULT_DATA_DIR = '../data/synthetic'
+DEFAULT_RESULTS_DIR = '../benchmarks'
+
+
+# ============================
+# Casos medidos
+# ============================
+# Cada caso tem uma preparação (fora da medição) e a chamada medida. Os
+# dashboards são importados dentro das funções, no processo do caso, e as
+# funções com cache do Streamlit são chamadas sem o cache (`__wrapped__`).
+
+def _campaign():
+    import dashboard_campaign
+    return dashboard_campaign
+
+
+def _gastos_ouro():
+    import dashboard_gastos_ouro
+    return dashboard_gastos_ouro
+
+
+def _status():
+    import dashboard_status
+    return dashboard_status
+
+
+def _load_cold(csv_path):
+    # Remove o snapshot para medir a leitura do CSV e a construção do snapshot
+    os.remove(snapshot_path(csv_path))
+    return _campaign().load_data.__wrapped__(csv_path)
+
+
+def _gold_frame(csv_path):
+    # Entrada das funções por cliente do dashboard de ouro (usadas pelos relatórios em lote)
+    return load_columns(csv_path, ['Year_Birth', 'MntGoldProds']).dropna()
+
+
+def _gold_input(csv_path):
+    return _gastos_ouro().calculate_age_and_groups(_gold_frame(csv_path))
+
+
+def _status_input(csv_path):
+    dataset = _status().load_data.__wrapped__(csv_path)
+    return dataset.take(['Marital_Status', 'MntMeatProducts', 'Income'], np.ones(dataset.num_rows, dtype=bool))
+
+
+def _complaint_cube(dataset, backend):
+    # Mesmo cubo do load_cube; os processos leem faixas de linhas do snapshot. As partições
+    # são forçadas (ao menos duas) para medir o pool também nas escalas pequenas
+    from execution import map_reduce
+    from filter_cube import build_raw_complaint_cube, complaint_columns, merge_complaint_cubes
+    return map_reduce(dataset, build_raw_complaint_cube, merge_complaint_cubes, backend,
+                      partitions=max(os.cpu_count() or 1, 2), columns=complaint_columns(dataset.columns))
+
+
+CASES = {
+    'load_data[campaign, frio]': (lambda path: path, _load_cold),
+    'load_data[campaign]': (lambda path: path, lambda path: _campaign().load_data.__wrapped__(path)),
+    'load_data[status]': (lambda path: path, lambda path: _status().load_data.__wrapped__(path)),
+    'calculate_age_and_groups': (_gold_frame, lambda df: _gastos_ouro().calculate_age_and_groups(df)),
+    'create_gold_spending_plot': (_gold_input, lambda df: _gastos_ouro().create_gold_spending_plot(df)),
+    'generate_insight_blocks': (_gold_input, lambda df: _gastos_ouro().generate_insight_blocks(df)),
+    'load_rollup[gastos_ouro]': (lambda path: path, lambda path: _gastos_ouro().load_rollup.__wrapped__(path)),
+    'age_band_means': (lambda path: _gastos_ouro().load_rollup.__wrapped__(path),
+                       lambda rollup: _gastos_ouro().age_band_means(rollup, 'MntGoldProds', (30, 60))),
+    'map_reduce[serial]': (SharedDataset, lambda dataset: _complaint_cube(dataset, 'serial')),
+    'map_reduce[processos]': (SharedDataset, lambda dataset: _complaint_cube(dataset, 'processos')),
+    'calculate_metrics': (lambda path: _campaign().load_data.__wrapped__(path),
+                          lambda df: _campaign().calculate_metrics(df)),
+    'analisar_gastos_carne_por_estado_civil': (
+        _status_input, lambda dados: _status().analisar_gastos_carne_por_estado_civil(dados)),
+}
+
+
+def _peak_rss_mb():
+    """Pico de RSS do processo em MB (None fora de sistemas Unix)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def run_case(name: str, csv_path: str, repetitions: int = 3) -> dict:
+    """
+    Executa um caso no processo atual e devolve as medições.
+
+    A preparação e uma execução de aquecimento ficam fora da medição; a
+    alocação é medida em uma execução extra, já que o tracemalloc deixa o
+    código mais lento.
+    """
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    preparar, executar = CASES[name]
+    ensure_snapshot(csv_path)
+    entrada = preparar(csv_path)
+    executar(entrada)
+    ensure_snapshot(csv_path)
+
+    rss_base = _peak_rss_mb()
+    tempos = []
+    for _ in range(repetitions):
+        inicio = time.perf_counter()
+        executar(entrada)
+        tempos.append(time.perf_counter() - inicio)
+        ensure_snapshot(csv_path)
+    rss_pico = _peak_rss_mb()
+
+    tracemalloc.start()
+    executar(entrada)
+    _, alocacao_pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'tempo_mediana_s': statistics.median(tempos),
+        'tempo_min_s': min(tempos),
+        'rss_base_mb': rss_base,
+        'rss_pico_mb': rss_pico,
+        'alocacao_pico_mb': alocacao_pico / (1024 * 1024),
+    }
+
+
+def measure_startup(script: str) -> dict:
+    """
+    Mede a inicialização de um dashboard no processo atual (que deve ser novo).
+
+    - importacao_s: importar o módulo do dashboard (até a página começar a ser desenhada);
+    - modulos_adiados_s: importar os módulos pesados que o dashboard só carrega sob demanda;
+    - primeiro_render_s: primeira execução completa, com os caches vazios;
+    - render_aquecido_s: execução seguinte, como após o aquecimento (warmup.py).
+    """
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    from streamlit.testing.v1 import AppTest
+
+    # A importação é medida em um interpretador limpo: este processo já carregou
+    # pandas e pyarrow para o próprio benchmark
+    modulo = os.path.splitext(script)[0]
+    codigo = f"import time; t = time.perf_counter(); import {modulo}; print(time.perf_counter() - t)"
+    saida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, check=True,
+                           cwd=os.path.dirname(os.path.abspath(__file__)))
+    importacao = float(saida.stdout.strip().splitlines()[-1])
+    importlib.import_module(modulo)
+
+    inicio = time.perf_counter()
+    preload_modules()
+    adiados = time.perf_counter() - inicio
+
+    caminho = os.path.join(os.path.dirname(os.path.abspath(__file__)), script)
+    tempos = []
+    for _ in range(2):
+        inicio = time.perf_counter()
+        AppTest.from_file(caminho, default_timeout=600).run()
+        tempos.append(time.perf_counter() - inicio)
+
+    return {
+        # Tempo até o primeiro render completo com os caches vazios
+        'tempo_mediana_s': importacao + adiados + tempos[0],
+        'tempo_min_s': importacao + adiados + tempos[0],
+        'importacao_s': importacao,
+        'modulos_adiados_s': adiados,
+        'primeiro_render_s': tempos[0],
+        'render_aquecido_s': tempos[1],
+        'rss_pico_mb': _peak_rss_mb(),
+    }
+
+
+def _run_isolated(arguments: list, csv_path: str) -> dict:
+    """Executa uma medição em um processo novo, para que o pico de RSS seja só dela."""
+    csv_path = os.path.abspath(csv_path)
+    saida = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), *arguments, '--csv', csv_path],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True,
+        env={**os.environ, 'MARKETING_DATA_PATH': csv_path}
+    )
+    if saida.returncode != 0:
+        return {'erro': saida.stderr.strip().splitlines()[-1] if saida.stderr.strip() else 'falha'}
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def synthetic_csv(rows: int, data_dir: str = DEFAULT_DATA_DIR, seed: int = 42) -> str:
+    """CSV sintético com `rows` linhas, gerado apenas se ainda não existir."""
+    caminho = os.path.join(data_dir, f"clientes_{rows}_s{seed}.csv")
+    if not os.path.exists(caminho):
+        write_csv(caminho, rows, seed)
+    return caminho
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconhecido'
+
+
+def run_suite(sizes=DEFAULT_SIZES, cases=None, repetitions: int = 3, data_dir: str = DEFAULT_DATA_DIR,
+              seed: int = 42, startup: bool = True) -> dict:
+    """
+    Executa os casos em cada escala e, se `startup`, a inicialização de cada dashboard.
+
+    Retorna:
+      - dict: Metadados do ambiente e lista de resultados por caso e escala.
+    """
+    resultados = []
+    for linhas in sizes:
+        caminho = synthetic_csv(linhas, data_dir, seed)
+        for nome in cases or CASES:
+            medicao = _run_isolated(['--caso', nome, '--repeticoes', str(repetitions)], caminho)
+            resultados.append({'caso': nome, 'linhas': linhas, **medicao})
+            print(_format_row(resultados[-1]), flush=True)
+        for script in (DASHBOARDS if startup else ()):
+            medicao = _run_isolated(['--inicializacao', script], caminho)
+            resultados.append({'caso': f"inicializacao[{os.path.splitext(script)[0]}]", 'linhas': linhas, **medicao})
+            print(_format_row(resultados[-1]), flush=True)
+    return {
+        'commit': current_commit(),
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'semente': seed,
+        'repeticoes': repetitions,
+        'resultados': resultados,
+    }
+
+
+def _format_row(linha: dict) -> str:
+    if 'erro' in linha:
+        return f"{linha['caso']:<42} {linha['linhas']:>10,}  ERRO: {linha['erro']}"
+    rss = f"{linha['rss_pico_mb']:9.1f} MB" if linha.get('rss_pico_mb') is not None else '        -'
+    if 'importacao_s' in linha:
+        return (f"{linha['caso']:<42} {linha['linhas']:>10,} {linha['tempo_mediana_s']:10.4f} s {rss}"
+                f"  (importação {linha['importacao_s']:.2f} s, adiados {linha['modulos_adiados_s']:.2f} s, "
+                f"1º render {linha['primeiro_render_s']:.2f} s, aquecido {linha['render_aquecido_s']:.2f} s)")
+    return (f"{linha['caso']:<42} {linha['linhas']:>10,} {linha['tempo_mediana_s']:10.4f} s "
+            f"{rss} {linha['alocacao_pico_mb']:9.1f} MB")
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.2, min_seconds: float = 0.005) -> list:
+    """
+    Compara a mediana de tempo de cada caso com uma execução anterior.
+
+    Um caso é regressão se ficar mais de `tolerance` (fração) mais lento e a
+    diferença absoluta passar de `min_seconds` (ruído de medição).
+
+    Retorna:
+      - list: Linhas (caso, linhas, tempo anterior, tempo atual, razão, regressão).
+    """
+    anteriores = {(r['caso'], r['linhas']): r for r in baseline['resultados'] if 'erro' not in r}
+    comparacao = []
+    for atual in current['resultados']:
+        anterior = anteriores.get((atual['caso'], atual['linhas']))
+        if anterior is None or 'erro' in atual:
+            continue
+        razao = atual['tempo_mediana_s'] / anterior['tempo_mediana_s']
+        regressao = (razao > 1 + tolerance
+                     and atual['tempo_mediana_s'] - anterior['tempo_mediana_s'] > min_seconds)
+        comparacao.append((atual['caso'], atual['linhas'], anterior['tempo_mediana_s'],
+                           atual['tempo_mediana_s'], razao, regressao))
+    return comparacao
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das funções de análise dos dashboards.")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=list(DEFAULT_SIZES), help="Linhas por escala")
+    parser.add_argument('--casos', nargs='+', choices=list(CASES), default=None, help="Casos a executar")
+    parser.add_argument('--repeticoes', type=int, default=3, help="Execuções medidas por caso")
+    parser.add_argument('--semente', type=int, default=42, help="Semente dos dados sintéticos")
+    parser.add_argument('--dados', default=DEFAULT_DATA_DIR, help="Pasta dos CSVs sintéticos")
+    parser.add_argument('--saida', default=None, help="Arquivo JSON de resultados")
+    parser.add_argument('--comparar', default=None, help="JSON de uma execução anterior")
+    parser.add_argument('--tolerancia', type=float, default=0.2, help="Aumento de tempo aceito (fração)")
+    parser.add_argument('--sem-inicializacao', action='store_true', help="Não medir a inicialização dos dashboards")
+    parser.add_argument('--caso', help=argparse.SUPPRESS)
+    parser.add_argument('--inicializacao', help=argparse.SUPPRESS)
+    parser.add_argument('--csv', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Modo interno: um único caso, executado no processo filho
+    if args.caso:
+        print(json.dumps(run_case(args.caso, args.csv, args.repeticoes)))
+        return
+    if args.inicializacao:
+        print(json.dumps(measure_startup(args.inicializacao)))
+        return
+
+    print(f"{'caso':<42} {'linhas':>10} {'tempo':>12} {'pico RSS':>12} {'alocação':>12}")
+    resultado = run_suite(args.tamanhos, args.casos, args.repeticoes, args.dados, args.semente,
+                          not args.sem_inicializacao)
+
+    saida = args.saida or os.path.join(DEFAULT_RESULTS_DIR, f"{resultado['commit']}.json")
+    os.makedirs(os.path.dirname(saida) or '.', exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em {saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            linhas = compare(resultado, json.load(arquivo), args.tolerancia)
+        print(f"\nComparação com {args.comparar}:")
+        for caso, n, antes, depois, razao, regressao in linhas:
+            marca = '  <-- REGRESSÃO' if regressao else ''
+            print(f"{caso:<42} {n:>10,} {antes:10.4f} s -> {depois:10.4f} s ({razao:5.2f}x){marca}")
+        if any(linha[-1] for linha in linhas):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Índice de bitmaps para os filtros combinados dos dashboards.
+
+Sobre o SharedDataset são construídos, uma única vez:
+  - um bitmap por valor das colunas categóricas (Marital_Status, Education,
+    Complain, Response e ano de inscrição);
+  - um índice ordenado para filtros de intervalo (Income, Year_Birth), com
+    bitmaps acumulados nos pontos de corte de quantis da coluna ordenada.
+
+Um intervalo vira o XOR de dois bitmaps acumulados, corrigido pelas linhas
+das pontas (no máximo um balde de cada lado), sem montar uma máscara de n
+booleanos. Quem só precisa das linhas de um intervalo pode pegá-las direto
+do índice ordenado (`between_rows`).
+
+Filtros são expressões em tuplas, resolvidas por interseção/união de bitmaps:
+    ('eq', coluna, valor)
+    ('in', coluna, [valores])
+    ('between', coluna, minimo, maximo)
+    ('and', expr, expr, ...), ('or', expr, expr, ...), ('not', expr)
+"""
+import numpy as np
+
+from bitset import from_rows, pack, popcount, to_rows, unpack
+from data_store import SharedDataset
+
+ENROLLMENT_YEAR = 'Ano_Inscricao'
+CATEGORICAL_COLUMNS = ('Marital_Status', 'Education', 'Complain', 'Response', ENROLLMENT_YEAR)
+RANGE_COLUMNS = ('Income', 'Year_Birth')
+# Baldes (quantis) com bitmap acumulado por coluna de intervalo
+RANGE_BUCKETS = 32
+
+
+class BitmapIndex:
+    """
+    Bitmaps por valor e índices ordenados por coluna sobre um SharedDataset.
+
+    Os bitmaps são compactados (um bit por linha em palavras de 64 bits), então
+    combinar filtros custa O(n / 64) operações, sem reler as colunas. Cada
+    coluna de intervalo guarda `buckets` + 1 bitmaps acumulados (memória de
+    cerca de `buckets` × n / 8 bytes).
+
+    O índice é compartilhado entre sessões (`st.cache_resource`): todos os
+    arrays guardados são somente leitura, e `resolve` sempre monta os
+    resultados compostos em arrays novos.
+    """
+
+    def __init__(self, dataset: SharedDataset, categorical=CATEGORICAL_COLUMNS, ranges=RANGE_COLUMNS,
+                 buckets: int = RANGE_BUCKETS):
+        self.num_rows = dataset.num_rows
+        self.version = dataset.version
+        self._all = pack(np.ones(self.num_rows, dtype=bool))
+        self.bitmaps = {}
+        self.sorted = {}
+        self.cumulative = {}
+
+        for coluna in categorical:
+            if coluna == ENROLLMENT_YEAR and 'Dt_Customer' in dataset.columns:
+                # Ano de inscrição derivado de Dt_Customer
+                anos = dataset.column('Dt_Customer').astype('datetime64[Y]').astype(np.int64) + 1970
+                valores, codigos = np.unique(anos, return_inverse=True)
+                self._add_bitmaps(coluna, codigos, valores.tolist())
+            elif coluna in dataset.columns:
+                try:
+                    codigos, valores = dataset.codes(coluna)
+                except TypeError:
+                    valores, codigos = np.unique(dataset.column(coluna), return_inverse=True)
+                    valores = valores.tolist()
+                self._add_bitmaps(coluna, codigos, valores)
+
+        for coluna in ranges:
+            if coluna not in dataset.columns:
+                continue
+            valores = dataset.column(coluna)
+            linhas = np.flatnonzero(~np.isnan(valores)) if valores.dtype.kind == 'f' else np.arange(len(valores))
+            ordem = linhas[np.argsort(valores[linhas], kind='stable')]
+            self.sorted[coluna] = (valores[ordem], ordem)
+            self.cumulative[coluna] = self._cumulative(ordem, buckets)
+
+        # Bitmaps devolvidos por `equals`/`resolve` não podem ser alterados por quem chama
+        guardados = [self._all, *self.bitmaps.values()]
+        for par in (*self.sorted.values(), *self.cumulative.values()):
+            guardados.extend(par)
+        for array in guardados:
+            array.flags.writeable = False
+
+    def _cumulative(self, ordem: np.ndarray, buckets: int) -> tuple:
+        # Cortes nos quantis da coluna ordenada; o bitmap j tem as linhas ordem[:cortes[j]]
+        cortes = np.unique(np.linspace(0, len(ordem), buckets + 1).round().astype(np.int64))
+        acumulados = np.zeros((len(cortes), len(self._all)), dtype=np.uint64)
+        for j in range(1, len(cortes)):
+            acumulados[j] = acumulados[j - 1] | self._from_rows(ordem[cortes[j - 1]:cortes[j]])
+        return cortes, acumulados
+
+    def _add_bitmaps(self, coluna: str, codigos: np.ndarray, valores: list):
+        # Uma ordenação por código gera as listas de linhas de todos os valores
+        ordem = np.argsort(codigos, kind='stable')
+        limites = np.searchsorted(codigos[ordem], np.arange(len(valores) + 1))
+        for i, valor in enumerate(valores):
+            self.bitmaps[(coluna, valor)] = self._from_rows(ordem[limites[i]:limites[i + 1]])
+
+    def _from_rows(self, linhas: np.ndarray) -> np.ndarray:
+        return from_rows(linhas, self.num_rows)
+
+    def values(self, column: str) -> list:
+        """Valores indexados de uma coluna categórica."""
+        return [valor for (coluna, valor) in self.bitmaps if coluna == column]
+
+    def equals(self, column: str, value) -> np.ndarray:
+        """Bitmap (somente leitura) das linhas com `column == value`."""
+        if not any(coluna == column for coluna, _ in self.bitmaps):
+            raise ValueError(f"A coluna '{column}' não possui índice de bitmaps.")
+        bitmap = self.bitmaps.get((column, value))
+        return bitmap if bitmap is not None else np.zeros_like(self._all)
+
+    def _range(self, column: str, lower, upper) -> tuple:
+        if column not in self.sorted:
+            raise ValueError(f"A coluna '{column}' não possui índice ordenado.")
+        valores, _ = self.sorted[column]
+        inicio = np.searchsorted(valores, lower, side='left')
+        return inicio, max(inicio, np.searchsorted(valores, upper, side='right'))
+
+    def between_rows(self, column: str, lower, upper) -> np.ndarray:
+        """
+        Linhas com `lower <= column <= upper`, na ordem dos valores.
+
+        Devolve uma fatia do índice ordenado (sem cópia); use `np.sort` se
+        precisar das linhas em ordem crescente.
+        """
+        inicio, fim = self._range(column, lower, upper)
+        return self.sorted[column][1][inicio:fim]
+
+    def between(self, column: str, lower, upper) -> np.ndarray:
+        """
+        Bitmap das linhas com `lower <= column <= upper`.
+
+        Com os cortes j ≤ início e k ≤ fim mais próximos, o intervalo é
+        acumulado[k] XOR acumulado[j], trocando os bits das linhas entre o
+        corte j e o início e entre o corte k e o fim.
+        """
+        inicio, fim = self._range(column, lower, upper)
+        _, ordem = self.sorted[column]
+        cortes, acumulados = self.cumulative[column]
+        j = np.searchsorted(cortes, inicio, side='right') - 1
+        k = np.searchsorted(cortes, fim, side='right') - 1
+        if j == k:
+            # Intervalo dentro de um único balde
+            return self._from_rows(ordem[inicio:fim])
+        pontas = np.concatenate([ordem[cortes[j]:inicio], ordem[cortes[k]:fim]])
+        return acumulados[k] ^ acumulados[j] ^ self._from_rows(pontas)
+
+    def resolve(self, expr) -> np.ndarray:
+        """
+        Resolve uma expressão de filtro em um bitmap compactado.
+
+        'eq' e a expressão vazia devolvem bitmaps guardados no índice, somente
+        leitura; copie o resultado antes de alterá-lo.
+        """
+        if expr is None:
+            return self._all
+        operador, *argumentos = expr
+        if operador == 'eq':
+            return self.equals(*argumentos)
+        if operador == 'in':
+            coluna, valores = argumentos
+            resultado = np.zeros_like(self._all)
+            for valor in valores:
+                resultado |= self.equals(coluna, valor)
+            return resultado
+        if operador == 'between':
+            return self.between(*argumentos)
+        if operador == 'and':
+            resultado = self._all.copy()
+            for sub in argumentos:
+                resultado &= self.resolve(sub)
+            return resultado
+        if operador == 'or':
+            resultado = np.zeros_like(self._all)
+            for sub in argumentos:
+                resultado |= self.resolve(sub)
+            return resultado
+        if operador == 'not':
+            return ~self.resolve(argumentos[0]) & self._all
+        raise ValueError(f"Operador de filtro desconhecido: '{operador}'.")
+
+    def mask(self, expr) -> np.ndarray:
+        """Máscara booleana das linhas selecionadas pela expressão."""
+        return unpack(self.resolve(expr), self.num_rows)
+
+    def select(self, expr) -> np.ndarray:
+        """Posições (em ordem crescente) das linhas selecionadas, sem montar a máscara booleana."""
+        if expr is not None and expr[0] == 'between':
+            return np.sort(self.between_rows(*expr[1:]))
+        return to_rows(self.resolve(expr))
+
+    def count(self, expr) -> int:
+        """Quantidade de linhas selecionadas (popcount, sem desempacotar)."""
+        return popcount(self.resolve(expr))
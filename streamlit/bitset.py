@@ -0,0 +1,57 @@
+"""
+Bitsets compactados: um bit por linha em palavras de 64 bits.
+
+A linha i fica no byte i // 8 (bit mais significativo primeiro, como em
+np.packbits) e o último byte é completado com zeros até fechar a palavra.
+Usado pelo índice de bitmaps dos filtros e pela análise de cesta de compras.
+"""
+import numpy as np
+
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+_BIT_IN_BYTE = np.array([0x80 >> i for i in range(8)], dtype=np.float64)
+
+
+def words(num_rows: int) -> int:
+    """Número de palavras de 64 bits de um bitset com `num_rows` linhas."""
+    return -(-num_rows // 64)
+
+
+def popcount(bits: np.ndarray) -> int:
+    """Número de bits ligados em um bitset compactado."""
+    if hasattr(np, 'bitwise_count'):
+        return int(np.bitwise_count(bits).sum(dtype=np.int64))
+    return int(_POPCOUNT_TABLE[bits.view(np.uint8)].sum(dtype=np.int64))
+
+
+def pack(mask: np.ndarray) -> np.ndarray:
+    """Compacta uma máscara booleana em palavras de 64 bits."""
+    bits = np.packbits(np.asarray(mask, dtype=bool))
+    preenchimento = (-len(bits)) % 8
+    if preenchimento:
+        bits = np.concatenate([bits, np.zeros(preenchimento, dtype=np.uint8)])
+    return bits.view(np.uint64)
+
+
+def from_rows(rows: np.ndarray, num_rows: int) -> np.ndarray:
+    """
+    Bitset com as linhas `rows` ligadas, sem montar uma máscara de `num_rows` booleanos.
+
+    As linhas devem ser distintas: os bits de um mesmo byte são somados.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    bytes_ = np.bincount(rows >> 3, weights=_BIT_IN_BYTE[rows & 7], minlength=words(num_rows) * 8)
+    return bytes_.astype(np.uint8).view(np.uint64)
+
+
+def to_rows(bits: np.ndarray) -> np.ndarray:
+    """Posições (em ordem crescente) dos bits ligados, desempacotando só as palavras não nulas."""
+    palavras = np.flatnonzero(bits)
+    if not len(palavras):
+        return np.empty(0, dtype=np.int64)
+    linha, bit = np.nonzero(np.unpackbits(bits[palavras].view(np.uint8)).reshape(-1, 64))
+    return palavras[linha] * 64 + bit
+
+
+def unpack(bits: np.ndarray, num_rows: int) -> np.ndarray:
+    """Máscara booleana de `num_rows` linhas a partir de um bitset."""
+    return np.unpackbits(bits.view(np.uint8), count=num_rows).astype(bool)
@@ -0,0 +1,241 @@
+"""
+Análise de cohortes incremental (equivalente a sql/advanced_queries/cohorte.sql).
+
+Guarda acumuladores por cohorte (ano de cadastro em Dt_Customer × Education):
+quantidade de clientes, soma de MntWines e soma de Response. A cada
+atualização, apenas os bytes acrescentados ao CSV desde a última leitura são
+processados; a posição lida (marca d'água) fica gravada junto com os
+acumuladores, então o custo da atualização depende das linhas novas e não do
+histórico. Os acumuladores são refeitos do zero quando o arquivo é trocado
+(outro inode, como numa gravação atômica), quando o cabeçalho muda ou quando
+o primeiro bloco após o cabeçalho ou o bloco logo antes da marca d'água não
+conferem com os hashes gravados. Uma edição no meio da parte já lida do
+mesmo arquivo, que preserve o tamanho até a marca e esses dois blocos, não é
+detectada.
+
+A taxa de resposta e o crescimento do gasto médio em vinhos em relação à
+cohorte anterior do mesmo nível educacional (o LAG da consulta) são
+derivados dos acumuladores sob demanda, em `cohort_metrics`.
+
+Uso:
+    python cohort.py ../data/processed/marketing_campaign_atualizado.csv --tamanho-minimo 30
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_store import DEFAULT_DATA_PATH, READ_DTYPES
+from materialization import default_derived_dir
+from schema import compact
+
+COHORT_COLUMNS = ['Dt_Customer', 'Education', 'MntWines', 'Response']
+COHORT_KEYS = ['enrollment_cohort', 'education_level']
+ACCUMULATORS = ['cohort_size', 'wines_sum', 'response_sum']
+MIN_COHORT_SIZE = 30
+
+_STATE_FILE = 'cohort_state.parquet'
+_WATERMARK_KEY = b'cohort_watermark'
+# Bytes após o cabeçalho e antes da marca d'água usados para detectar reescritas do arquivo
+_CHECK_BYTES = 4096
+
+
+def empty_accumulators() -> pd.DataFrame:
+    """Acumuladores sem nenhuma cohorte."""
+    indice = pd.MultiIndex.from_arrays([pd.Index([], dtype='int64'), pd.Index([], dtype='object')],
+                                       names=COHORT_KEYS)
+    return pd.DataFrame({coluna: pd.Series([], dtype='int64') for coluna in ACCUMULATORS}, index=indice)
+
+
+def cohort_accumulators(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Acumuladores (quantidade, soma de MntWines, soma de Response) por cohorte de um bloco.
+
+    Retorna:
+      - pd.DataFrame: Indexado por (enrollment_cohort, education_level).
+    """
+    chunk = chunk.dropna(subset=['Dt_Customer', 'Education'])
+    chaves = [chunk['Dt_Customer'].dt.year.rename('enrollment_cohort').astype('int64'),
+              chunk['Education'].astype(str).rename('education_level')]
+    acumulado = chunk.groupby(chaves, observed=True).agg(
+        cohort_size=('MntWines', 'size'),
+        wines_sum=('MntWines', 'sum'),
+        response_sum=('Response', 'sum'),
+    )
+    return acumulado.astype('int64')
+
+
+def merge_accumulators(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    """Combina dois conjuntos de acumuladores (somas exatas)."""
+    return a.add(b, fill_value=0).astype('int64')
+
+
+def _range_hash(csv_path: str, inicio: int, fim: int) -> str:
+    with open(csv_path, 'rb') as arquivo:
+        arquivo.seek(inicio)
+        return hashlib.sha1(arquivo.read(max(0, fim - inicio))).hexdigest()
+
+
+def _file_signature(csv_path: str, header_bytes: int, offset: int) -> dict:
+    """Inode e hashes do primeiro bloco após o cabeçalho e do bloco antes de `offset`."""
+    fim_inicial = min(header_bytes + _CHECK_BYTES, offset)
+    return {
+        'inode': os.stat(csv_path).st_ino,
+        'head_end': fim_inicial,
+        'head_hash': _range_hash(csv_path, header_bytes, fim_inicial),
+        'tail_hash': _range_hash(csv_path, max(header_bytes, offset - _CHECK_BYTES), offset),
+    }
+
+
+def _file_changed(csv_path: str, header_bytes: int, watermark: dict) -> bool:
+    """Indica se o arquivo lido até a marca d'água foi trocado ou reescrito."""
+    if watermark['offset'] > os.path.getsize(csv_path) or watermark.get('inode') != os.stat(csv_path).st_ino:
+        return True
+    offset = watermark['offset']
+    return (_range_hash(csv_path, header_bytes, watermark.get('head_end', header_bytes)) != watermark.get('head_hash')
+            or _range_hash(csv_path, max(header_bytes, offset - _CHECK_BYTES), offset) != watermark.get('tail_hash'))
+
+
+def _appended_blocks(csv_path: str, offset: int, header: list, block_bytes: int):
+    """
+    Lê o CSV a partir de `offset` em blocos de linhas completas.
+
+    Gera (DataFrame do bloco, posição logo após a última linha completa).
+    Uma última linha sem quebra de linha (ainda sendo gravada) não é consumida.
+    """
+    usecols = [coluna for coluna in COHORT_COLUMNS if coluna in header]
+    tipos = {coluna: READ_DTYPES[coluna] for coluna in usecols if coluna in READ_DTYPES}
+    with open(csv_path, 'rb') as arquivo:
+        arquivo.seek(offset)
+        pendente = b''
+        while True:
+            lido = arquivo.read(block_bytes)
+            if not lido:
+                break
+            dados = pendente + lido
+            corte = dados.rfind(b'\n') + 1
+            pendente = dados[corte:]
+            if corte == 0:
+                continue
+            offset += corte
+            bloco = pd.read_csv(io.BytesIO(dados[:corte]), header=None, names=header, usecols=usecols,
+                                dtype=tipos, parse_dates=['Dt_Customer'])
+            yield compact(bloco), offset
+
+
+def _load_state(state_path: str):
+    try:
+        tabela = pq.read_table(state_path)
+    except (OSError, pa.ArrowInvalid):
+        return None, None
+    marca = json.loads((tabela.schema.metadata or {}).get(_WATERMARK_KEY, b'null'))
+    acumulado = tabela.to_pandas()
+    if marca is None or not set(COHORT_KEYS + ACCUMULATORS) <= set(acumulado.columns):
+        return None, None
+    return acumulado.set_index(COHORT_KEYS), marca
+
+
+def _save_state(state_path: str, accumulators: pd.DataFrame, watermark: dict):
+    # Acumuladores e marca d'água no mesmo arquivo, trocado de forma atômica:
+    # nunca há acumuladores de uma leitura com a marca d'água de outra
+    tabela = pa.Table.from_pandas(accumulators.reset_index(), preserve_index=False)
+    metadata = dict(tabela.schema.metadata or {})
+    metadata[_WATERMARK_KEY] = json.dumps(watermark).encode()
+    os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+    temporario = f"{state_path}.{os.getpid()}.tmp"
+    pq.write_table(tabela.replace_schema_metadata(metadata), temporario)
+    os.replace(temporario, state_path)
+
+
+def refresh_cohorts(csv_path: str = DEFAULT_DATA_PATH, derived_dir: str = None,
+                    block_bytes: int = 64 * 2**20) -> tuple:
+    """
+    Atualiza os acumuladores com as linhas acrescentadas ao CSV desde a última leitura.
+
+    Parâmetros:
+      - csv_path (str): Caminho do CSV processado.
+      - derived_dir (str, opcional): Pasta do estado (padrão: a das tabelas derivadas).
+      - block_bytes (int): Bytes lidos por bloco.
+
+    Retorna:
+      - tuple: (acumuladores por cohorte, resumo com linhas novas, bytes lidos e
+        se houve reconstrução completa).
+    """
+    derived_dir = derived_dir or default_derived_dir(csv_path)
+    caminho_estado = os.path.join(derived_dir, _STATE_FILE)
+    with open(csv_path, 'rb') as arquivo:
+        linha_cabecalho = arquivo.readline()
+    header = linha_cabecalho.decode('utf-8').strip().split(',')
+
+    acumulado, marca = _load_state(caminho_estado)
+    reconstruir = (acumulado is None or marca['header'] != header
+                   or _file_changed(csv_path, len(linha_cabecalho), marca))
+    if reconstruir:
+        acumulado = empty_accumulators()
+        marca = {'offset': len(linha_cabecalho), 'header': header}
+
+    inicio, linhas = marca['offset'], 0
+    for bloco, offset in _appended_blocks(csv_path, marca['offset'], header, block_bytes):
+        acumulado = merge_accumulators(acumulado, cohort_accumulators(bloco))
+        marca['offset'] = offset
+        linhas += len(bloco)
+
+    if reconstruir or linhas:
+        marca.update(_file_signature(csv_path, len(linha_cabecalho), marca['offset']))
+        _save_state(caminho_estado, acumulado, marca)
+    resumo = {'linhas_novas': linhas, 'bytes_lidos': marca['offset'] - inicio, 'reconstruido': reconstruir}
+    return acumulado, resumo
+
+
+def cohort_metrics(accumulators: pd.DataFrame, min_size: int = MIN_COHORT_SIZE,
+                   years: tuple = None) -> pd.DataFrame:
+    """
+    Taxa de resposta e crescimento do gasto em vinhos por cohorte.
+
+    O crescimento compara o gasto médio em vinhos de cada cohorte com o da
+    cohorte anterior do mesmo nível educacional (LAG em cohorte.sql) e é
+    calculado antes do filtro de tamanho, como na consulta.
+
+    Parâmetros:
+      - accumulators (pd.DataFrame): Saída de `refresh_cohorts`.
+      - min_size (int): Mantém apenas cohortes com mais de `min_size` clientes.
+      - years (tuple, opcional): (ano inicial, ano final) das cohortes exibidas.
+
+    Retorna:
+      - pd.DataFrame: enrollment_cohort, education_level, cohort_size,
+        response_rate, avg_wines e spending_growth.
+    """
+    df = accumulators.reset_index().sort_values(['education_level', 'enrollment_cohort'], ignore_index=True)
+    df['response_rate'] = df['response_sum'] / df['cohort_size']
+    df['avg_wines'] = df['wines_sum'] / df['cohort_size']
+    anterior = df.groupby('education_level')['avg_wines'].shift(1)
+    df['spending_growth'] = (df['avg_wines'] - anterior) / anterior
+
+    selecao = df['cohort_size'] > min_size
+    if years is not None:
+        selecao &= df['enrollment_cohort'].between(years[0], years[1])
+    return df.loc[selecao, ['enrollment_cohort', 'education_level', 'cohort_size',
+                            'response_rate', 'avg_wines', 'spending_growth']].reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Atualiza e exibe a análise de cohortes por educação.")
+    parser.add_argument('csv_path', nargs='?', default=DEFAULT_DATA_PATH, help="CSV processado")
+    parser.add_argument('--destino', default=None, help="Pasta do estado das cohortes")
+    parser.add_argument('--tamanho-minimo', type=int, default=MIN_COHORT_SIZE,
+                        help="Cohortes com até este número de clientes são omitidas")
+    args = parser.parse_args()
+
+    acumulado, resumo = refresh_cohorts(args.csv_path, args.destino)
+    origem = 'reconstruídos' if resumo['reconstruido'] else 'atualizados'
+    print(f"Acumuladores {origem}: {resumo['linhas_novas']} linhas novas ({resumo['bytes_lidos']} bytes lidos)")
+    print(cohort_metrics(acumulado, args.tamanho_minimo).round(4).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
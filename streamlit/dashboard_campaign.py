@@ -1,10 +1,18 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.express as px
 import plotly.graph_objects as go
-from scipy.stats import ttest_ind
-from datetime import datetime
+
+from data_store import DEFAULT_DATA_PATH, SharedDataset, load_columns, snapshot_columns
+from execution import get_backend, grouped_moments, map_reduce
+from filter_cube import (COMPLAIN_FLAGS, build_raw_complaint_cube, complaint_columns, complaint_frame, cube_metrics,
+                         merge_complaint_cubes, query_year_counts)
+from group_stats import group_welch_ttest
+from instrumentation import span, trace_run
+from refresher import describe, get_refresher
+from result_cache import filter_signature, get_cache
+
+# Backend das agregações (MARKETING_BACKEND_DASHBOARD_CAMPAIGN)
+BACKEND = get_backend('dashboard_campaign')
 
 # Configuração inicial da página
 st.set_page_config(
@@ -43,46 +51,40 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data(show_spinner="Carregando dados...")
-def load_data(file_path: str) -> pd.DataFrame:
+@st.cache_data(show_spinner=False, max_entries=2)
+def load_data(file_path: str, version: str = None) -> pd.DataFrame:
     """
-    Carrega e processa os dados com tratamento de erros
+    Carrega e processa os dados
+
+    `version` (versão publicada pelo refresher) só compõe a chave do cache.
     """
-    try:
-        df = pd.read_csv(file_path)
-        
-        # Verificar colunas necessárias
-        required_columns = ['Complain', 'Dt_Customer', 'MntWines', 'MntFruits',
-                           'MntMeatProducts', 'MntFishProducts', 'MntSweetProducts', 'MntGoldProds']
-        
-        if not all(col in df.columns for col in required_columns):
-            raise ValueError("Colunas necessárias não encontradas no dataset")
-            
-        # Calcular MntRegularProds se necessário
-        if 'MntRegularProds' not in df.columns:
-            df['MntRegularProds'] = df[['MntWines', 'MntFruits', 'MntMeatProducts',
-                                      'MntFishProducts', 'MntSweetProducts', 'MntGoldProds']].sum(axis=1)
-        
-        # Processamento adicional
-        df['Ano_Inscricao'] = pd.to_datetime(df['Dt_Customer']).dt.year
-        df = df.dropna(subset=['Complain', 'Dt_Customer', 'MntRegularProds'])
-        
-        return df[['Complain', 'Ano_Inscricao', 'MntRegularProds']]
-    
-    except Exception as e:
-        st.error(f"Erro no carregamento de dados: {str(e)}")
-        return pd.DataFrame()
+    # Ler apenas as colunas necessárias do snapshot tipado
+    return complaint_frame(load_columns(file_path, complaint_columns(snapshot_columns(file_path))))
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def load_cube(file_path: str, version: str = None) -> dict:
+    """
+    Pré-agrega os dados por ano de inscrição e reclamação
+    """
+    # Os processos de trabalho leem faixas de linhas do próprio snapshot mapeado em memória
+    dataset = SharedDataset(file_path)
+    return map_reduce(dataset, build_raw_complaint_cube, merge_complaint_cubes, BACKEND,
+                      columns=complaint_columns(dataset.columns))
 
-def create_complaint_plot(df: pd.DataFrame) -> go.Figure:
+def create_complaint_plot(counts: pd.DataFrame) -> go.Figure:
     """
-    Cria gráfico de distribuição de reclamações
+    Cria gráfico de distribuição de reclamações a partir das contagens agregadas
     """
-    fig = px.histogram(
-        df,
+    # plotly.express é carregado só na primeira figura (não atrasa a abertura da página)
+    import plotly.express as px
+
+    counts = counts.assign(Complain=counts['Complain'].astype(str))
+    fig = px.bar(
+        counts,
         x='Ano_Inscricao',
+        y='count',
         color='Complain',
-        nbins=len(df['Ano_Inscricao'].unique()),
-        color_discrete_map={0: '#333333', 1: '#666666'},
+        color_discrete_map={'0': '#333333', '1': '#666666'},
         labels={'Ano_Inscricao': 'Ano de Inscrição', 'count': 'Número de Clientes'},
         title='Distribuição de Reclamações por Ano de Inscrição'
     )
@@ -100,18 +102,18 @@ def create_complaint_plot(df: pd.DataFrame) -> go.Figure:
     
     return fig
 
-def calculate_metrics(df: pd.DataFrame) -> dict:
+def calculate_metrics(df: pd.DataFrame, backend: str = 'serial') -> dict:
     """
     Calcula métricas principais e teste estatístico
     """
-    grupo_reclamaram = df[df['Complain'] == 1]['MntRegularProds']
-    grupo_nao_reclamaram = df[df['Complain'] == 0]['MntRegularProds']
-    
-    t_stat, p_value = ttest_ind(grupo_reclamaram, grupo_nao_reclamaram, equal_var=False)
+    # Uma única passada agrupada no lugar de duas máscaras e do ttest_ind
+    moments = grouped_moments(df, 'Complain', 'MntRegularProds', backend)
+    t_stat, p_value = group_welch_ttest(moments, 1, 0)
+    medias = moments['mean']
     
     return {
-        'media_reclamaram': grupo_reclamaram.mean(),
-        'media_nao_reclamaram': grupo_nao_reclamaram.mean(),
+        'media_reclamaram': medias.get(1, float('nan')),
+        'media_nao_reclamaram': medias.get(0, float('nan')),
         't_stat': t_stat,
         'p_value': p_value,
         'total_clientes': len(df),
@@ -154,10 +156,23 @@ def main():
     """Função principal do dashboard"""
     st.markdown('<h1 class="header-text">📊 Análise de Reclamações vs Fidelidade</h1>', unsafe_allow_html=True)
     
-    # Carregar dados
-    df = load_data('../data/processed/marketing_campaign_atualizado.csv')
+    # Versão publicada dos dados; novas versões têm o cubo preparado em segundo plano
+    refresher = get_refresher(DEFAULT_DATA_PATH)
+    refresher.register('dashboard_campaign', lambda versao: load_cube(DEFAULT_DATA_PATH, versao))
+    versao_dados = refresher.current()
     
-    if not df.empty:
+    # Carregar o cubo (o spinner fica aqui: os carregadores também rodam no refresher);
+    # o DataFrame só é lido dentro do load_cube, quando o cubo ainda não está em cache
+    try:
+        with span('cubo'), st.spinner("Preparando agregados..."):
+            cube = load_cube(DEFAULT_DATA_PATH, versao_dados.fingerprint)
+    except Exception as e:
+        st.error(f"Erro no carregamento de dados: {str(e)}")
+        st.stop()
+    
+    anos = cube['anos']
+    if len(anos):
+
         # Filtros interativos
         with st.container():
             col1, col2 = st.columns(2)
@@ -165,9 +180,9 @@ def main():
             with col1:
                 year_range = st.slider(
                     '🔢 Selecione o intervalo de anos:',
-                    min_value=int(df['Ano_Inscricao'].min()),
-                    max_value=int(df['Ano_Inscricao'].max()),
-                    value=(int(df['Ano_Inscricao'].min()), int(df['Ano_Inscricao'].max()))
+                    min_value=int(anos[0]),
+                    max_value=int(anos[-1]),
+                    value=(int(anos[0]), int(anos[-1]))
                 )
             
             with col2:
@@ -176,23 +191,38 @@ def main():
                     options=['Todos', 'Reclamaram', 'Não Reclamaram']
                 )
         
-        # Aplicar filtros
-        filtered_df = df[df['Ano_Inscricao'].between(*year_range)]
+        # Aplicar filtros sobre o cubo pré-agregado
+        flags = COMPLAIN_FLAGS
         if complaint_filter == 'Reclamaram':
-            filtered_df = filtered_df[filtered_df['Complain'] == 1]
+            flags = (1,)
         elif complaint_filter == 'Não Reclamaram':
-            filtered_df = filtered_df[filtered_df['Complain'] == 0]
+            flags = (0,)
+
+        # Resultados compartilhados entre sessões, por estado dos filtros e versão dos dados
+        cache = get_cache()
+        filtros = {'anos': list(year_range), 'reclamacao': complaint_filter}
+        versao = versao_dados.fingerprint
 
         # Layout principal
         col1, col2 = st.columns([2, 1])
         
         with col1:
             # Gráfico principal
-            st.plotly_chart(create_complaint_plot(filtered_df), use_container_width=True)
+            with span('figura'):
+                fig = cache.figure(
+                    filter_signature('campaign.figura', filtros, versao),
+                    lambda: create_complaint_plot(query_year_counts(cube, year_range, flags))
+                )
+            with span('serializacao'):
+                st.plotly_chart(fig, use_container_width=True)
             
         with col2:
             # Métricas rápidas
-            metrics = calculate_metrics(filtered_df)
+            with span('analise'):
+                metrics = cache.get_or_compute(
+                    filter_signature('campaign.metricas', filtros, versao),
+                    lambda: cube_metrics(cube, year_range, flags)
+                )
             
             st.markdown("### 📈 Métricas Chave")
             st.markdown(f"""
@@ -221,5 +251,11 @@ def main():
             st.markdown("---")
             st.markdown(generate_insights(metrics), unsafe_allow_html=True)
 
+        st.sidebar.caption(describe(versao_dados))
+        stats = cache.stats()
+        st.sidebar.caption(f"Cache de resultados: {stats['hits']} acertos, {stats['misses']} falhas "
+                           f"({stats['hit_rate']:.0%}), {stats['entries']} itens")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with trace_run('dashboard_campaign'):
+        main()
\ No newline at end of file
@@ -0,0 +1,151 @@
+import streamlit as st
+import pandas as pd
+
+from cohort import MIN_COHORT_SIZE, cohort_metrics, refresh_cohorts
+from data_store import DEFAULT_DATA_PATH
+from instrumentation import span, trace_run
+from refresher import describe, get_refresher
+
+# Configuração inicial da página
+st.set_page_config(
+    page_title="Análise de Cohortes por Educação",
+    page_icon="🎓",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# Estilos CSS personalizados
+st.markdown("""
+    <style>
+    .main { background-color: #FFFFFF; }
+    .header-text {
+        color: #000000;
+        font-family: 'Arial';
+        border-bottom: 2px solid #000000;
+        padding-bottom: 10px;
+        margin-bottom: 1.5rem;
+    }
+    .metric-card {
+        background-color: #F8F9FA;
+        border: 1px solid #E0E0E0;
+        border-radius: 8px;
+        padding: 20px;
+        margin: 10px 0;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.05);
+    }
+    </style>
+""", unsafe_allow_html=True)
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def load_cohorts(file_path: str, version: str) -> pd.DataFrame:
+    """
+    Acumuladores por cohorte (ano de cadastro × educação).
+
+    A versão publicada pelo refresher faz parte da chave: quando clientes são
+    acrescentados, apenas as linhas novas são lidas e somadas aos acumuladores
+    gravados, em segundo plano, antes da troca de versão.
+    """
+    acumulado, _ = refresh_cohorts(file_path)
+    return acumulado
+
+def create_response_plot(cohorts: pd.DataFrame):
+    """
+    Taxa de resposta por ano de cadastro, uma linha por nível educacional
+    """
+    import plotly.express as px
+
+    fig = px.line(cohorts, x='enrollment_cohort', y='response_rate', color='education_level',
+                  markers=True,
+                  labels={'enrollment_cohort': 'Ano de Cadastro', 'response_rate': 'Taxa de Resposta',
+                          'education_level': 'Educação'},
+                  title='Taxa de Resposta por Cohorte',
+                  color_discrete_sequence=px.colors.qualitative.Set2)
+    fig.update_layout(template='plotly_white', height=450, xaxis=dict(dtick=1), yaxis_tickformat='.0%')
+    return fig
+
+def create_growth_plot(cohorts: pd.DataFrame):
+    """
+    Crescimento do gasto médio em vinhos em relação à cohorte anterior
+    """
+    import plotly.express as px
+
+    dados = cohorts.dropna(subset=['spending_growth'])
+    fig = px.bar(dados, x='enrollment_cohort', y='spending_growth', color='education_level',
+                 barmode='group',
+                 labels={'enrollment_cohort': 'Ano de Cadastro', 'spending_growth': 'Crescimento do Gasto em Vinhos',
+                         'education_level': 'Educação'},
+                 title='Crescimento do Gasto Médio em Vinhos (vs. cohorte anterior)',
+                 color_discrete_sequence=px.colors.qualitative.Set2)
+    fig.update_layout(template='plotly_white', height=450, xaxis=dict(dtick=1), yaxis_tickformat='.0%')
+    return fig
+
+def main():
+    """Função principal do dashboard"""
+    st.markdown('<h1 class="header-text">🎓 Análise de Cohortes por Educação</h1>', unsafe_allow_html=True)
+
+    refresher = get_refresher(DEFAULT_DATA_PATH)
+    refresher.register('dashboard_cohorte', lambda versao: load_cohorts(DEFAULT_DATA_PATH, versao))
+    versao_dados = refresher.current()
+
+    try:
+        with span('carregamento'), st.spinner("Atualizando cohortes..."):
+            acumulado = load_cohorts(DEFAULT_DATA_PATH, versao_dados.fingerprint)
+    except Exception as e:
+        st.error(f"Erro ao carregar as cohortes: {str(e)}")
+        st.stop()
+
+    if acumulado.empty:
+        st.stop()
+
+    anos = acumulado.index.get_level_values('enrollment_cohort')
+    niveis = sorted(acumulado.index.get_level_values('education_level').unique())
+
+    # Filtros interativos
+    with st.sidebar:
+        year_range = st.slider('🔢 Anos de cadastro:', min_value=int(anos.min()), max_value=int(anos.max()),
+                               value=(int(anos.min()), int(anos.max())))
+        tamanho_minimo = st.number_input('👥 Tamanho mínimo da cohorte:', min_value=0,
+                                         value=MIN_COHORT_SIZE, step=10)
+        selecionados = st.multiselect('🎓 Níveis de educação:', options=niveis, default=niveis)
+        st.caption(describe(versao_dados))
+
+    with span('analise'):
+        cohorts = cohort_metrics(acumulado, int(tamanho_minimo), year_range)
+        cohorts = cohorts[cohorts['education_level'].isin(selecionados)]
+
+    if cohorts.empty:
+        st.warning("Nenhuma cohorte atende aos filtros selecionados.")
+        st.stop()
+
+    col1, col2 = st.columns(2)
+    with span('figura'):
+        fig_resposta = create_response_plot(cohorts)
+        fig_crescimento = create_growth_plot(cohorts)
+    with span('serializacao'):
+        with col1:
+            st.plotly_chart(fig_resposta, use_container_width=True)
+        with col2:
+            st.plotly_chart(fig_crescimento, use_container_width=True)
+
+    # Cohorte com maior taxa de resposta
+    melhor = cohorts.loc[cohorts['response_rate'].idxmax()]
+    st.markdown(f"""
+        <div class="metric-card">
+            <h3>🏆 Maior Taxa de Resposta</h3>
+            <h2>{melhor['education_level']} ({int(melhor['enrollment_cohort'])}): {melhor['response_rate']:.1%}</h2>
+        </div>
+    """, unsafe_allow_html=True)
+
+    st.markdown("### 📋 Cohortes")
+    st.dataframe(cohorts.rename(columns={
+        'enrollment_cohort': 'Ano de Cadastro',
+        'education_level': 'Educação',
+        'cohort_size': 'Clientes',
+        'response_rate': 'Taxa de Resposta',
+        'avg_wines': 'Gasto Médio em Vinhos',
+        'spending_growth': 'Crescimento do Gasto',
+    }).round(4), hide_index=True, use_container_width=True)
+
+if __name__ == "__main__":
+    with trace_run('dashboard_cohorte'):
+        main()
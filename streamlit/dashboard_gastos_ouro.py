@@ -1,10 +1,26 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 
+from age_rollup import (SPENDING_COLUMNS, age_band_means, age_bands, age_limits, age_range_totals,
+                        build_age_rollup)
+from data_store import DEFAULT_DATA_PATH, load_columns
+from execution import grouped_mean
+from instrumentation import span, trace_run
+from refresher import describe, get_refresher
+from result_cache import filter_signature, get_cache
+
+# Nome exibido de cada categoria de gasto
+CATEGORY_LABELS = {
+    'MntWines': 'Vinhos',
+    'MntFruits': 'Frutas',
+    'MntMeatProducts': 'Produtos de Carne',
+    'MntFishProducts': 'Peixes',
+    'MntSweetProducts': 'Doces',
+    'MntGoldProds': 'Produtos de Ouro',
+}
+
 # Configuração inicial da página
 st.set_page_config(
     page_title="Análise de Gastos em Ouro - iFood",
@@ -42,49 +58,41 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data(show_spinner="Carregando dados...")
-def load_data(file_path: str) -> pd.DataFrame:
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_rollup(file_path: str, version: str = None) -> dict:
     """
-    Carrega e otimiza os dados do arquivo CSV
+    Contagem e soma de cada categoria de gasto por ano de nascimento
+
+    Calculado uma vez por versão dos dados: o filtro de idade, as faixas e a
+    categoria escolhida são respondidos a partir dele, sem percorrer os clientes.
     """
-    try:
-        df = pd.read_csv(
-            file_path,
-            usecols=['Year_Birth', 'MntGoldProds'],
-            dtype={'Year_Birth': 'int16', 'MntGoldProds': 'int32'}
-        )
-        return df.dropna()
-    except Exception as e:
-        st.error(f"Erro ao carregar dados: {str(e)}")
-        return pd.DataFrame()
+    return build_age_rollup(load_columns(file_path, ['Year_Birth'] + SPENDING_COLUMNS))
 
 def calculate_age_and_groups(df: pd.DataFrame) -> pd.DataFrame:
     """
     Calcula idade e cria faixas etárias
+
+    Devolve uma cópia: o DataFrame recebido (que pode vir do cache) não é alterado.
     """
     current_year = datetime.now().year
-    df['Age'] = current_year - df['Year_Birth']
-    
-    bins = [20, 30, 40, 50, 60, 70, 80, 90, 100]
-    labels = ['20-30', '30-40', '40-50', '50-60', '60-70', '70-80', '80-90', '90-100']
-    df['Faixa_Etaria'] = pd.cut(df['Age'], bins=bins, labels=labels, right=False)
-    
-    return df
+    idades = current_year - df['Year_Birth']
+    return df.assign(Age=idades, Faixa_Etaria=age_bands(idades))
 
-def create_gold_spending_plot(df: pd.DataFrame) -> go.Figure:
+def create_spending_plot(media_gastos: pd.Series, category: str = 'MntGoldProds') -> go.Figure:
     """
-    Cria gráfico de barras interativo
+    Cria gráfico de barras interativo a partir da média por faixa etária
     """
-    media_gastos = df.groupby('Faixa_Etaria', observed=False)['MntGoldProds'].mean().reset_index()
-    
+    # plotly.express é carregado só na primeira figura (não atrasa a abertura da página)
+    import plotly.express as px
+
     fig = px.bar(
-        media_gastos,
+        media_gastos.reset_index(),
         x='Faixa_Etaria',
-        y='MntGoldProds',
+        y=category,
         color='Faixa_Etaria',
         color_discrete_sequence=px.colors.sequential.Darkmint,
-        labels={'MntGoldProds': 'Média de Gastos (USD)', 'Faixa_Etaria': 'Faixa Etária'},
-        title='Gastos Médios em Produtos de Ouro por Faixa Etária'
+        labels={category: 'Média de Gastos (USD)', 'Faixa_Etaria': 'Faixa Etária'},
+        title=f'Gastos Médios em {CATEGORY_LABELS.get(category, category)} por Faixa Etária'
     )
     
     fig.update_layout(
@@ -97,13 +105,24 @@ def create_gold_spending_plot(df: pd.DataFrame) -> go.Figure:
     
     return fig
 
+def create_gold_spending_plot(df: pd.DataFrame, backend: str = 'serial') -> go.Figure:
+    """
+    Cria gráfico de barras interativo a partir dos clientes (com 'Faixa_Etaria')
+    """
+    return create_spending_plot(grouped_mean(df, 'Faixa_Etaria', 'MntGoldProds', backend))
+
 import textwrap
 
-def generate_insight_blocks(df: pd.DataFrame):
+def generate_insight_blocks(df: pd.DataFrame, backend: str = 'serial'):
     """
     Gera três blocos de texto estilizados com insights, média por faixa etária e recomendações.
     """
-    media_gastos = df.groupby('Faixa_Etaria', observed=False)['MntGoldProds'].mean()
+    return insight_blocks(grouped_mean(df, 'Faixa_Etaria', 'MntGoldProds', backend))
+
+def insight_blocks(media_gastos: pd.Series):
+    """
+    Blocos de insights a partir da média de gastos por faixa etária.
+    """
     max_faixa = media_gastos.idxmax()
     max_value = media_gastos.max()
     variacao = max_value - media_gastos.min()
@@ -146,38 +165,65 @@ def main():
     """Função principal do dashboard"""
     st.markdown('<h1 class="header-text">💰 Análise de Gastos em Produtos de Ouro</h1>', unsafe_allow_html=True)
     
-    # Carregar dados
-    df = load_data('../data/processed/marketing_campaign_atualizado.csv')
+    # Versão publicada dos dados; novas versões têm o resumo por ano de nascimento preparado em segundo plano
+    refresher = get_refresher(DEFAULT_DATA_PATH)
+    refresher.register('dashboard_gastos_ouro', lambda versao: load_rollup(DEFAULT_DATA_PATH, versao))
+    versao_dados = refresher.current()
+    
+    # Carregar dados: uma linha por ano de nascimento, com contagem e soma de cada categoria
+    try:
+        with span('carregamento'), st.spinner("Resumindo gastos por ano de nascimento..."):
+            rollup = load_rollup(DEFAULT_DATA_PATH, versao_dados.fingerprint)
+    except Exception as e:
+        st.error(f"Erro ao carregar dados: {str(e)}")
+        st.stop()
     
-    if not df.empty:
-        # Processamento dos dados
-        df = calculate_age_and_groups(df)
+    if len(rollup['anos']):
+        current_year = datetime.now().year
+        idade_minima, idade_maxima = age_limits(rollup, current_year)
         
-        # Filtro interativo
+        # Filtros interativos
         with st.container():
             age_filter = st.slider(
                 '🔢 Filtrar por Idade:',
-                min_value=int(df['Age'].min()),
-                max_value=int(df['Age'].max()),
+                min_value=idade_minima,
+                max_value=idade_maxima,
                 value=(20, 100)
             )
+            categoria = st.selectbox(
+                '🛒 Categoria de produto:',
+                options=SPENDING_COLUMNS,
+                index=SPENDING_COLUMNS.index('MntGoldProds'),
+                format_func=lambda coluna: CATEGORY_LABELS[coluna]
+            )
         
-        # Aplicar filtro
-        filtered_df = df[df['Age'].between(*age_filter)]
+        # Aplicar filtro: idade convertida em intervalo de ano de nascimento no resumo
+        with span('filtro') as etapa:
+            clientes, total_gasto, avg_gasto = age_range_totals(rollup, categoria, age_filter, current_year)
+            media_filtrada = age_band_means(rollup, categoria, age_filter, current_year)
+            etapa.set('linhas', clientes)
+
+        # Figuras compartilhadas entre sessões, por estado dos filtros e versão dos dados
+        cache = get_cache()
+        filtros = {'idade': list(age_filter), 'ano': current_year, 'categoria': categoria}
+        versao = versao_dados.fingerprint
         
         # Layout principal
         col1, col2 = st.columns([2, 1])
         
         with col1:
             # Gráfico principal
-            st.plotly_chart(create_gold_spending_plot(filtered_df), use_container_width=True)
+            with span('figura'):
+                fig = cache.figure(
+                    filter_signature('gastos_ouro.figura', filtros, versao),
+                    lambda: create_spending_plot(media_filtrada, categoria)
+                )
+            with span('serializacao'):
+                st.plotly_chart(fig, use_container_width=True)
             
         with col2:
             # Métricas rápidas
             st.markdown("### 📊 Métricas Chave")
-            total_gasto = filtered_df['MntGoldProds'].sum()
-            avg_gasto = filtered_df['MntGoldProds'].mean()
-            
             st.markdown(f'<div class="metric-card">Total Gasto: USD {total_gasto:,.2f}</div>', unsafe_allow_html=True)
             st.markdown(f'<div class="metric-card">Média Geral: USD {avg_gasto:,.2f}</div>', unsafe_allow_html=True)
         
@@ -185,11 +231,19 @@ def main():
         st.markdown("---")
         with st.container():
             st.markdown("### 📄 Análise Detalhada")
-            bloco_1, bloco_2, bloco_3 = generate_insight_blocks(df)
+            # Os blocos usam a base completa (todas as idades) da categoria escolhida
+            with span('analise'):
+                bloco_1, bloco_2, bloco_3 = insight_blocks(age_band_means(rollup, categoria, current_year=current_year))
 
             st.markdown(bloco_1, unsafe_allow_html=True)
             st.markdown(bloco_2, unsafe_allow_html=True)
             st.markdown(bloco_3, unsafe_allow_html=True)
+
+        st.caption(describe(versao_dados))
+        stats = cache.stats()
+        st.caption(f"Cache de resultados: {stats['hits']} acertos, {stats['misses']} falhas "
+                   f"({stats['hit_rate']:.0%}), {stats['entries']} itens")
            
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with trace_run('dashboard_gastos_ouro'):
+        main()
\ No newline at end of file
@@ -3,8 +3,22 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-from scipy.stats import ttest_ind
+
+from bitmap_index import BitmapIndex
+from data_store import DEFAULT_DATA_PATH, SharedDataset
+from execution import get_backend, grouped_moments
+from group_stats import group_welch_ttest, pairwise_welch
+from instrumentation import span, trace_run
+from partitioned_store import ensure_partitioned, get_storage, load_partitioned
+from plot_aggregation import box_figure, box_statistics, density_figure, stratified_sample
+from quantile_sketch import ensure_sketches, percentile_table, sketch_box_statistics
+from refresher import describe, get_refresher
+from result_cache import filter_signature, get_cache
+
+# Backend das agregações (MARKETING_BACKEND_DASHBOARD_STATUS)
+BACKEND = get_backend('dashboard_status')
+# Origem das linhas filtradas (MARKETING_STORAGE_DASHBOARD_STATUS): 'snapshot' ou 'particionado'
+STORAGE = get_storage('dashboard_status')
 
 # ============================
 # 1. CONFIGURAÇÃO DA PÁGINA E ESTILO
@@ -41,28 +55,101 @@ st.markdown("""
 # ============================
 # 2. CARREGAMENTO DOS DADOS COM CACHE
 # ============================
-@st.cache_data(show_spinner=True)
-def load_data(path: str) -> pd.DataFrame:
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_data(path: str, version: str = None) -> SharedDataset:
     """
-    Carrega os dados do CSV com cache para melhor performance.
+    Abre o snapshot mapeado em memória, compartilhado por todas as sessões.
+
+    Usa `st.cache_resource` em vez de `st.cache_data`: o mesmo objeto é
+    devolvido a cada rerun e sessão, sem serializar ou copiar o DataFrame.
 
     Parâmetros:
       - path (str): Caminho do arquivo CSV.
+      - version (str, opcional): Versão publicada pelo refresher (só compõe a chave do cache).
 
     Retorna:
-      - pd.DataFrame: DataFrame com os dados carregados.
+      - SharedDataset: Dataset somente leitura.
     """
-    try:
-        df = pd.read_csv(path)
-        return df
-    except Exception as e:
-        st.error(f"Erro ao carregar os dados: {e}")
-        return pd.DataFrame()
+    return SharedDataset(path)
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_index(path: str, version: str = None) -> BitmapIndex:
+    """
+    Constrói o índice de bitmaps dos filtros sobre o dataset compartilhado.
+
+    Parâmetros:
+      - path (str): Caminho do arquivo CSV.
+
+    Retorna:
+      - BitmapIndex: Índice compartilhado por todas as sessões.
+    """
+    return BitmapIndex(load_data(path, version))
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_sketches(path: str, version: str = None) -> dict:
+    """
+    Esboços de quantis (KLL) por estado civil, gravados ao lado do snapshot.
+
+    Parâmetros:
+      - path (str): Caminho do arquivo CSV.
+
+    Retorna:
+      - dict: Coluna -> {estado civil -> KLLSketch}.
+    """
+    return ensure_sketches(path)
 
 # ============================
 # 3. FUNÇÃO DE ANÁLISE: GASTOS EM CARNE POR ESTADO CIVIL
 # ============================
-def analisar_gastos_carne_por_estado_civil(dados: pd.DataFrame):
+def estatisticas_gastos_carne(dados: pd.DataFrame, backend: str = 'serial', esbocos: dict = None,
+                              modo: str = 'agregado'):
+    """
+    Testes de Welch e médias dos gastos em carne por estado civil, sem montar gráficos.
+
+    Parâmetros:
+      - dados (pd.DataFrame): Dados com 'Marital_Status', 'MntMeatProducts' e 'Income'.
+      - backend (str): Backend das agregações ('serial' ou 'processos').
+      - esbocos (dict, opcional): Esboços de quantis por estado civil, para a tabela de percentis.
+      - modo (str): Modo de renderização; no modo 'bruto' os percentis não vêm dos esboços.
+
+    Retorna:
+      - df_limpo (pd.DataFrame): Linhas sem nulos nas colunas analisadas.
+      - insights (dict): Médias de solteiros e casados, teste Single × Married,
+        comparações entre todos os pares e percentis.
+    """
+    colunas_necessarias = ['Marital_Status', 'MntMeatProducts', 'Income']
+    for coluna in colunas_necessarias:
+        if coluna not in dados.columns:
+            raise ValueError(f"A coluna '{coluna}' não está presente no DataFrame.")
+
+    # Remover linhas com valores nulos
+    df_limpo = dados.dropna(subset=colunas_necessarias).copy()
+
+    with span('teste_welch'):
+        # Resumo (n, média, M2) de cada estado civil em uma única passada agrupada
+        moments = grouped_moments(df_limpo, 'Marital_Status', 'MntMeatProducts', backend)
+        
+        # Teste t (variâncias não iguais) entre solteiros e casados
+        t_stat, p_value = group_welch_ttest(moments, 'Single', 'Married')
+    
+    # Preparar insights: médias de solteiros e casados e comparações entre todos os estados civis
+    percentis = None
+    if esbocos is not None and modo != 'bruto':
+        grupos = [str(grupo) for grupo in pd.unique(df_limpo['Marital_Status'])]
+        percentis = percentile_table(esbocos['MntMeatProducts'], groups=grupos)
+    insights = {
+        'media_solteiros': moments['mean'].get('Single', np.nan),
+        'media_casados': moments['mean'].get('Married', np.nan),
+        't_stat': t_stat,
+        'p_value': p_value,
+        'comparacoes': pairwise_welch(moments),
+        'percentis': percentis,
+    }
+    return df_limpo, insights
+
+
+def analisar_gastos_carne_por_estado_civil(dados: pd.DataFrame, modo: str = 'agregado', max_pontos: int = 5000,
+                                           backend: str = 'serial', esbocos: dict = None):
     """
     Analisa a relação entre o estado civil e os gastos em produtos de carne, controlando pela renda.
     
@@ -74,75 +161,153 @@ def analisar_gastos_carne_por_estado_civil(dados: pd.DataFrame):
           • Distribuição da renda por estado civil;
           • Relação entre renda e gastos em carne.
       - Compara os grupos "Single" e "Married" usando um teste t (t-test)
+      - Compara todos os pares de estados civis com o mesmo teste
       - Retorna um dicionário com os principais insights (médias, estatísticas do teste)
+
+    Os testes ficam em `estatisticas_gastos_carne`, que pode ser chamada sem os gráficos.
     
     Parâmetros:
       - dados (pd.DataFrame): Dados dos clientes.
+      - modo (str): Renderização dos gráficos:
+          • 'agregado': box plots com estatísticas calculadas no servidor e
+            dispersão com amostra estratificada de até `max_pontos` pontos;
+          • 'densidade': box plots agregados e densidade 2D no lugar da dispersão;
+          • 'bruto': todas as linhas enviadas ao Plotly (comportamento original).
+      - max_pontos (int): Limite de pontos do gráfico de dispersão no modo 'agregado'.
+      - backend (str): Backend das agregações ('serial' ou 'processos').
+      - esbocos (dict, opcional): Esboços de quantis por estado civil (ver load_sketches).
+        Válidos apenas quando `dados` contém todas as linhas dos estados civis
+        presentes; nos modos 'agregado' e 'densidade', os box plots e os
+        percentis vêm dos esboços, sem ordenar as linhas.
       
     Retorna:
       - insights (dict): Dicionário com resultados do teste e médias.
       - df_limpo (pd.DataFrame): DataFrame processado para os gráficos.
     """
-    # Colunas necessárias
-    colunas_necessarias = ['Marital_Status', 'MntMeatProducts', 'Income']
-    for coluna in colunas_necessarias:
-        if coluna not in dados.columns:
-            raise ValueError(f"A coluna '{coluna}' não está presente no DataFrame.")
+    if modo not in ('agregado', 'densidade', 'bruto'):
+        raise ValueError(f"Modo de renderização inválido: '{modo}'.")
 
-    # Remover linhas com valores nulos
-    df_limpo = dados.dropna(subset=colunas_necessarias).copy()
+    # plotly.express é carregado só na primeira análise (não atrasa a abertura da página)
+    import plotly.express as px
+
+    # Colunas verificadas, nulos removidos e testes de Welch
+    df_limpo, insights = estatisticas_gastos_carne(dados, backend, esbocos, modo)
     
-    # --- Gráfico 1: Boxplot de Gastos em Carne por Estado Civil ---
-    # Criamos um gráfico interativo com Plotly Express para visualizar a distribuição dos gastos.
-    fig_gastos = px.box(df_limpo, x='Marital_Status', y='MntMeatProducts', 
-                        color='Marital_Status',
-                        title='Distribuição dos Gastos em Produtos de Carne por Estado Civil',
-                        labels={'Marital_Status': 'Estado Civil', 'MntMeatProducts': 'Gastos em Produtos de Carne'},
-                        color_discrete_sequence=px.colors.sequential.Blugrn)
-    fig_gastos.update_layout(template="simple_white", height=500)
+    titulo_gastos = 'Distribuição dos Gastos em Produtos de Carne por Estado Civil'
+    titulo_renda = 'Distribuição da Renda por Estado Civil'
+    titulo_scatter = 'Relação entre Renda e Gastos em Produtos de Carne por Estado Civil'
     
-    # --- Gráfico 2: Boxplot de Renda por Estado Civil ---
-    fig_renda = px.box(df_limpo, x='Marital_Status', y='Income', 
-                       color='Marital_Status',
-                       title='Distribuição da Renda por Estado Civil',
-                       labels={'Marital_Status': 'Estado Civil', 'Income': 'Renda'},
-                       color_discrete_sequence=px.colors.sequential.Blues)
+    if modo == 'bruto':
+        # --- Gráfico 1: Boxplot de Gastos em Carne por Estado Civil ---
+        # Criamos um gráfico interativo com Plotly Express para visualizar a distribuição dos gastos.
+        fig_gastos = px.box(df_limpo, x='Marital_Status', y='MntMeatProducts', 
+                            color='Marital_Status',
+                            title=titulo_gastos,
+                            labels={'Marital_Status': 'Estado Civil', 'MntMeatProducts': 'Gastos em Produtos de Carne'},
+                            color_discrete_sequence=px.colors.sequential.Blugrn)
+        
+        # --- Gráfico 2: Boxplot de Renda por Estado Civil ---
+        fig_renda = px.box(df_limpo, x='Marital_Status', y='Income', 
+                           color='Marital_Status',
+                           title=titulo_renda,
+                           labels={'Marital_Status': 'Estado Civil', 'Income': 'Renda'},
+                           color_discrete_sequence=px.colors.sequential.Blues)
+    elif esbocos is not None:
+        # Quartis com erro limitado a partir dos esboços de cada estado civil presente
+        grupos = [str(grupo) for grupo in pd.unique(df_limpo['Marital_Status'])]
+        fig_gastos = box_figure(sketch_box_statistics(esbocos['MntMeatProducts'], grupos),
+                                titulo_gastos, 'Estado Civil', 'Gastos em Produtos de Carne',
+                                px.colors.sequential.Blugrn)
+        fig_renda = box_figure(sketch_box_statistics(esbocos['Income'], grupos),
+                               titulo_renda, 'Estado Civil', 'Renda',
+                               px.colors.sequential.Blues)
+    else:
+        # Quartis, bigodes e outliers calculados no servidor: o navegador recebe
+        # apenas as estatísticas de cada estado civil
+        fig_gastos = box_figure(box_statistics(df_limpo['Marital_Status'], df_limpo['MntMeatProducts']),
+                                titulo_gastos, 'Estado Civil', 'Gastos em Produtos de Carne',
+                                px.colors.sequential.Blugrn)
+        fig_renda = box_figure(box_statistics(df_limpo['Marital_Status'], df_limpo['Income']),
+                               titulo_renda, 'Estado Civil', 'Renda',
+                               px.colors.sequential.Blues)
+    fig_gastos.update_layout(template="simple_white", height=500)
     fig_renda.update_layout(template="simple_white", height=500)
     
     # --- Gráfico 3: Scatter Plot de Renda vs Gastos em Carne ---
-    fig_scatter = px.scatter(df_limpo, x='Income', y='MntMeatProducts', color='Marital_Status',
-                             title='Relação entre Renda e Gastos em Produtos de Carne por Estado Civil',
-                             labels={'Income': 'Renda', 'MntMeatProducts': 'Gastos em Produtos de Carne'},
-                             color_discrete_sequence=px.colors.sequential.Reds)
+    if modo == 'densidade':
+        fig_scatter = density_figure(df_limpo['Income'], df_limpo['MntMeatProducts'], titulo_scatter,
+                                     'Renda', 'Gastos em Produtos de Carne')
+    else:
+        # No modo agregado, apenas uma amostra estratificada de até `max_pontos` linhas é enviada
+        pontos = df_limpo if modo == 'bruto' else stratified_sample(df_limpo, 'Marital_Status', max_pontos)
+        fig_scatter = px.scatter(pontos, x='Income', y='MntMeatProducts', color='Marital_Status',
+                                 title=titulo_scatter,
+                                 labels={'Income': 'Renda', 'MntMeatProducts': 'Gastos em Produtos de Carne'},
+                                 color_discrete_sequence=px.colors.sequential.Reds)
     fig_scatter.update_layout(template="simple_white", height=500)
     
-    # Separar os grupos para o teste estatístico
-    grupo_solteiros = df_limpo[df_limpo['Marital_Status'] == 'Single']['MntMeatProducts']
-    grupo_casados = df_limpo[df_limpo['Marital_Status'] == 'Married']['MntMeatProducts']
-    
-    # Teste t (variâncias não iguais)
-    t_stat, p_value = ttest_ind(grupo_solteiros, grupo_casados, equal_var=False)
-    
-    # Preparar insights: calcular médias de gastos em carne para solteiros e casados
-    insights = {
-        'media_solteiros': grupo_solteiros.mean(),
-        'media_casados': grupo_casados.mean(),
-        't_stat': t_stat,
-        'p_value': p_value
-    }
-    
     return df_limpo, fig_gastos, fig_renda, fig_scatter, insights
 
+def gerar_relatorio_executivo(insights: dict) -> str:
+    """
+    Monta o texto do relatório executivo a partir dos insights da análise.
+
+    Usada pelo dashboard e pela geração de relatórios em lote (batch_reports.py).
+
+    Parâmetros:
+      - insights (dict): Insights retornados por `analisar_gastos_carne_por_estado_civil`.
+
+    Retorna:
+      - str: Relatório em texto com marcações em Markdown.
+    """
+    relatorio = f"""
+    Médias de Gastos em Produtos de Carne:
+    - Solteiros: **{insights['media_solteiros']:.2f}**
+    - Casados: **{insights['media_casados']:.2f}**
+
+    Teste Estatístico:
+    - t-statistic: **{insights['t_stat']:.2f}**
+    - p-value: **{insights['p_value']:.4f}**
+
+    Conclusão:
+    """
+    if insights['p_value'] < 0.05:
+        relatorio += ("Existe uma diferença estatisticamente significativa entre os gastos em carne de solteiros e casados. " 
+                      "Sugere-se focar campanhas de marketing direcionadas para o grupo que apresenta maior gasto, "
+                      "explorando estratégias que evidenciem os benefícios dos produtos de carne.")
+    else:
+        relatorio += ("Não foi encontrada uma diferença estatisticamente significativa entre os grupos. "
+                      "Recomenda-se revisar as estratégias de marketing e realizar pesquisas adicionais para entender melhor as preferências dos clientes.")
+    
+    return relatorio
+
 # ============================
 # 4. EXECUÇÃO DO DASHBOARD
 # ============================
 def main():
     # Caminho dos dados
-    data_path = '../data/processed/marketing_campaign_atualizado.csv'
-    dados = load_data(data_path)
+    data_path = DEFAULT_DATA_PATH
+    
+    # Versão publicada dos dados; novas versões têm dataset, índice e esboços preparados em segundo plano
+    refresher = get_refresher(data_path)
+    refresher.register('dashboard_status', lambda versao: (
+        load_index(data_path, versao),
+        load_sketches(data_path, versao),
+        ensure_partitioned(data_path) if STORAGE == 'particionado' else None,
+    ))
+    versao_dados = refresher.current()
+    
+    try:
+        with span('carregamento'), st.spinner("Carregando dados..."):
+            dataset = load_data(data_path, versao_dados.fingerprint)
+        with span('indice'), st.spinner("Indexando filtros..."):
+            indice = load_index(data_path, versao_dados.fingerprint)
+    except Exception as e:
+        st.error(f"Erro ao carregar os dados: {e}")
+        st.stop()
     
-    # Interrompe se os dados não forem carregados
-    if dados.empty:
+    # Interrompe se os dados não tiverem linhas
+    if dataset.num_rows == 0:
         st.stop()
     
     # Cabeçalho do Dashboard
@@ -151,25 +316,79 @@ def main():
     st.markdown("---")
     
     # Widget: Dropdown para filtrar por estado civil (opcional)
-    opcoes_estados = ['Todos'] + sorted(dados['Marital_Status'].dropna().unique().tolist())
+    opcoes_estados = ['Todos'] + sorted(indice.values('Marital_Status'))
     estado_selecionado = st.selectbox("Filtrar por Estado Civil (opcional):", options=opcoes_estados, index=0)
     
-    # Se o usuário escolher um estado específico, filtra os dados
+    # Se o usuário escolher um estado específico, usa o bitmap do estado civil
+    filtro_estado = None
     if estado_selecionado != 'Todos':
-        dados = dados[dados['Marital_Status'] == estado_selecionado]
+        filtro_estado = ('eq', 'Marital_Status', estado_selecionado)
     
     # Widget: Slider para filtrar os dados pela renda
-    # Define o mínimo e máximo da coluna 'Income' para o slider
-    min_renda = float(dados['Income'].min())
-    max_renda = float(dados['Income'].max())
-    renda_range = st.slider("Filtrar clientes por faixa de renda:", min_value=int(min_renda), max_value=int(max_renda), 
-                            value=(int(min_renda), int(max_renda)), step=100)
-    # Filtra o DataFrame conforme o intervalo de renda selecionado
-    dados = dados[(dados['Income'] >= renda_range[0]) & (dados['Income'] <= renda_range[1])]
-    
-    # Aplicar a função de análise e capturar os gráficos e insights
+    # Define o mínimo e máximo da coluna 'Income' para o slider (sem copiar a coluna inteira)
+    renda = dataset.column('Income')
+    if filtro_estado is not None:
+        renda = renda[indice.select(filtro_estado)]
+    min_renda = float(np.nanmin(renda, initial=np.inf))
+    max_renda = float(np.nanmax(renda, initial=-np.inf))
+    if not np.isfinite(min_renda):
+        # Seleção vazia ou só com renda ausente: não há faixa para o slider
+        st.warning("Nenhum cliente com renda informada para o estado civil selecionado.")
+        st.stop()
+    # O slider exige mínimo < máximo, mesmo quando há um único valor de renda
+    limites_renda = (int(min_renda), max(int(max_renda), int(min_renda) + 100))
+    renda_range = st.slider("Filtrar clientes por faixa de renda:", min_value=limites_renda[0],
+                            max_value=limites_renda[1], value=limites_renda, step=100)
+    # Widget: Modo de renderização dos gráficos (agregado no servidor por padrão)
+    modos = {'Agregado (servidor)': 'agregado', 'Densidade 2D': 'densidade', 'Todos os pontos': 'bruto'}
+    with st.sidebar:
+        modo = modos[st.selectbox("Modo de renderização dos gráficos:", options=list(modos))]
+        max_pontos = st.number_input("Máximo de pontos na dispersão:", min_value=500, max_value=50000,
+                                     value=5000, step=500)
+    
+    # Com a faixa de renda completa, os box plots usam os esboços de quantis pré-calculados
+    renda_completa = tuple(renda_range) == limites_renda
+    esbocos = None
+    if renda_completa and modo != 'bruto':
+        with st.spinner("Carregando esboços de quantis..."):
+            esbocos = load_sketches(data_path, versao_dados.fingerprint)
+
+    # Aplicar a função de análise e capturar os gráficos e insights.
+    # O resultado é compartilhado entre sessões pelo estado dos filtros e versão dos dados;
+    # a leitura das linhas só acontece numa falha, e as figuras ficam guardadas como dicionários
+    # entregues diretamente ao st.plotly_chart.
+    cache = get_cache()
+    chave = filter_signature(
+        'status.analise',
+        {'estado': estado_selecionado, 'renda': list(renda_range), 'modo': modo, 'max_pontos': int(max_pontos),
+         'esbocos': esbocos is not None},
+        dataset.version
+    )
+
+    def calcular():
+        # Combina os bitmaps de estado civil e renda e materializa apenas as linhas selecionadas;
+        # no dataset particionado, lê só os row groups cuja faixa de renda cruza o filtro
+        leitura = None
+        with span('filtro') as etapa:
+            colunas = ['Marital_Status', 'MntMeatProducts', 'Income']
+            if STORAGE == 'particionado':
+                # Só a versão publicada é lida; a regravação acontece no aquecedor do refresher
+                dados, leitura = load_partitioned(
+                    data_path, colunas, version=versao_dados.fingerprint, ranges={'Income': renda_range},
+                    equals={'Marital_Status': estado_selecionado} if filtro_estado else None)
+                etapa.set('bytes_lidos', leitura['bytes_lidos'])
+            else:
+                filtro_renda = ('between', 'Income', renda_range[0], renda_range[1])
+                linhas = indice.select(('and', filtro_estado, filtro_renda) if filtro_estado else filtro_renda)
+                dados = dataset.take(colunas, rows=linhas)
+            etapa.set('linhas', len(dados))
+        _, *figuras, insights = analisar_gastos_carne_por_estado_civil(
+            dados, modo=modo, max_pontos=int(max_pontos), backend=BACKEND, esbocos=esbocos)
+        return [fig.to_dict() for fig in figuras], insights, leitura
+
     try:
-        df_limpo, fig_gastos, fig_renda, fig_scatter, insights = analisar_gastos_carne_por_estado_civil(dados)
+        with span('analise'):
+            (fig_gastos, fig_renda, fig_scatter), insights, leitura = cache.get_or_compute(chave, calcular)
     except Exception as e:
         st.error(f"Erro na análise: {e}")
         st.stop()
@@ -178,41 +397,44 @@ def main():
     st.markdown("## 📈 Visualizações Interativas")
     col1, col2 = st.columns(2)
     
-    with col1:
-        st.plotly_chart(fig_gastos, use_container_width=True)
-        st.plotly_chart(fig_renda, use_container_width=True)
-    with col2:
-        st.plotly_chart(fig_scatter, use_container_width=True)
+    with span('serializacao'):
+        with col1:
+            st.plotly_chart(fig_gastos, use_container_width=True)
+            st.plotly_chart(fig_renda, use_container_width=True)
+        with col2:
+            st.plotly_chart(fig_scatter, use_container_width=True)
     
     st.markdown("---")
     
     # Gerar o relatório executivo baseado nos insights obtidos
     st.markdown("## 📝 Relatório Executivo")
-    relatorio = f"""
-    Médias de Gastos em Produtos de Carne:
-    - Solteiros: **{insights['media_solteiros']:.2f}**
-    - Casados: **{insights['media_casados']:.2f}**
-
-    Teste Estatístico:
-    - t-statistic: **{insights['t_stat']:.2f}**
-    - p-value: **{insights['p_value']:.4f}**
-
-    Conclusão:
-    """
-    if insights['p_value'] < 0.05:
-        relatorio += ("Existe uma diferença estatisticamente significativa entre os gastos em carne de solteiros e casados. " 
-                      "Sugere-se focar campanhas de marketing direcionadas para o grupo que apresenta maior gasto, "
-                      "explorando estratégias que evidenciem os benefícios dos produtos de carne.")
-    else:
-        relatorio += ("Não foi encontrada uma diferença estatisticamente significativa entre os grupos. "
-                      "Recomenda-se revisar as estratégias de marketing e realizar pesquisas adicionais para entender melhor as preferências dos clientes.")
+    relatorio = gerar_relatorio_executivo(insights)
     
     # Exibe o relatório em uma caixa estilizada
     st.markdown(f"<div class='report-box'>{relatorio.replace(chr(10), '<br>')}</div>", unsafe_allow_html=True)
+    
+    # Comparações entre todos os pares de estados civis (teste de Welch)
+    with st.expander("Comparações entre todos os estados civis"):
+        st.dataframe(insights['comparacoes'], use_container_width=True)
+
+    # Percentis dos gastos em carne por estado civil, calculados a partir dos esboços
+    if insights['percentis'] is not None:
+        with st.expander("Percentis dos gastos em carne por estado civil"):
+            st.dataframe(insights['percentis'].round(1), use_container_width=True)
+
+    if leitura is not None:
+        st.sidebar.caption(f"Dataset particionado: {leitura['row_groups']}/{leitura['row_groups_total']} row groups, "
+                           f"{leitura['bytes_lidos'] / max(leitura['bytes_total'], 1):.0%} dos bytes lidos")
+
+    st.sidebar.caption(describe(versao_dados))
+    stats = cache.stats()
+    st.sidebar.caption(f"Cache de resultados: {stats['hits']} acertos, {stats['misses']} falhas "
+                       f"({stats['hit_rate']:.0%}), {stats['entries']} itens")
 
 # Execução do dashboard com tratamento global de exceções
 if __name__ == "__main__":
     try:
-        main()
+        with trace_run('dashboard_status'):
+            main()
     except Exception as e:
         st.error(f"Ocorreu um erro inesperado: {e}")
@@ -0,0 +1,232 @@
+"""
+Pipeline de tratamento dos dados brutos (antes feito em notebook/data_cleaning.ipynb).
+
+Lê data/raw/marketing_campaign.csv (separador ';') em blocos e, em uma única
+passada, aplica as etapas do notebook de forma vetorizada:
+  - remoção de espaços nas colunas de texto (remover_espacos);
+  - imputação de valores nulos por média, mediana ou moda (substituir_valores_nulos);
+  - verificação de IDs duplicados (verificar_valores_duplicados);
+  - conversão de Dt_Customer para data;
+  - validação das faixas e conversão para os tipos compactos do esquema
+    (modificar_tipo_colunas), com o relatório da memória economizada.
+
+Antes da passada principal, uma leitura estreita (só as colunas imputadas e
+as de data) calcula os valores de substituição e decide o formato de cada
+coluna de data, aplicado igualmente a todos os blocos.
+
+O resultado é gravado no CSV processado usado pelos dashboards; em seguida o
+snapshot Arrow tipado é montado a partir do CSV gravado. Nenhum bloco tratado
+fica em memória depois de gravado.
+
+Uso:
+    python data_cleaning.py
+    python data_cleaning.py ../data/raw/marketing_campaign.csv --saida ../data/processed/marketing_campaign_atualizado.csv
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_store import DEFAULT_DATA_PATH, build_snapshot
+from schema import DATE_COLUMNS, compact
+
+RAW_DATA_PATH = '../data/raw/marketing_campaign.csv'
+RAW_SEPARATOR = ';'
+IMPUTED_COLUMNS = ['Income']
+STRATEGIES = ('media', 'mediana', 'moda')
+
+
+def _fill_value(valores: pd.Series, strategy: str):
+    if strategy == 'media':
+        return valores.mean()
+    if strategy == 'mediana':
+        return valores.median()
+    return valores.mode().iloc[0]
+
+
+def _date_format(valores: pd.Series) -> str:
+    # Exportações em ISO (2012-09-04) ou dia/mês/ano (04-09-2012)
+    try:
+        pd.to_datetime(valores.dropna().str.strip(), format='ISO8601')
+        return 'ISO8601'
+    except ValueError:
+        return 'dayfirst'
+
+
+def scan_raw(raw_path: str, columns=IMPUTED_COLUMNS, strategy: str = 'media',
+             sep: str = RAW_SEPARATOR) -> tuple:
+    """
+    Leitura estreita do CSV bruto, antes da passada principal.
+
+    Média, mediana e moda dependem de todas as linhas, assim como o formato das
+    datas: decidido uma única vez para o arquivo inteiro, para que dois blocos
+    nunca sejam lidos em ordens de dia/mês diferentes. Apenas as colunas
+    imputadas e as de data são lidas.
+
+    Retorna:
+      - tuple: (coluna imputada -> valor de substituição, coluna de data -> formato
+        'ISO8601' ou 'dayfirst').
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Estratégia inválida. Use uma de {STRATEGIES}.")
+    header = pd.read_csv(raw_path, sep=sep, nrows=0).columns
+    datas = [coluna for coluna in DATE_COLUMNS if coluna in header]
+    valores = pd.read_csv(raw_path, sep=sep, usecols=list(columns) + datas,
+                          dtype={coluna: str for coluna in datas})
+    preenchimento = {coluna: _fill_value(valores[coluna], strategy) for coluna in columns}
+    formatos = {coluna: _date_format(valores[coluna]) for coluna in datas}
+    return preenchimento, formatos
+
+
+def impute_values(raw_path: str, columns=IMPUTED_COLUMNS, strategy: str = 'media',
+                  sep: str = RAW_SEPARATOR) -> dict:
+    """
+    Valor de substituição de cada coluna imputada (ver `scan_raw`).
+
+    Retorna:
+      - dict: Coluna -> valor de substituição.
+    """
+    return scan_raw(raw_path, columns, strategy, sep)[0]
+
+
+def _parse_dates(valores: pd.Series, formato: str) -> pd.Series:
+    if formato == 'ISO8601':
+        return pd.to_datetime(valores, format='ISO8601', errors='coerce')
+    return pd.to_datetime(valores, dayfirst=True, errors='coerce')
+
+
+def clean_chunk(chunk: pd.DataFrame, fill_values: dict, report: dict, date_formats: dict = None) -> pd.DataFrame:
+    """
+    Aplica as etapas de limpeza a um bloco de linhas brutas.
+
+    Parâmetros:
+      - chunk (pd.DataFrame): Linhas lidas do CSV bruto.
+      - fill_values (dict): Valor de substituição por coluna imputada.
+      - report (dict): Contadores acumulados entre os blocos (atualizado no lugar).
+      - date_formats (dict, opcional): Formato de cada coluna de data ('ISO8601' ou
+        'dayfirst'), decidido em `scan_raw` (padrão: ISO8601).
+
+    Retorna:
+      - pd.DataFrame: Bloco tratado, com os tipos compactos.
+
+    Levanta:
+      - ValueError: Se algum valor estiver fora da faixa do esquema.
+    """
+    report['bytes_brutos'] += int(chunk.memory_usage(deep=True, index=False).sum())
+    # Espaços nas colunas de texto, com os métodos vetorizados de .str
+    for coluna in chunk.select_dtypes(include=['object', 'string']).columns:
+        if coluna in DATE_COLUMNS:
+            chunk[coluna] = chunk[coluna].str.strip()
+            continue
+        limpo = chunk[coluna].str.strip()
+        report['espacos_removidos'][coluna] = (report['espacos_removidos'].get(coluna, 0)
+                                               + int((limpo != chunk[coluna]).sum()))
+        chunk[coluna] = limpo
+
+    for coluna, valor in fill_values.items():
+        nulos = chunk[coluna].isna()
+        report['nulos_imputados'][coluna] = report['nulos_imputados'].get(coluna, 0) + int(nulos.sum())
+        chunk[coluna] = chunk[coluna].fillna(valor)
+
+    for coluna in DATE_COLUMNS:
+        if coluna in chunk.columns:
+            chunk[coluna] = _parse_dates(chunk[coluna], (date_formats or {}).get(coluna, 'ISO8601'))
+            report['datas_invalidas'] += int(chunk[coluna].isna().sum())
+
+    compacto = compact(chunk)
+    report['bytes_compactos'] += int(compacto.memory_usage(deep=True, index=False).sum())
+    return compacto
+
+
+def run_pipeline(raw_path: str = RAW_DATA_PATH, output_path: str = DEFAULT_DATA_PATH,
+                 strategy: str = 'media', chunksize: int = 500_000, drop_duplicates: bool = False,
+                 sep: str = RAW_SEPARATOR) -> dict:
+    """
+    Gera o CSV processado (e o snapshot tipado) a partir do CSV bruto.
+
+    Parâmetros:
+      - raw_path (str): CSV bruto exportado (separador `sep`).
+      - output_path (str): CSV processado de destino.
+      - strategy (str): Imputação dos nulos: 'media', 'mediana' ou 'moda'.
+      - chunksize (int): Linhas por bloco da leitura em streaming.
+      - drop_duplicates (bool): Remover linhas com ID repetido (mantém a primeira).
+      - sep (str): Separador do CSV bruto.
+
+    Retorna:
+      - dict: Relatório com linhas gravadas, nulos imputados, espaços removidos,
+        IDs duplicados, datas inválidas, memória dos blocos antes e depois da
+        compactação e tempo total.
+    """
+    inicio = time.perf_counter()
+    preenchimento, formatos = scan_raw(raw_path, IMPUTED_COLUMNS, strategy, sep)
+    relatorio = {
+        'linhas': 0,
+        'valores_imputados': {coluna: round(float(valor), 2) for coluna, valor in preenchimento.items()},
+        'nulos_imputados': {},
+        'espacos_removidos': {},
+        'ids_duplicados': 0,
+        'datas_invalidas': 0,
+        'bytes_brutos': 0,
+        'bytes_compactos': 0,
+    }
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    temporario = f"{output_path}.{os.getpid()}.tmp"
+    # IDs já gravados: conjunto com consulta O(1), sem reordenar o histórico a cada bloco
+    vistos = set()
+    for i, bloco in enumerate(pd.read_csv(raw_path, sep=sep, chunksize=chunksize)):
+        bloco = clean_chunk(bloco, preenchimento, relatorio, formatos)
+
+        # IDs repetidos dentro do bloco ou já vistos em blocos anteriores
+        ids = bloco['ID'].to_numpy(dtype=np.int64).tolist()
+        repetidos = (pd.Series(ids).duplicated().to_numpy()
+                     | np.fromiter(map(vistos.__contains__, ids), dtype=bool, count=len(ids)))
+        relatorio['ids_duplicados'] += int(repetidos.sum())
+        if drop_duplicates and repetidos.any():
+            bloco = bloco[~repetidos]
+        vistos.update(ids)
+
+        bloco.to_csv(temporario, mode='w' if i == 0 else 'a', header=(i == 0), index=False,
+                     date_format='%Y-%m-%d')
+        relatorio['linhas'] += len(bloco)
+
+    os.replace(temporario, output_path)
+    # O snapshot precisa de um único bloco Arrow (visões NumPy sem cópia sobre o mmap),
+    # então é montado a partir do CSV gravado, e não acumulando os blocos tratados
+    build_snapshot(output_path)
+    relatorio['tempo_s'] = round(time.perf_counter() - inicio, 3)
+    return relatorio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trata o CSV bruto e grava o CSV processado.")
+    parser.add_argument('raw_path', nargs='?', default=RAW_DATA_PATH, help="CSV bruto (separador ';')")
+    parser.add_argument('--saida', default=DEFAULT_DATA_PATH, help="CSV processado de destino")
+    parser.add_argument('--estrategia', choices=STRATEGIES, default='media', help="Imputação dos valores nulos")
+    parser.add_argument('--bloco', type=int, default=500_000, help="Linhas por bloco")
+    parser.add_argument('--remover-duplicados', action='store_true', help="Remove linhas com ID repetido")
+    parser.add_argument('--separador', default=RAW_SEPARATOR, help="Separador do CSV bruto")
+    args = parser.parse_args()
+
+    relatorio = run_pipeline(args.raw_path, args.saida, args.estrategia, args.bloco,
+                             args.remover_duplicados, args.separador)
+    print(f"✅ {relatorio['linhas']} linhas gravadas em '{args.saida}' em {relatorio['tempo_s']} s")
+    for coluna, quantidade in relatorio['nulos_imputados'].items():
+        print(f"  - {coluna}: {quantidade} nulos substituídos por {relatorio['valores_imputados'][coluna]}")
+    for coluna, quantidade in relatorio['espacos_removidos'].items():
+        if quantidade:
+            print(f"  - {coluna}: espaços removidos em {quantidade} valores")
+    if relatorio['ids_duplicados']:
+        acao = 'removidos' if args.remover_duplicados else 'mantidos'
+        print(f"⚠️ {relatorio['ids_duplicados']} IDs duplicados ({acao})")
+    print(f"  - memória: {relatorio['bytes_brutos'] / 2**20:.1f} MB com os tipos padrão, "
+          f"{relatorio['bytes_compactos'] / 2**20:.1f} MB com os tipos compactos "
+          f"({relatorio['bytes_brutos'] / max(relatorio['bytes_compactos'], 1):.1f}x menor)")
+    if relatorio['datas_invalidas']:
+        print(f"⚠️ {relatorio['datas_invalidas']} datas inválidas em Dt_Customer")
+
+
+if __name__ == "__main__":
+    main()
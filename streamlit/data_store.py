@@ -0,0 +1,266 @@
+"""
+Camada de dados compartilhada pelos dashboards.
+
+Converte o CSV processado em um snapshot colunar tipado (Arrow IPC) que é
+reconstruído apenas quando o CSV muda, e devolve somente as colunas pedidas
+por cada dashboard. O snapshot também pode ser aberto como um
+SharedDataset mapeado em memória, compartilhado entre sessões e processos.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# COLUMN_DTYPES e DATE_COLUMNS vêm do esquema e continuam disponíveis por aqui
+from schema import COLUMN_DTYPES, DATE_COLUMNS, READ_DTYPES, compact
+
+# Pode ser trocado por MARKETING_DATA_PATH (ex.: dados sintéticos no benchmark e no aquecimento)
+DEFAULT_DATA_PATH = os.environ.get('MARKETING_DATA_PATH', '../data/processed/marketing_campaign_atualizado.csv')
+
+_FINGERPRINT_KEY = b'csv_fingerprint'
+
+
+def snapshot_path(csv_path: str) -> str:
+    """Caminho do snapshot Arrow gravado ao lado do CSV."""
+    return os.path.splitext(csv_path)[0] + '.arrow'
+
+
+def csv_fingerprint(csv_path: str) -> str:
+    """Identifica a versão do CSV pelo tamanho e data de modificação."""
+    info = os.stat(csv_path)
+    return f"{info.st_size}-{info.st_mtime_ns}"
+
+
+class _CompactReader:
+    """Leitor em blocos que valida e compacta cada bloco lido."""
+
+    def __init__(self, reader):
+        self._reader = reader
+
+    def __iter__(self):
+        return (compact(bloco) for bloco in self._reader)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._reader.close()
+        return False
+
+
+def read_typed_csv(csv_path: str, **kwargs) -> pd.DataFrame:
+    """
+    Lê o CSV processado já com os tipos compactos de COLUMN_DTYPES.
+
+    Os inteiros são lidos em 64 bits, validados contra as faixas do esquema e
+    só então estreitados (ver schema.compact). Colunas que não constam no
+    esquema mantêm a inferência do pandas. Argumentos extras (como `usecols`
+    e `chunksize`) são repassados ao pandas; com `chunksize`, cada bloco é
+    compactado ao ser lido.
+    """
+    header = pd.read_csv(csv_path, nrows=0).columns
+    if kwargs.get('usecols') is not None:
+        header = [col for col in header if col in kwargs['usecols']]
+    dtypes = {col: tipo for col, tipo in READ_DTYPES.items() if col in header}
+    datas = [col for col in DATE_COLUMNS if col in header]
+    leitura = pd.read_csv(csv_path, dtype=dtypes, parse_dates=datas, **kwargs)
+    if kwargs.get('chunksize') is not None or kwargs.get('iterator'):
+        return _CompactReader(leitura)
+    return compact(leitura)
+
+
+def stored_fingerprint(path: str):
+    """Impressão digital do CSV que gerou o snapshot em `path` (None se ausente ou ilegível)."""
+    try:
+        metadata = feather.read_table(path, columns=[], memory_map=True).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    valor = metadata.get(_FINGERPRINT_KEY)
+    return valor.decode() if valor else None
+
+
+def build_snapshot(csv_path: str, df: pd.DataFrame = None) -> str:
+    """
+    Converte o CSV em um snapshot Arrow IPC tipado e retorna o seu caminho.
+
+    O arquivo é escrito em um temporário e trocado de forma atômica, para que
+    leitores concorrentes nunca vejam um snapshot pela metade. Quem acabou de
+    gravar o CSV pode passar o DataFrame tipado em `df` e evitar relê-lo.
+    """
+    fingerprint = csv_fingerprint(csv_path)
+    if df is None:
+        df = read_typed_csv(csv_path)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[_FINGERPRINT_KEY] = fingerprint.encode()
+    table = table.replace_schema_metadata(metadata)
+
+    destino = snapshot_path(csv_path)
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    # Um único bloco sem compressão permite visões NumPy sem cópia sobre o mmap
+    feather.write_feather(table, temporario, compression='uncompressed',
+                          chunksize=max(table.num_rows, 1))
+    os.replace(temporario, destino)
+    return destino
+
+
+def ensure_snapshot(csv_path: str) -> str:
+    """Reconstrói o snapshot apenas se o CSV mudou desde a última conversão."""
+    destino = snapshot_path(csv_path)
+    if stored_fingerprint(destino) != csv_fingerprint(csv_path):
+        build_snapshot(csv_path)
+    return destino
+
+
+def snapshot_columns(csv_path: str) -> list:
+    """Lista as colunas disponíveis no snapshot."""
+    return feather.read_table(ensure_snapshot(csv_path), columns=[], memory_map=True).schema.names
+
+
+def load_columns(csv_path: str, columns: list = None) -> pd.DataFrame:
+    """
+    Carrega apenas as colunas pedidas a partir do snapshot tipado.
+
+    Parâmetros:
+      - csv_path (str): Caminho do CSV processado.
+      - columns (list, opcional): Colunas desejadas. Se None, carrega todas.
+
+    Retorna:
+      - pd.DataFrame: DataFrame com os tipos compactos do snapshot.
+    """
+    path = ensure_snapshot(csv_path)
+    if columns is not None:
+        disponiveis = set(snapshot_columns(csv_path))
+        ausentes = [col for col in columns if col not in disponiveis]
+        if ausentes:
+            raise ValueError(f"Colunas não encontradas no dataset: {ausentes}")
+    table = feather.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas()
+
+
+class SharedDataset:
+    """
+    Dataset somente leitura mapeado em memória a partir do snapshot Arrow.
+
+    Todas as sessões (e processos) que abrem o mesmo snapshot compartilham as
+    páginas do arquivo via cache do sistema operacional. As colunas são
+    expostas como visões NumPy somente leitura e os filtros produzem máscaras
+    booleanas sobre esses buffers, sem copiar os dados. Apenas as linhas
+    selecionadas são materializadas em `take`.
+    """
+
+    def __init__(self, csv_path: str):
+        self._open(ensure_snapshot(csv_path))
+
+    @classmethod
+    def from_snapshot(cls, path: str) -> 'SharedDataset':
+        """Abre um snapshot já gravado, sem conferir o CSV (usado nos processos de trabalho)."""
+        dataset = cls.__new__(cls)
+        dataset._open(path)
+        return dataset
+
+    def _open(self, path: str):
+        self.path = path
+        self.table = feather.read_table(self.path, memory_map=True)
+        # Versão dos dados: impressão digital do CSV que gerou este snapshot
+        self.version = (self.table.schema.metadata or {}).get(_FINGERPRINT_KEY, b'').decode()
+        self._views = {}
+
+    @property
+    def num_rows(self) -> int:
+        return self.table.num_rows
+
+    @property
+    def columns(self) -> list:
+        return self.table.schema.names
+
+    def _chunk(self, name: str) -> pa.Array:
+        if name not in self.columns:
+            raise ValueError(f"A coluna '{name}' não está presente no dataset.")
+        coluna = self.table.column(name)
+        return coluna.chunk(0) if coluna.num_chunks == 1 else coluna.combine_chunks()
+
+    def _readonly(self, array: pa.Array) -> np.ndarray:
+        try:
+            view = array.to_numpy(zero_copy_only=True)
+        except pa.ArrowInvalid:
+            # Colunas com nulos precisam de uma cópia (feita uma vez por processo)
+            view = array.to_numpy(zero_copy_only=False)
+        view.flags.writeable = False
+        return view
+
+    def column(self, name: str) -> np.ndarray:
+        """Visão NumPy somente leitura de uma coluna numérica ou de data."""
+        if name not in self._views:
+            chunk = self._chunk(name)
+            if pa.types.is_dictionary(chunk.type):
+                raise TypeError(f"A coluna '{name}' é categórica; use `codes`.")
+            self._views[name] = self._readonly(chunk)
+        return self._views[name]
+
+    def codes(self, name: str):
+        """
+        Códigos e categorias de uma coluna categórica.
+
+        Retorna:
+          - np.ndarray: Códigos inteiros (-1 para nulos).
+          - list: Categorias correspondentes a cada código.
+        """
+        chave = ('codes', name)
+        if chave not in self._views:
+            chunk = self._chunk(name)
+            if not pa.types.is_dictionary(chunk.type):
+                raise TypeError(f"A coluna '{name}' não é categórica.")
+            indices = chunk.indices
+            if indices.null_count:
+                indices = indices.fill_null(-1)
+            self._views[chave] = (self._readonly(indices), chunk.dictionary.to_pylist())
+        return self._views[chave]
+
+    def categories(self, name: str) -> list:
+        """Categorias presentes em uma coluna categórica."""
+        return self.codes(name)[1]
+
+    def mask_equals(self, name: str, value, mask: np.ndarray = None) -> np.ndarray:
+        """Máscara das linhas em que a coluna é igual a `value`."""
+        if pa.types.is_dictionary(self.table.schema.field(name).type):
+            codigos, categorias = self.codes(name)
+            if value not in categorias:
+                resultado = np.zeros(self.num_rows, dtype=bool)
+            else:
+                resultado = codigos == categorias.index(value)
+        else:
+            resultado = self.column(name) == value
+        return resultado if mask is None else resultado & mask
+
+    def mask_between(self, name: str, lower, upper, mask: np.ndarray = None) -> np.ndarray:
+        """Máscara das linhas com `lower <= coluna <= upper` (nulos ficam de fora)."""
+        valores = self.column(name)
+        resultado = (valores >= lower) & (valores <= upper)
+        return resultado if mask is None else resultado & mask
+
+    def take(self, columns: list = None, mask: np.ndarray = None, rows: np.ndarray = None) -> pd.DataFrame:
+        """
+        Materializa em um DataFrame apenas as colunas e linhas selecionadas.
+
+        Parâmetros:
+          - columns (list, opcional): Colunas desejadas. Se None, todas.
+          - mask (np.ndarray, opcional): Máscara booleana de linhas.
+          - rows (np.ndarray ou slice, opcional): Posições das linhas, ou uma faixa
+            contígua, no lugar da máscara.
+
+        Retorna:
+          - pd.DataFrame: Cópia contendo somente a seleção.
+        """
+        table = self.table if columns is None else self.table.select(columns)
+        if mask is not None:
+            table = table.filter(pa.array(mask, type=pa.bool_()))
+        elif isinstance(rows, slice):
+            inicio, fim, _ = rows.indices(table.num_rows)
+            table = table.slice(inicio, max(fim - inicio, 0))
+        elif rows is not None:
+            table = table.take(pa.array(rows, type=pa.int64()))
+        return table.to_pandas()
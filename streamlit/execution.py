@@ -0,0 +1,136 @@
+"""
+Backend de execução plugável para as agregações dos dashboards.
+
+Os dados são divididos em partições, cada partição é agregada de forma
+independente (em série ou em um pool de processos) e os resultados parciais
+são combinados com as mesmas funções de merge usadas na ingestão em chunks.
+
+Com um SharedDataset, os processos de trabalho recebem apenas o caminho do
+snapshot e uma faixa de linhas, e abrem o próprio snapshot mapeado em memória;
+nenhum dado é serializado na ida. O pool usa o contexto 'forkserver' (ou
+'spawn'), já que um fork dentro do servidor multithread do Streamlit pode
+herdar locks presos por outras threads.
+
+O backend de cada dashboard é escolhido pela variável de ambiente
+MARKETING_BACKEND_<DASHBOARD> (por exemplo, MARKETING_BACKEND_DASHBOARD_STATUS)
+ou, na falta dela, por MARKETING_BACKEND. O padrão é 'serial'.
+"""
+import atexit
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial, reduce
+
+import numpy as np
+import pandas as pd
+
+from data_store import SharedDataset
+from group_stats import group_moments, merge_moments
+
+BACKENDS = ('serial', 'processos')
+
+# Abaixo deste número de linhas por partição o custo do pool supera o ganho
+MIN_PARTITION_ROWS = 100_000
+
+_pool = None
+
+# Snapshots abertos em cada processo de trabalho, por caminho
+_worker_datasets = {}
+
+
+def get_backend(dashboard: str) -> str:
+    """Backend configurado para um dashboard (ex.: 'dashboard_status')."""
+    backend = os.environ.get(f"MARKETING_BACKEND_{dashboard.upper()}",
+                             os.environ.get('MARKETING_BACKEND', 'serial'))
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend inválido: '{backend}'. Use um de {BACKENDS}.")
+    return backend
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    # Um único pool por processo, reaproveitado entre reruns e sessões
+    global _pool
+    if _pool is None:
+        metodo = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        _pool = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context(metodo))
+        atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+    return _pool
+
+
+def _worker_dataset(path: str, version: str) -> SharedDataset:
+    # Reabre o snapshot se ele foi trocado desde a última tarefa deste processo
+    dataset = _worker_datasets.get(path)
+    if dataset is None or dataset.version != version:
+        dataset = _worker_datasets[path] = SharedDataset.from_snapshot(path)
+    if dataset.version != version:
+        raise ValueError(f"O snapshot '{path}' mudou durante a agregação.")
+    return dataset
+
+
+def _apply_to_rows(func, path: str, version: str, columns: list, inicio: int, fim: int):
+    return func(_worker_dataset(path, version).take(columns, rows=slice(inicio, fim)))
+
+
+def map_reduce(data, func, merge, backend: str = 'serial', partitions: int = None, columns: list = None):
+    """
+    Aplica `func` a partições de `data` e combina os resultados com `merge`.
+
+    Parâmetros:
+      - data (pd.DataFrame ou SharedDataset): Dados de entrada. Com um SharedDataset,
+        `func` recebe as colunas `columns` de uma faixa de linhas, lidas do snapshot
+        pelo próprio processo de trabalho; um DataFrame é enviado em partições.
+      - func (callable): Agregação parcial; precisa ser serializável (definida
+        em nível de módulo) para o backend 'processos'.
+      - merge (callable): Combina dois resultados parciais.
+      - backend (str): 'serial' ou 'processos'.
+      - partitions (int, opcional): Número de partições. Padrão: núcleos disponíveis,
+        limitado para que cada partição tenha ao menos MIN_PARTITION_ROWS linhas.
+      - columns (list, opcional): Colunas lidas de um SharedDataset. Se None, todas.
+
+    Retorna:
+      - Resultado combinado, igual ao de `func` sobre todos os dados.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend inválido: '{backend}'. Use um de {BACKENDS}.")
+    compartilhado = isinstance(data, SharedDataset)
+    total = data.num_rows if compartilhado else len(data)
+    if partitions is None:
+        partitions = min(os.cpu_count() or 1, total // MIN_PARTITION_ROWS)
+    if backend == 'serial' or partitions <= 1:
+        return func(data.take(columns) if compartilhado else data)
+
+    limites = np.linspace(0, total, partitions + 1).astype(int).tolist()
+    if compartilhado:
+        tarefa = partial(_apply_to_rows, func, data.path, data.version, columns)
+        parciais = list(_get_pool().map(tarefa, limites[:-1], limites[1:]))
+    else:
+        partes = [data.iloc[inicio:fim] for inicio, fim in zip(limites[:-1], limites[1:])]
+        parciais = list(_get_pool().map(func, partes))
+    return reduce(merge, parciais)
+
+
+def _moments(df: pd.DataFrame, key: str, value: str) -> pd.DataFrame:
+    return group_moments(df[key], df[value])
+
+
+def _sum_count(df: pd.DataFrame, key: str, value: str) -> pd.DataFrame:
+    return df.groupby(key, observed=False)[value].agg(['sum', 'count'])
+
+
+def _add(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    return a.add(b, fill_value=0)
+
+
+def grouped_moments(df: pd.DataFrame, key: str, value: str, backend: str = 'serial') -> pd.DataFrame:
+    """Resumo (n, média, M2) de `value` por `key` no backend escolhido."""
+    return map_reduce(df, partial(_moments, key=key, value=value), merge_moments, backend)
+
+
+def grouped_mean(df: pd.DataFrame, key: str, value: str, backend: str = 'serial') -> pd.Series:
+    """
+    Média de `value` por `key` no backend escolhido.
+
+    Equivale a `df.groupby(key, observed=False)[value].mean()`.
+    """
+    totais = map_reduce(df, partial(_sum_count, key=key, value=value), _add, backend)
+    return (totais['sum'] / totais['count'].replace(0, np.nan)).rename(value)
@@ -0,0 +1,211 @@
+"""
+Cubo pré-agregado para os filtros do dashboard de reclamações.
+
+Guarda, para cada ano de inscrição e flag de reclamação, a contagem, a soma e
+a soma dos quadrados de MntRegularProds. Com somas acumuladas por ano,
+qualquer intervalo do slider é respondido em O(#anos), independentemente do
+número de clientes, e o teste de Welch sai do resumo (n, média, M2).
+"""
+import numpy as np
+import pandas as pd
+
+from age_rollup import SPENDING_COLUMNS
+from group_stats import welch_ttest
+
+COMPLAIN_FLAGS = (0, 1)
+
+
+def complaint_columns(available: list) -> list:
+    """
+    Colunas do dataset necessárias para montar os dados de reclamações.
+
+    Sem MntRegularProds no dataset, ela é somada a partir das colunas de gasto.
+    """
+    if 'MntRegularProds' in available:
+        return ['Complain', 'Dt_Customer', 'MntRegularProds']
+    return ['Complain', 'Dt_Customer'] + SPENDING_COLUMNS
+
+
+def complaint_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Deriva 'Ano_Inscricao' e 'MntRegularProds' das colunas de `complaint_columns`.
+
+    Parâmetros:
+      - df (pd.DataFrame): Dados com as colunas de `complaint_columns`.
+
+    Retorna:
+      - pd.DataFrame: 'Complain', 'Ano_Inscricao' e 'MntRegularProds', sem linhas nulas.
+    """
+    if 'MntRegularProds' not in df.columns:
+        df = df.assign(MntRegularProds=df[SPENDING_COLUMNS].sum(axis=1))
+    # Dt_Customer já vem convertida do snapshot
+    df = df.assign(Ano_Inscricao=df['Dt_Customer'].dt.year)
+    df = df.dropna(subset=['Complain', 'Dt_Customer', 'MntRegularProds'])
+    return df[['Complain', 'Ano_Inscricao', 'MntRegularProds']]
+
+
+def build_complaint_cube(df: pd.DataFrame) -> dict:
+    """
+    Constrói o cubo ano de inscrição × Complain a partir dos dados brutos.
+
+    Parâmetros:
+      - df (pd.DataFrame): Dados com 'Ano_Inscricao', 'Complain' e 'MntRegularProds'.
+
+    Retorna:
+      - dict: Anos cobertos, estatísticas por célula e suas somas acumuladas.
+    """
+    anos = df['Ano_Inscricao'].to_numpy(dtype=np.int64)
+    flags = df['Complain'].to_numpy(dtype=np.int64)
+    valores = df['MntRegularProds'].to_numpy(dtype=np.float64)
+
+    primeiro_ano = int(anos.min()) if len(anos) else 0
+    n_anos = int(anos.max()) - primeiro_ano + 1 if len(anos) else 0
+
+    # Valores deslocados pela média global reduzem o cancelamento na variância
+    deslocamento = float(valores.mean()) if len(valores) else 0.0
+    centrados = valores - deslocamento
+
+    celula = (anos - primeiro_ano) * len(COMPLAIN_FLAGS) + flags
+    tamanho = n_anos * len(COMPLAIN_FLAGS)
+    forma = (n_anos, len(COMPLAIN_FLAGS))
+    contagem = np.bincount(celula, minlength=tamanho).reshape(forma)
+    soma = np.bincount(celula, weights=centrados, minlength=tamanho).reshape(forma)
+    soma_quadrados = np.bincount(celula, weights=centrados ** 2, minlength=tamanho).reshape(forma)
+
+    return {
+        'anos': np.arange(primeiro_ano, primeiro_ano + n_anos),
+        'deslocamento': deslocamento,
+        'contagem': contagem,
+        'soma': soma,
+        'soma_quadrados': soma_quadrados,
+        'contagem_acumulada': _prefix(contagem),
+        'soma_acumulada': _prefix(soma),
+        'soma_quadrados_acumulada': _prefix(soma_quadrados),
+    }
+
+
+def build_raw_complaint_cube(df: pd.DataFrame) -> dict:
+    """Cubo a partir das colunas brutas de `complaint_columns` (ver `complaint_frame`)."""
+    return build_complaint_cube(complaint_frame(df))
+
+
+def merge_complaint_cubes(a: dict, b: dict) -> dict:
+    """
+    Combina dois cubos (por exemplo, de chunks diferentes do CSV).
+
+    As somas são trazidas para um deslocamento comum antes de serem somadas,
+    então o resultado é o mesmo de um cubo construído sobre todos os dados.
+    """
+    if not len(a['anos']):
+        return b
+    if not len(b['anos']):
+        return a
+    primeiro_ano = min(a['anos'][0], b['anos'][0])
+    ultimo_ano = max(a['anos'][-1], b['anos'][-1])
+    forma = (ultimo_ano - primeiro_ano + 1, len(COMPLAIN_FLAGS))
+
+    total_a = a['contagem'].sum()
+    total_b = b['contagem'].sum()
+    deslocamento = (a['deslocamento'] * total_a + b['deslocamento'] * total_b) / (total_a + total_b)
+
+    contagem = np.zeros(forma, dtype=np.int64)
+    soma = np.zeros(forma)
+    soma_quadrados = np.zeros(forma)
+    for cubo in (a, b):
+        linhas = slice(cubo['anos'][0] - primeiro_ano, cubo['anos'][-1] - primeiro_ano + 1)
+        # Recentraliza: sum(x - d) = sum(x - d_c) + n * (d_c - d)
+        ajuste = cubo['deslocamento'] - deslocamento
+        contagem[linhas] += cubo['contagem']
+        soma[linhas] += cubo['soma'] + cubo['contagem'] * ajuste
+        soma_quadrados[linhas] += (cubo['soma_quadrados'] + 2 * ajuste * cubo['soma']
+                                   + cubo['contagem'] * ajuste ** 2)
+
+    return {
+        'anos': np.arange(primeiro_ano, ultimo_ano + 1),
+        'deslocamento': deslocamento,
+        'contagem': contagem,
+        'soma': soma,
+        'soma_quadrados': soma_quadrados,
+        'contagem_acumulada': _prefix(contagem),
+        'soma_acumulada': _prefix(soma),
+        'soma_quadrados_acumulada': _prefix(soma_quadrados),
+    }
+
+
+def _prefix(valores: np.ndarray) -> np.ndarray:
+    acumulado = np.zeros((valores.shape[0] + 1,) + valores.shape[1:], dtype=valores.dtype)
+    np.cumsum(valores, axis=0, out=acumulado[1:])
+    return acumulado
+
+
+def _year_slice(cube: dict, year_range: tuple) -> slice:
+    inicio = int(np.searchsorted(cube['anos'], year_range[0], side='left'))
+    fim = int(np.searchsorted(cube['anos'], year_range[1], side='right'))
+    return slice(inicio, max(inicio, fim))
+
+
+def query_year_counts(cube: dict, year_range: tuple, flags: tuple = COMPLAIN_FLAGS) -> pd.DataFrame:
+    """
+    Contagem de clientes por ano e flag de reclamação dentro do intervalo.
+
+    Retorna:
+      - pd.DataFrame: Colunas 'Ano_Inscricao', 'Complain' e 'count'.
+    """
+    fatia = _year_slice(cube, year_range)
+    anos = cube['anos'][fatia]
+    linhas = [
+        pd.DataFrame({'Ano_Inscricao': anos, 'Complain': flag, 'count': cube['contagem'][fatia, flag]})
+        for flag in flags
+    ]
+    return pd.concat(linhas, ignore_index=True)
+
+
+def query_totals(cube: dict, year_range: tuple) -> dict:
+    """
+    Estatísticas suficientes por flag de reclamação para um intervalo de anos.
+
+    Usa as somas acumuladas: o custo não depende do tamanho do intervalo.
+
+    Retorna:
+      - dict: Para cada flag, um resumo com 'n', 'mean' e 'm2'.
+    """
+    fatia = _year_slice(cube, year_range)
+    resultado = {}
+    for flag in COMPLAIN_FLAGS:
+        n = cube['contagem_acumulada'][fatia.stop, flag] - cube['contagem_acumulada'][fatia.start, flag]
+        s = cube['soma_acumulada'][fatia.stop, flag] - cube['soma_acumulada'][fatia.start, flag]
+        ss = cube['soma_quadrados_acumulada'][fatia.stop, flag] - cube['soma_quadrados_acumulada'][fatia.start, flag]
+        media_centrada = s / n if n else np.nan
+        resultado[flag] = {
+            'n': int(n),
+            'mean': media_centrada + cube['deslocamento'],
+            'm2': max(ss - s * media_centrada, 0.0) if n else 0.0,
+        }
+    return resultado
+
+
+def cube_metrics(cube: dict, year_range: tuple, flags: tuple = COMPLAIN_FLAGS) -> dict:
+    """
+    Mesmas métricas de `calculate_metrics`, calculadas apenas a partir do cubo.
+
+    Parâmetros:
+      - cube (dict): Cubo gerado por `build_complaint_cube`.
+      - year_range (tuple): Intervalo de anos (inclusivo).
+      - flags (tuple): Flags de reclamação mantidas pelo filtro.
+    """
+    totais = query_totals(cube, year_range)
+    vazio = {'n': 0, 'mean': np.nan, 'm2': 0.0}
+    reclamaram = totais[1] if 1 in flags else vazio
+    nao_reclamaram = totais[0] if 0 in flags else vazio
+
+    t_stat, p_value = welch_ttest(reclamaram, nao_reclamaram)
+    total = reclamaram['n'] + nao_reclamaram['n']
+
+    return {
+        'media_reclamaram': reclamaram['mean'] if reclamaram['n'] else np.nan,
+        'media_nao_reclamaram': nao_reclamaram['mean'] if nao_reclamaram['n'] else np.nan,
+        't_stat': t_stat,
+        'p_value': p_value,
+        'total_clientes': total,
+        'taxa_reclamacoes': reclamaram['n'] / total if total else np.nan
+    }
@@ -0,0 +1,153 @@
+"""
+Estatísticas de grupo mescláveis e teste t de Welch a partir delas.
+
+Cada grupo é resumido por contagem, média e M2 (soma dos quadrados dos
+desvios em relação à média). Resumos de partes diferentes dos dados são
+combinados com a fórmula de Chan, então o resultado de vários chunks ou
+partições é o mesmo de uma única passada sobre todos os dados.
+"""
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+MOMENT_COLUMNS = ['n', 'mean', 'm2']
+
+
+def group_moments(keys, values) -> pd.DataFrame:
+    """
+    Calcula contagem, média e M2 de `values` para cada grupo de `keys`.
+
+    Linhas com chave ou valor nulo são ignoradas.
+
+    Parâmetros:
+      - keys (array-like): Rótulo do grupo de cada linha.
+      - values (array-like): Valores numéricos de cada linha.
+
+    Retorna:
+      - pd.DataFrame: Uma linha por grupo com as colunas 'n', 'mean' e 'm2'.
+    """
+    keys = pd.Series(keys)
+    codigos, grupos = pd.factorize(keys, sort=True)
+    valores = np.asarray(values, dtype=np.float64)
+
+    validos = (codigos >= 0) & ~np.isnan(valores)
+    codigos = codigos[validos]
+    valores = valores[validos]
+
+    k = len(grupos)
+    n = np.bincount(codigos, minlength=k)
+    soma = np.bincount(codigos, weights=valores, minlength=k)
+    media = np.divide(soma, n, out=np.full(k, np.nan), where=n > 0)
+    desvios = valores - media[codigos]
+    m2 = np.bincount(codigos, weights=desvios * desvios, minlength=k)
+
+    return pd.DataFrame(
+        {'n': n, 'mean': media, 'm2': m2},
+        index=pd.Index(np.asarray(grupos), name=keys.name)
+    )
+
+
+def merge_moments(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    """
+    Combina dois resumos de grupo (fórmula de Chan para médias e M2).
+
+    Grupos presentes em apenas um dos resumos são preservados.
+    """
+    indice = a.index.union(b.index)
+    a = a.reindex(indice)
+    b = b.reindex(indice)
+    n_a = a['n'].fillna(0).to_numpy()
+    n_b = b['n'].fillna(0).to_numpy()
+    media_a = a['mean'].fillna(0).to_numpy()
+    media_b = b['mean'].fillna(0).to_numpy()
+
+    n = n_a + n_b
+    delta = media_b - media_a
+    with np.errstate(invalid='ignore', divide='ignore'):
+        peso_b = np.where(n > 0, n_b / n, np.nan)
+        media = media_a + delta * peso_b
+        m2 = (a['m2'].fillna(0).to_numpy() + b['m2'].fillna(0).to_numpy()
+              + delta * delta * n_a * peso_b)
+
+    return pd.DataFrame(
+        {'n': n.astype(np.int64), 'mean': media, 'm2': np.where(n > 0, m2, 0.0)},
+        index=indice
+    )
+
+
+def combine_moments(parts) -> pd.DataFrame:
+    """Combina uma sequência de resumos parciais (chunks ou partições)."""
+    return reduce(merge_moments, parts)
+
+
+def _welch(n_a, mean_a, m2_a, n_b, mean_b, m2_b):
+    # Importação adiada: scipy.stats é a dependência mais lenta de carregar
+    # e só é necessária no primeiro teste calculado
+    from scipy.stats import t as t_dist
+
+    n_a = np.asarray(n_a, dtype=np.float64)
+    n_b = np.asarray(n_b, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        erro_a = m2_a / (n_a - 1) / n_a
+        erro_b = m2_b / (n_b - 1) / n_b
+        erro = erro_a + erro_b
+        t_stat = (mean_a - mean_b) / np.sqrt(erro)
+        graus = erro ** 2 / (erro_a ** 2 / (n_a - 1) + erro_b ** 2 / (n_b - 1))
+        p_value = 2 * t_dist.sf(np.abs(t_stat), graus)
+
+    invalido = (n_a < 2) | (n_b < 2) | ~(erro > 0)
+    t_stat = np.where(invalido, np.nan, t_stat)
+    graus = np.where(invalido, np.nan, graus)
+    p_value = np.where(invalido, np.nan, p_value)
+    return t_stat, graus, p_value
+
+
+def welch_ttest(a, b) -> tuple:
+    """
+    Teste t de Welch bilateral entre dois grupos resumidos.
+
+    Equivale a `scipy.stats.ttest_ind(..., equal_var=False)`.
+
+    Parâmetros:
+      - a, b (mapping): Resumos com as chaves 'n', 'mean' e 'm2'
+        (por exemplo, linhas do DataFrame de `group_moments`).
+
+    Retorna:
+      - tuple: (t_stat, p_value); NaN se algum grupo tiver menos de 2 valores.
+    """
+    t_stat, _, p_value = _welch(a['n'], a['mean'], a['m2'], b['n'], b['mean'], b['m2'])
+    return float(t_stat), float(p_value)
+
+
+def group_welch_ttest(moments: pd.DataFrame, group_a, group_b) -> tuple:
+    """Teste de Welch entre dois grupos de um resumo (NaN se algum faltar)."""
+    vazio = {'n': 0, 'mean': np.nan, 'm2': 0.0}
+    a = moments.loc[group_a] if group_a in moments.index else vazio
+    b = moments.loc[group_b] if group_b in moments.index else vazio
+    return welch_ttest(a, b)
+
+
+def pairwise_welch(moments: pd.DataFrame) -> pd.DataFrame:
+    """
+    Teste de Welch para todos os pares de grupos em uma única passada vetorizada.
+
+    Retorna:
+      - pd.DataFrame: Uma linha por par com médias, t, graus de liberdade e p-valor.
+    """
+    i, j = np.triu_indices(len(moments), k=1)
+    n = moments['n'].to_numpy()
+    media = moments['mean'].to_numpy()
+    m2 = moments['m2'].to_numpy()
+    t_stat, graus, p_value = _welch(n[i], media[i], m2[i], n[j], media[j], m2[j])
+
+    grupos = moments.index.to_numpy()
+    return pd.DataFrame({
+        'grupo_a': grupos[i],
+        'grupo_b': grupos[j],
+        'media_a': media[i],
+        'media_b': media[j],
+        't_stat': t_stat,
+        'graus_liberdade': graus,
+        'p_value': p_value,
+    })
@@ -0,0 +1,241 @@
+"""
+Instrumentação das etapas dos dashboards (carregamento, filtro, análise,
+construção e serialização das figuras).
+
+Cada rerun de um dashboard vira um trace com spans aninhados; cada span
+guarda a duração e a variação de memória residente (RSS) do processo. O
+último trace pode ser exibido em um painel recolhível na barra lateral e
+todos podem ser exportados para um arquivo JSON Lines no formato OTLP/JSON
+do OpenTelemetry (um ExportTraceServiceRequest por linha).
+
+Ativação por variáveis de ambiente, lidas na importação:
+  - MARKETING_PROFILE=1: coleta os spans e mostra o painel de tempos;
+  - MARKETING_TRACE_FILE=caminho: também exporta os traces para o arquivo.
+
+Desativada (padrão), `span` devolve um único objeto que não faz nada e
+`traced` devolve a própria função, sem custo nas chamadas.
+"""
+import contextvars
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+
+TRACE_FILE = os.environ.get('MARKETING_TRACE_FILE') or None
+ENABLED = os.environ.get('MARKETING_PROFILE', '0') not in ('', '0', 'false') or TRACE_FILE is not None
+
+_current_trace = contextvars.ContextVar('marketing_trace', default=None)
+_export_lock = threading.Lock()
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def _rss_bytes():
+    """Memória residente atual do processo (None se indisponível)."""
+    try:
+        with open('/proc/self/statm', 'rb') as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        return None
+
+
+class _NoopSpan:
+    """Span vazio usado quando a instrumentação está desativada."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, key, value):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    """Etapa medida de um trace."""
+    __slots__ = ('trace', 'name', 'span_id', 'parent_id', 'depth', 'attributes',
+                 'start_ns', 'end_ns', 'rss_start', 'rss_end')
+
+    def __init__(self, trace, name: str, attributes: dict):
+        self.trace = trace
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.attributes = attributes
+        self.parent_id = trace.stack[-1].span_id if trace.stack else None
+        self.depth = len(trace.stack)
+        self.start_ns = self.end_ns = 0
+        self.rss_start = self.rss_end = None
+
+    def set(self, key, value):
+        """Adiciona um atributo ao span (ex.: número de linhas filtradas)."""
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self.trace.stack.append(self)
+        self.trace.spans.append(self)
+        self.rss_start = _rss_bytes()
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        self.rss_end = _rss_bytes()
+        if exc_type is not None:
+            self.attributes['error'] = exc_type.__name__
+        self.trace.stack.pop()
+        return False
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    @property
+    def rss_delta_mb(self):
+        if self.rss_start is None or self.rss_end is None:
+            return None
+        return (self.rss_end - self.rss_start) / (1024 * 1024)
+
+
+class Trace:
+    """Spans de uma execução (um rerun) de um dashboard."""
+
+    def __init__(self, service: str):
+        self.service = service
+        self.trace_id = secrets.token_hex(16)
+        self.spans = []
+        self.stack = []
+
+    def breakdown(self) -> list:
+        """Linhas (etapa, duração em ms, % do total, variação de RSS em MB)."""
+        total = self.spans[0].duration_ms if self.spans else 0.0
+        return [{
+            'etapa': '  ' * span.depth + span.name,
+            'ms': round(span.duration_ms, 2),
+            '%': round(100 * span.duration_ms / total, 1) if total else 0.0,
+            'RSS (MB)': None if span.rss_delta_mb is None else round(span.rss_delta_mb, 2),
+        } for span in self.spans]
+
+    def to_otlp(self) -> dict:
+        """Trace no formato OTLP/JSON (ExportTraceServiceRequest)."""
+        return {'resourceSpans': [{
+            'resource': {'attributes': [_attribute('service.name', self.service)]},
+            'scopeSpans': [{
+                'scope': {'name': 'marketing_campaign.instrumentation'},
+                'spans': [_otlp_span(self.trace_id, span) for span in self.spans],
+            }],
+        }]}
+
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+def _otlp_span(trace_id: str, span: Span) -> dict:
+    atributos = dict(span.attributes)
+    if span.rss_end is not None:
+        atributos['process.memory.rss'] = span.rss_end
+        atributos['process.memory.rss_delta'] = span.rss_end - span.rss_start
+    registro = {
+        'traceId': trace_id,
+        'spanId': span.span_id,
+        'name': span.name,
+        'kind': 1,  # SPAN_KIND_INTERNAL
+        'startTimeUnixNano': str(span.start_ns),
+        'endTimeUnixNano': str(span.end_ns),
+        'attributes': [_attribute(chave, valor) for chave, valor in atributos.items()],
+        'status': {'code': 2 if 'error' in span.attributes else 1},
+    }
+    if span.parent_id:
+        registro['parentSpanId'] = span.parent_id
+    return registro
+
+
+def span(name: str, **attributes):
+    """
+    Mede uma etapa dentro do trace atual.
+
+    Uso:
+        with span('filtro', linhas=len(df)):
+            ...
+
+    Fora de um `trace_run` ou com a instrumentação desativada, não faz nada.
+    """
+    if not ENABLED:
+        return _NOOP
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP
+    return Span(trace, name, attributes)
+
+
+def traced(name: str = None):
+    """Decorador que mede cada chamada da função como um span."""
+    def decorador(func):
+        if not ENABLED:
+            return func
+        nome = name or func.__qualname__
+
+        def envolvida(*args, **kwargs):
+            with span(nome):
+                return func(*args, **kwargs)
+        envolvida.__wrapped__ = func
+        envolvida.__name__ = func.__name__
+        envolvida.__doc__ = func.__doc__
+        return envolvida
+    return decorador
+
+
+def export(trace: Trace, path: str = None):
+    """Acrescenta o trace ao arquivo JSON Lines (OTLP/JSON)."""
+    path = path or TRACE_FILE
+    if not path:
+        return
+    linha = json.dumps(trace.to_otlp(), ensure_ascii=False)
+    with _export_lock, open(path, 'a', encoding='utf-8') as arquivo:
+        arquivo.write(linha + '\n')
+
+
+def render_breakdown(trace: Trace):
+    """Painel recolhível na barra lateral com o tempo de cada etapa do rerun."""
+    import pandas as pd
+    import streamlit as st
+
+    with st.sidebar.expander(f"⏱️ Tempo por etapa ({trace.spans[0].duration_ms:.0f} ms)"):
+        st.dataframe(pd.DataFrame(trace.breakdown()), hide_index=True, use_container_width=True)
+
+
+@contextmanager
+def trace_run(service: str):
+    """
+    Abre um trace para uma execução completa de um dashboard.
+
+    Ao final, exporta o trace (se MARKETING_TRACE_FILE estiver definida) e,
+    se a execução terminou normalmente, mostra o painel de tempos.
+    """
+    if not ENABLED:
+        yield None
+        return
+    trace = Trace(service)
+    token = _current_trace.set(trace)
+    concluido = False
+    try:
+        with Span(trace, 'rerun', {}):
+            yield trace
+        concluido = True
+    finally:
+        _current_trace.reset(token)
+        export(trace)
+    if concluido:
+        render_breakdown(trace)
@@ -0,0 +1,300 @@
+"""
+Teste de carga dos dashboards com sessões simultâneas.
+
+Cada sessão simulada é um AppTest do Streamlit: o script roda em uma thread
+própria e compartilha os caches do processo, como as sessões de um servidor
+real. Depois de abrir a página, cada sessão repete, até o fim da duração:
+  1. espera um tempo de reflexão aleatório (exponencial, média --pensamento);
+  2. move um controle escolhido ao acaso (slider, selectbox, number_input ou
+     multiselect) para um valor válido aleatório;
+  3. executa o rerun e registra a latência e se a página exibiu erros.
+
+Cada nível de concorrência de cada dashboard roda em um processo novo (caches
+frios e pico de RSS só daquele nível) e informa:
+  - latência de rerun p50/p95/p99 e a abertura da página (primeira execução);
+  - vazão (reruns concluídos por segundo);
+  - memória residente do processo (atual e pico).
+
+Os resultados são gravados em JSON com o commit atual; `--comparar` aponta
+regressões de p95 em relação a uma execução anterior (código de saída 1).
+
+Uso:
+    python load_test.py --sessoes 1 2 4 8 --duracao 60
+    python load_test.py --dashboards dashboard_status.py --sessoes 4 16 --pensamento 1
+    python load_test.py --comparar ../benchmarks/carga_abc1234.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import numpy as np
+
+from benchmark import DEFAULT_RESULTS_DIR, current_commit
+from warmup import DASHBOARDS
+
+DEFAULT_LEVELS = (1, 2, 4, 8)
+DEFAULT_DURATION_SECONDS = 30.0
+DEFAULT_THINK_SECONDS = 2.0
+PERCENTILES = (50, 95, 99)
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def _memory_mb() -> tuple:
+    """(RSS atual, pico de RSS) do processo em MB; None onde não houver como medir."""
+    atual = pico = None
+    try:
+        with open('/proc/self/statm', 'rb') as statm:
+            atual = int(statm.read().split()[1]) * _PAGE_SIZE / (1024 * 1024)
+    except OSError:
+        pass
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss vem em KB no Linux e em bytes no macOS
+        pico = pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+    return atual, pico
+
+
+def _random_number(rng: random.Random, minimo, maximo, passo, inteiro: bool):
+    valor = rng.uniform(minimo, maximo)
+    if passo:
+        valor = minimo + round((valor - minimo) / passo) * passo
+    valor = min(max(valor, minimo), maximo)
+    return int(valor) if inteiro else valor
+
+
+def random_interaction(app, rng: random.Random) -> str:
+    """
+    Move um controle da página para um valor válido escolhido ao acaso.
+
+    Retorna:
+      - str: Descrição da interação (tipo e rótulo do controle), ou '' se a página não tem controles.
+    """
+    controles = ([('slider', w) for w in app.slider] + [('selectbox', w) for w in app.selectbox]
+                 + [('number_input', w) for w in app.number_input] + [('multiselect', w) for w in app.multiselect])
+    if not controles:
+        return ''
+    tipo, controle = rng.choice(controles)
+
+    if tipo == 'slider':
+        inteiro = isinstance(controle.value[0] if isinstance(controle.value, tuple) else controle.value, int)
+        valores = sorted(_random_number(rng, controle.min, controle.max, controle.step, inteiro) for _ in range(2))
+        controle.set_value(tuple(valores) if isinstance(controle.value, tuple) else valores[0])
+    elif tipo == 'selectbox':
+        controle.select(rng.choice(controle.options))
+    elif tipo == 'number_input':
+        minimo = controle.min if controle.min is not None else 0
+        maximo = controle.max if controle.max is not None else max(minimo + 1, 2 * (controle.value or 1))
+        controle.set_value(_random_number(rng, minimo, maximo, controle.step, isinstance(controle.value, int)))
+    else:
+        controle.set_value(rng.sample(list(controle.options), rng.randint(1, len(controle.options))))
+    return f"{tipo}:{controle.label}"
+
+
+def _page_errors(app) -> int:
+    return len(app.error) + len(app.exception)
+
+
+def run_session(script_path: str, deadline: float, think_time: float, seed: int, records: list, lock,
+                timeout: float = 300):
+    """
+    Uma sessão simulada: abre a página e interage até `deadline` (time.perf_counter).
+
+    Cada execução é registrada em `records` como (tipo, latência em s, erros na página, fim).
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    # As sessões não abrem a página todas no mesmo instante
+    time.sleep(rng.uniform(0, think_time))
+    app = AppTest.from_file(script_path, default_timeout=timeout)
+
+    tipo = 'abertura'
+    while True:
+        inicio = time.perf_counter()
+        try:
+            app.run()
+            erros = _page_errors(app)
+        except Exception:
+            erros = 1
+        fim = time.perf_counter()
+        with lock:
+            records.append((tipo, fim - inicio, erros, fim))
+
+        espera = rng.expovariate(1 / think_time) if think_time > 0 else 0.0
+        if fim + espera >= deadline:
+            break
+        time.sleep(espera)
+        tipo = 'rerun'
+        if not random_interaction(app, rng):
+            break
+
+
+def run_level(script: str, sessions: int, duration: float = DEFAULT_DURATION_SECONDS,
+              think_time: float = DEFAULT_THINK_SECONDS, seed: int = 42) -> dict:
+    """
+    Executa `sessions` sessões simultâneas de um dashboard no processo atual.
+
+    Retorna:
+      - dict: Reruns, erros, percentis de latência, vazão e memória do processo.
+    """
+    from streamlit import config
+    from streamlit.logger import set_log_level
+    config.get_config_options()  # a leitura da configuração redefine o nível de log
+    set_log_level('error')
+
+    caminho = os.path.join(os.path.dirname(os.path.abspath(__file__)), script)
+    registros, lock = [], threading.Lock()
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=run_session, name=f"sessao-{i}",
+                                args=(caminho, inicio + duration, think_time, seed + i, registros, lock))
+               for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    reruns = np.array([latencia for tipo, latencia, _, _ in registros if tipo == 'rerun'])
+    aberturas = np.array([latencia for tipo, latencia, _, _ in registros if tipo == 'abertura'])
+    # A vazão conta os reruns concluídos no período em que as sessões estiveram ativas
+    periodo = max(fim for *_, fim in registros) - inicio if registros else float('nan')
+    rss, rss_pico = _memory_mb()
+
+    resultado = {
+        'reruns': len(reruns),
+        'erros': int(sum(erros > 0 for _, _, erros, _ in registros)),
+        'abertura_p50_s': float(np.percentile(aberturas, 50)) if len(aberturas) else None,
+        'vazao_rps': len(reruns) / periodo if len(reruns) else 0.0,
+        'rss_mb': rss,
+        'rss_pico_mb': rss_pico,
+    }
+    for p in PERCENTILES:
+        resultado[f"p{p}_s"] = float(np.percentile(reruns, p)) if len(reruns) else None
+    return resultado
+
+
+def _run_isolated(script: str, sessions: int, duration: float, think_time: float, seed: int) -> dict:
+    """Executa um nível em um processo novo, para que caches e pico de RSS sejam só dele."""
+    argumentos = ['--nivel', script, str(sessions), '--duracao', str(duration),
+                  '--pensamento', str(think_time), '--semente', str(seed)]
+    saida = subprocess.run([sys.executable, os.path.abspath(__file__), *argumentos],
+                           cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    if saida.returncode != 0:
+        return {'erro': saida.stderr.strip().splitlines()[-1] if saida.stderr.strip() else 'falha'}
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def run_load_test(scripts=DASHBOARDS, levels=DEFAULT_LEVELS, duration: float = DEFAULT_DURATION_SECONDS,
+                  think_time: float = DEFAULT_THINK_SECONDS, seed: int = 42) -> dict:
+    """
+    Executa cada dashboard em cada nível de concorrência.
+
+    Retorna:
+      - dict: Metadados do ambiente e lista de resultados por dashboard e número de sessões.
+    """
+    resultados = []
+    for script in scripts:
+        for sessoes in levels:
+            medicao = _run_isolated(script, sessoes, duration, think_time, seed)
+            resultados.append({'dashboard': os.path.splitext(script)[0], 'sessoes': sessoes, **medicao})
+            print(_format_row(resultados[-1]), flush=True)
+    return {
+        'commit': current_commit(),
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'duracao_s': duration,
+        'pensamento_s': think_time,
+        'semente': seed,
+        'resultados': resultados,
+    }
+
+
+def _format_row(linha: dict) -> str:
+    if 'erro' in linha:
+        return f"{linha['dashboard']:<24} {linha['sessoes']:>7}  ERRO: {linha['erro']}"
+    if not linha['reruns']:
+        return f"{linha['dashboard']:<24} {linha['sessoes']:>7}  nenhum rerun concluído (aumente --duracao)"
+    rss = f"{linha['rss_pico_mb']:9.1f}" if linha.get('rss_pico_mb') is not None else '        -'
+    return (f"{linha['dashboard']:<24} {linha['sessoes']:>7} {linha['reruns']:>7} {linha['p50_s']:8.3f} "
+            f"{linha['p95_s']:8.3f} {linha['p99_s']:8.3f} {linha['vazao_rps']:8.2f} {rss} {linha['erros']:>6}")
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.2, min_seconds: float = 0.05) -> list:
+    """
+    Compara o p95 de cada dashboard e nível de concorrência com uma execução anterior.
+
+    Um nível é regressão se o p95 crescer mais de `tolerance` (fração) e a
+    diferença absoluta passar de `min_seconds` (ruído de medição).
+
+    Retorna:
+      - list: Linhas (dashboard, sessões, p95 anterior, p95 atual, razão, regressão).
+    """
+    anteriores = {(r['dashboard'], r['sessoes']): r for r in baseline['resultados'] if r.get('p95_s') is not None}
+    comparacao = []
+    for atual in current['resultados']:
+        anterior = anteriores.get((atual['dashboard'], atual['sessoes']))
+        if anterior is None or atual.get('p95_s') is None:
+            continue
+        razao = atual['p95_s'] / anterior['p95_s']
+        regressao = razao > 1 + tolerance and atual['p95_s'] - anterior['p95_s'] > min_seconds
+        comparacao.append((atual['dashboard'], atual['sessoes'], anterior['p95_s'], atual['p95_s'], razao, regressao))
+    return comparacao
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga dos dashboards com sessões simultâneas.")
+    parser.add_argument('--dashboards', nargs='+', choices=list(DASHBOARDS), default=list(DASHBOARDS),
+                        help="Dashboards testados")
+    parser.add_argument('--sessoes', type=int, nargs='+', default=list(DEFAULT_LEVELS),
+                        help="Níveis de concorrência (sessões simultâneas)")
+    parser.add_argument('--duracao', type=float, default=DEFAULT_DURATION_SECONDS, help="Segundos por nível")
+    parser.add_argument('--pensamento', type=float, default=DEFAULT_THINK_SECONDS,
+                        help="Tempo médio de reflexão entre interações (s)")
+    parser.add_argument('--semente', type=int, default=42, help="Semente das interações")
+    parser.add_argument('--saida', default=None, help="Arquivo JSON de resultados")
+    parser.add_argument('--comparar', default=None, help="JSON de uma execução anterior")
+    parser.add_argument('--tolerancia', type=float, default=0.2, help="Aumento de p95 aceito (fração)")
+    parser.add_argument('--nivel', nargs=2, metavar=('DASHBOARD', 'SESSOES'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Modo interno: um único nível, executado no processo filho
+    if args.nivel:
+        print(json.dumps(run_level(args.nivel[0], int(args.nivel[1]), args.duracao, args.pensamento, args.semente)))
+        return
+
+    print(f"{'dashboard':<24} {'sessões':>7} {'reruns':>7} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8} "
+          f"{'rerun/s':>8} {'pico MB':>9} {'erros':>6}")
+    resultado = run_load_test(args.dashboards, args.sessoes, args.duracao, args.pensamento, args.semente)
+
+    saida = args.saida or os.path.join(DEFAULT_RESULTS_DIR, f"carga_{resultado['commit']}.json")
+    os.makedirs(os.path.dirname(saida) or '.', exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em {saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            linhas = compare(resultado, json.load(arquivo), args.tolerancia)
+        print(f"\nComparação com {args.comparar}:")
+        for dashboard, sessoes, antes, depois, razao, regressao in linhas:
+            marca = '  <-- REGRESSÃO' if regressao else ''
+            print(f"{dashboard:<24} {sessoes:>7} {antes:8.3f} s -> {depois:8.3f} s ({razao:5.2f}x){marca}")
+        if any(linha[-1] for linha in linhas):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Análise de cesta de compras com bitsets, generalizando sql/advanced_queries/cesta_compras.sql.
+
+Cada item (gasto acima de um limiar em uma categoria Mnt* ou aceite de uma
+campanha AcceptedCmp*) vira um bitset compactado com um bit por cliente. O
+suporte de qualquer combinação é o popcount da interseção dos bitsets, então
+pares e trios são avaliados sem reler a tabela. Itens e pares abaixo do
+suporte mínimo são podados no estilo Apriori.
+
+Uso:
+    python market_basket.py --min-suporte 0.02 --limiar MntWines=400 --limiar MntGoldProds=80
+"""
+import argparse
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from bitset import pack, popcount
+from data_store import DEFAULT_DATA_PATH, SharedDataset
+
+# Limiares de gasto por categoria (Wine/Meat/Gold/Sweets seguem cesta_compras.sql)
+DEFAULT_THRESHOLDS = {
+    'MntWines': 500,
+    'MntMeatProducts': 300,
+    'MntGoldProds': 100,
+    'MntSweetProducts': 50,
+    'MntFruits': 50,
+    'MntFishProducts': 50,
+}
+ITEM_NAMES = {
+    'MntWines': 'Wine',
+    'MntMeatProducts': 'Meat',
+    'MntGoldProds': 'Gold',
+    'MntSweetProducts': 'Sweets',
+    'MntFruits': 'Fruits',
+    'MntFishProducts': 'Fish',
+    'AcceptedCmp1': 'Cmp1',
+    'AcceptedCmp2': 'Cmp2',
+    'AcceptedCmp3': 'Cmp3',
+    'AcceptedCmp4': 'Cmp4',
+    'AcceptedCmp5': 'Cmp5',
+}
+CAMPAIGN_COLUMNS = ['AcceptedCmp1', 'AcceptedCmp2', 'AcceptedCmp3', 'AcceptedCmp4', 'AcceptedCmp5']
+
+
+def item_bitsets(data, thresholds: dict = None, campaigns: bool = True) -> dict:
+    """
+    Converte as colunas de gasto e de campanhas em bitsets por item.
+
+    Parâmetros:
+      - data (DataFrame ou mapping): Colunas Mnt* e AcceptedCmp* (arrays ou Series).
+      - thresholds (dict, opcional): Limiar de gasto por coluna Mnt*; um cliente
+        "compra" o item quando o gasto é estritamente maior que o limiar.
+      - campaigns (bool): Incluir os aceites de AcceptedCmp1..5 como itens.
+
+    Retorna:
+      - dict: Nome do item -> bitset (np.uint64).
+    """
+    thresholds = DEFAULT_THRESHOLDS if thresholds is None else thresholds
+    bitsets = {ITEM_NAMES.get(coluna, coluna): pack(np.asarray(data[coluna]) > limiar)
+               for coluna, limiar in thresholds.items()}
+    if campaigns:
+        for coluna in CAMPAIGN_COLUMNS:
+            bitsets[ITEM_NAMES[coluna]] = pack(np.asarray(data[coluna]) == 1)
+    return bitsets
+
+
+def frequent_itemsets(bitsets: dict, total: int, min_support: float = 0.01, max_size: int = 3) -> dict:
+    """
+    Conjuntos frequentes (tamanho 1 a `max_size`) com poda Apriori.
+
+    Um conjunto só é avaliado se todos os seus subconjuntos imediatos forem
+    frequentes. As interseções de cada nível são guardadas e reaproveitadas
+    no nível seguinte.
+
+    Retorna:
+      - dict: Tupla de itens -> contagem de suporte.
+    """
+    minimo = min_support * total
+    nivel = {}
+    for item, bits in bitsets.items():
+        contagem = popcount(bits)
+        if contagem >= minimo and contagem > 0:
+            nivel[(item,)] = (bits, contagem)
+
+    frequentes = {conjunto: contagem for conjunto, (_, contagem) in nivel.items()}
+    itens = sorted(item for (item,) in nivel)
+    for tamanho in range(2, max_size + 1):
+        proximo = {}
+        for prefixo, (bits, _) in nivel.items():
+            for item in itens:
+                if item <= prefixo[-1]:
+                    continue
+                candidato = prefixo + (item,)
+                if any(sub not in frequentes for sub in combinations(candidato, tamanho - 1)):
+                    continue
+                intersecao = bits & bitsets[item]
+                contagem = popcount(intersecao)
+                if contagem >= minimo and contagem > 0:
+                    proximo[candidato] = (intersecao, contagem)
+        if not proximo:
+            break
+        frequentes.update({conjunto: contagem for conjunto, (_, contagem) in proximo.items()})
+        nivel = proximo
+    return frequentes
+
+
+def association_rules(frequentes: dict, total: int) -> pd.DataFrame:
+    """
+    Regras antecedente -> consequente (um item) com suporte, confiança e lift.
+
+    Mesmas métricas de cesta_compras.sql:
+      - support = contagem(A ∪ B) / total
+      - confidence = contagem(A ∪ B) / contagem(A)
+      - lift_ratio = support / (suporte(A) * suporte(B))
+    """
+    linhas = []
+    for conjunto, contagem in frequentes.items():
+        if len(conjunto) < 2:
+            continue
+        for consequente in conjunto:
+            antecedente = tuple(item for item in conjunto if item != consequente)
+            suporte_a = frequentes[antecedente] / total
+            suporte_b = frequentes[(consequente,)] / total
+            suporte = contagem / total
+            linhas.append({
+                'antecedente': ' + '.join(antecedente),
+                'consequente': consequente,
+                'tamanho': len(conjunto),
+                'support_count': contagem,
+                'support': suporte,
+                'confidence': contagem / frequentes[antecedente],
+                'lift_ratio': suporte / (suporte_a * suporte_b),
+            })
+    colunas = ['antecedente', 'consequente', 'tamanho', 'support_count', 'support', 'confidence', 'lift_ratio']
+    return pd.DataFrame(linhas, columns=colunas).sort_values('lift_ratio', ascending=False, ignore_index=True)
+
+
+def basket_analysis(data, thresholds: dict = None, min_support: float = 0.01,
+                    max_size: int = 3, min_lift: float = 1.0) -> pd.DataFrame:
+    """
+    Regras de associação para todos os pares e trios de itens.
+
+    Parâmetros:
+      - data (DataFrame ou mapping): Colunas Mnt* e AcceptedCmp*.
+      - thresholds (dict, opcional): Limiares de gasto (padrão: DEFAULT_THRESHOLDS).
+      - min_support (float): Suporte mínimo (fração de clientes) para poda.
+      - max_size (int): Tamanho máximo dos conjuntos (3 = até trios).
+      - min_lift (float): Mantém apenas regras com lift acima deste valor.
+
+    Retorna:
+      - pd.DataFrame: Regras ordenadas por lift.
+    """
+    total = len(next(iter(data.values())) if isinstance(data, dict) else data)
+    bitsets = item_bitsets(data, thresholds)
+    regras = association_rules(frequent_itemsets(bitsets, total, min_support, max_size), total)
+    return regras[regras['lift_ratio'] > min_lift].reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regras de associação entre categorias e campanhas.")
+    parser.add_argument('csv_path', nargs='?', default=DEFAULT_DATA_PATH, help="CSV processado")
+    parser.add_argument('--min-suporte', type=float, default=0.01, help="Suporte mínimo (fração)")
+    parser.add_argument('--limiar', action='append', default=[], metavar='COLUNA=VALOR',
+                        help="Limiar de gasto de uma coluna Mnt* (pode repetir)")
+    args = parser.parse_args()
+
+    limiares = dict(DEFAULT_THRESHOLDS)
+    for item in args.limiar:
+        coluna, valor = item.split('=')
+        limiares[coluna] = float(valor)
+
+    dataset = SharedDataset(args.csv_path)
+    dados = {coluna: dataset.column(coluna) for coluna in list(limiares) + CAMPAIGN_COLUMNS}
+    print(basket_analysis(dados, limiares, args.min_suporte).head(30).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+"""
+Materialização incremental das tabelas derivadas de sql/table_creation_scripts.
+
+Constrói customer_lifetime_value, spending_profiles e
+campaign_response_history uma vez e, a cada nova exportação, recalcula apenas
+as linhas de clientes novos ou alterados (chave: ID / CustomerID).
+
+Colunas que dependem de todas as linhas ou da data atual são recalculadas de
+forma vetorizada sobre o estado guardado, sem reprocessar o dataset:
+  - income_quintile: NTILE(5) OVER (ORDER BY Income DESC), desempate por ID;
+    como no PostgreSQL, Income nulo vem primeiro em DESC (quintil 1);
+  - churn_risk: depende de NOW() no ramo padrão da fórmula.
+
+Layout em disco:
+
+    derived/
+        CURRENT                        versão publicada (trocado com os.replace)
+        .lock                          lock de escrita entre processos (flock)
+        v-000007/
+            _source_state.parquet      estado por cliente (hash, colunas globais, clv_score, parte)
+            customer_lifetime_value.parquet
+            _manifest.json             partes vivas e exportação de origem
+        parts/part-xxxx/
+            spending_profiles.parquet
+            campaign_response_history.parquet
+
+spending_profiles e campaign_response_history só dependem da própria linha:
+cada delta grava uma parte nova, imutável, apenas com as suas linhas, e o
+estado indica em qual parte está a versão vigente de cada cliente. Linhas
+substituídas ou removidas são descartadas na leitura e as partes são
+compactadas quando as linhas mortas superam as vivas. Só o estado e
+customer_lifetime_value (que têm as colunas globais) são regravados a cada
+versão. A versão é montada em uma pasta temporária única e publicada com um
+rename, seguida da troca de CURRENT; a versão anterior é mantida para quem
+ainda a lê.
+
+Uso:
+    python materialization.py ../data/processed/marketing_campaign_atualizado.csv
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+from data_store import DEFAULT_DATA_PATH, ensure_snapshot, load_columns, stored_fingerprint
+
+ACCEPTED_COLUMNS = ['AcceptedCmp1', 'AcceptedCmp2', 'AcceptedCmp3', 'AcceptedCmp4', 'AcceptedCmp5']
+SOURCE_COLUMNS = ['ID', 'Dt_Customer', 'Income', 'Complain', 'Recency',
+                  'MntWines', 'MntFruits', 'MntMeatProducts', 'MntFishProducts', 'MntGoldProds',
+                  'NumDealsPurchases', 'NumStorePurchases', 'NumWebPurchases'] + ACCEPTED_COLUMNS
+
+# Colunas guardadas no estado para recalcular as colunas globais e montar customer_lifetime_value
+STATE_COLUMNS = ['ID', 'row_hash', 'Income', 'Complain', 'Recency', 'Dt_Customer', 'clv_score']
+
+TABLES = ('customer_lifetime_value', 'spending_profiles', 'campaign_response_history')
+TABLE_KEYS = {
+    'customer_lifetime_value': 'CustomerID',
+    'spending_profiles': 'customer_id',
+    'campaign_response_history': 'CustomerID',
+}
+# Tabelas gravadas em partes imutáveis, só com as linhas de cada delta
+PART_TABLES = ('spending_profiles', 'campaign_response_history')
+
+_STATE_FILE = '_source_state.parquet'
+_MANIFEST = '_manifest.json'
+_POINTER = 'CURRENT'
+_LOCK_FILE = '.lock'
+_PARTS_DIR = 'parts'
+# Versões mantidas em disco (a publicada e a anterior, ainda lida por quem começou antes da troca)
+_KEEP_VERSIONS = 2
+# Número de partes a partir do qual as tabelas por linha são compactadas
+_MAX_PARTS = 16
+
+_write_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _derived_lock(derived_dir: str):
+    """
+    Exclusão mútua entre threads e processos que escrevem em `derived_dir`.
+
+    Sem ela, a limpeza de um processo apagaria a parte que outro acabou de
+    gravar e ainda não publicou. O lock de arquivo (flock) não existe no
+    Windows; lá só as threads do mesmo processo ficam protegidas.
+    """
+    with _write_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(derived_dir, _LOCK_FILE), 'a') as arquivo:
+            fcntl.flock(arquivo, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(arquivo, fcntl.LOCK_UN)
+
+
+def default_derived_dir(csv_path: str) -> str:
+    """Pasta das tabelas derivadas, ao lado do CSV processado."""
+    return os.path.join(os.path.dirname(csv_path), 'derived')
+
+
+def _row_hash(df: pd.DataFrame) -> pd.Series:
+    return pd.util.hash_pandas_object(df[SOURCE_COLUMNS], index=False).astype('uint64')
+
+
+def _row_local_tables(df: pd.DataFrame) -> dict:
+    """Colunas que dependem apenas da própria linha (calculadas só para o delta)."""
+    aceites = df[ACCEPTED_COLUMNS].sum(axis=1).astype('int16')
+    compras = np.maximum(df['NumStorePurchases'].astype('int32') + df['NumWebPurchases'], 1)
+
+    return {
+        'customer_lifetime_value': pd.DataFrame({
+            'CustomerID': df['ID'].to_numpy(),
+            'clv_score': (df['MntWines'] * 0.4 + df['MntMeatProducts'] * 0.3
+                          + df['MntGoldProds'] * 0.3).to_numpy(),
+        }),
+        'spending_profiles': pd.DataFrame({
+            'customer_id': df['ID'].to_numpy(),
+            'food_spending': (df['MntFruits'] + df['MntMeatProducts'] + df['MntFishProducts']).to_numpy(),
+            'premium_spending': (df['MntWines'] + df['MntGoldProds']).to_numpy(),
+            'deal_usage_ratio': (df['NumDealsPurchases'] * 1.0 / compras).to_numpy(),
+        }),
+        'campaign_response_history': pd.DataFrame({
+            'CustomerID': df['ID'].to_numpy(),
+            'DtCustomer': df['Dt_Customer'].to_numpy(),
+            'enrollment_year': df['Dt_Customer'].dt.year.to_numpy(),
+            'total_acceptances': aceites.to_numpy(),
+            'engagement_tier': np.select([aceites >= 3, aceites == 0],
+                                         ['Super Responder', 'Não Respondedor'],
+                                         default='Respondedor Ocasional'),
+        }),
+    }
+
+
+def ntile(order: np.ndarray, buckets: int) -> np.ndarray:
+    """
+    Equivalente vetorizado de NTILE(buckets) OVER (ORDER BY ...).
+
+    Parâmetros:
+      - order (np.ndarray): Posição de cada linha na ordenação (0 = primeira).
+      - buckets (int): Número de grupos.
+    """
+    n = len(order)
+    base, resto = divmod(n, buckets)
+    grandes = resto * (base + 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(order < grandes,
+                        order // (base + 1) + 1,
+                        resto + (order - grandes) // max(base, 1) + 1).astype('int8')
+
+
+def _global_columns(state: pd.DataFrame, reference_date: pd.Timestamp) -> pd.DataFrame:
+    """income_quintile e churn_risk recalculados sobre o estado (sem reler os dados)."""
+    # Ordem por Income decrescente com desempate por ID, como um NTILE determinístico;
+    # nulos primeiro, como ORDER BY Income DESC no PostgreSQL
+    renda = state['Income'].to_numpy(dtype=np.float64)
+    ordenacao = np.lexsort((state['ID'].to_numpy(), np.where(np.isnan(renda), -np.inf, -renda)))
+    posicao = np.empty(len(state), dtype=np.int64)
+    posicao[ordenacao] = np.arange(len(state))
+
+    dias = (reference_date - state['Dt_Customer']).dt.days.to_numpy()
+    churn = np.select(
+        [(state['Complain'] == 1) & (state['Recency'] > 60), state['Recency'] > 90],
+        [0.7, 0.5],
+        default=0.1 * (dias / 365)
+    )
+    return pd.DataFrame({
+        'CustomerID': state['ID'].to_numpy(),
+        'clv_score': state['clv_score'].to_numpy(),
+        'churn_risk': churn,
+        'income_quintile': ntile(posicao, 5),
+    })
+
+
+def _version_dir(number: int) -> str:
+    return f"v-{number:06d}"
+
+
+def _current_version(derived_dir: str):
+    """Número, pasta e manifesto da versão publicada (ou None se ainda não há versão)."""
+    try:
+        with open(os.path.join(derived_dir, _POINTER), encoding='utf-8') as arquivo:
+            nome = arquivo.read().strip()
+        pasta = os.path.join(derived_dir, nome)
+        with open(os.path.join(pasta, _MANIFEST), encoding='utf-8') as arquivo:
+            manifesto = json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+    return manifesto['versao'], pasta, manifesto
+
+
+def _empty_tables() -> dict:
+    vazio = pd.DataFrame({coluna: pd.Series(dtype='float64') for coluna in SOURCE_COLUMNS})
+    return _row_local_tables(vazio.assign(Dt_Customer=pd.Series(dtype='datetime64[ns]')))
+
+
+def _read_live(derived_dir: str, state: pd.DataFrame, name: str) -> pd.DataFrame:
+    """Linhas vigentes de uma tabela em partes: de cada parte, só os clientes que o estado aponta para ela."""
+    chave = TABLE_KEYS[name]
+    blocos = []
+    for parte, ids in state.groupby('parte', observed=True)['ID']:
+        tabela = pd.read_parquet(os.path.join(derived_dir, _PARTS_DIR, parte, f"{name}.parquet"))
+        blocos.append(tabela[tabela[chave].isin(ids.to_numpy())])
+    if not blocos:
+        return _empty_tables()[name]
+    return pd.concat(blocos, ignore_index=True)
+
+
+def _write_part(derived_dir: str, tables: dict) -> str:
+    pasta = os.path.join(derived_dir, _PARTS_DIR)
+    os.makedirs(pasta, exist_ok=True)
+    parte = tempfile.mkdtemp(prefix='part-', dir=pasta)
+    for nome in PART_TABLES:
+        tables[nome].to_parquet(os.path.join(parte, f"{nome}.parquet"), index=False)
+    return os.path.basename(parte)
+
+
+def _publish(derived_dir: str, number: int, state: pd.DataFrame, clv: pd.DataFrame, manifest: dict):
+    """Grava a versão em uma pasta temporária única, publica com um rename e troca CURRENT."""
+    temporario = tempfile.mkdtemp(prefix='.tmp-', dir=derived_dir)
+    try:
+        state.to_parquet(os.path.join(temporario, _STATE_FILE), index=False)
+        clv.to_parquet(os.path.join(temporario, 'customer_lifetime_value.parquet'), index=False)
+        with open(os.path.join(temporario, _MANIFEST), 'w', encoding='utf-8') as arquivo:
+            json.dump(manifest, arquivo)
+        # Falha se outro processo já publicou este número: a versão dele não é sobrescrita
+        os.rename(temporario, os.path.join(derived_dir, _version_dir(number)))
+    except BaseException:
+        shutil.rmtree(temporario, ignore_errors=True)
+        raise
+
+    with tempfile.NamedTemporaryFile('w', dir=derived_dir, prefix='.tmp-', delete=False, encoding='utf-8') as arquivo:
+        arquivo.write(_version_dir(number))
+    os.replace(arquivo.name, os.path.join(derived_dir, _POINTER))
+    _remove_unused(derived_dir)
+
+
+def _remove_unused(derived_dir: str):
+    """Apaga versões além das mantidas e as partes que nenhuma delas referencia."""
+    versoes = sorted(nome for nome in os.listdir(derived_dir) if nome.startswith('v-'))
+    for nome in versoes[:-_KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(derived_dir, nome), ignore_errors=True)
+    referenciadas = set()
+    for nome in versoes[-_KEEP_VERSIONS:]:
+        try:
+            with open(os.path.join(derived_dir, nome, _MANIFEST), encoding='utf-8') as arquivo:
+                referenciadas.update(json.load(arquivo)['partes'])
+        except (OSError, ValueError):
+            continue
+    pasta = os.path.join(derived_dir, _PARTS_DIR)
+    for parte in os.listdir(pasta) if os.path.isdir(pasta) else []:
+        if parte not in referenciadas:
+            shutil.rmtree(os.path.join(pasta, parte), ignore_errors=True)
+
+
+def _load_state(derived_dir: str):
+    versao = _current_version(derived_dir)
+    if versao is None:
+        return 0, None, None
+    numero, pasta, manifesto = versao
+    return numero, pd.read_parquet(os.path.join(pasta, _STATE_FILE)), manifesto
+
+
+def apply_delta(derived_dir: str, changed: pd.DataFrame, removed_ids=(),
+                reference_date: pd.Timestamp = None, source_version: str = None) -> dict:
+    """
+    Aplica um delta (linhas novas/alteradas e IDs removidos) às tabelas derivadas.
+
+    Apenas as linhas do delta passam pelas fórmulas por linha e são gravadas
+    em spending_profiles e campaign_response_history (uma parte nova, ou
+    nenhuma se o delta só tem remoções). As colunas globais são recalculadas
+    de forma vetorizada a partir do estado, e a nova versão é publicada de uma vez.
+
+    Parâmetros:
+      - derived_dir (str): Pasta das tabelas derivadas.
+      - changed (pd.DataFrame): Linhas novas ou alteradas com SOURCE_COLUMNS.
+      - removed_ids (iterable): IDs de clientes que saíram da base.
+      - reference_date (pd.Timestamp, opcional): Data usada no lugar de NOW().
+      - source_version (str, opcional): Versão da exportação de origem, gravada no manifesto.
+
+    Retorna:
+      - dict: Número de linhas inseridas/atualizadas e removidas.
+    """
+    reference_date = reference_date or pd.Timestamp.now()
+    changed = changed[SOURCE_COLUMNS].assign(row_hash=_row_hash(changed).to_numpy())
+    novas = _row_local_tables(changed)
+    changed = changed.assign(clv_score=novas['customer_lifetime_value']['clv_score'].to_numpy())
+    os.makedirs(derived_dir, exist_ok=True)
+
+    with _derived_lock(derived_dir):
+        numero, state, manifesto = _load_state(derived_dir)
+        if state is None:
+            state, partes = changed.iloc[:0][STATE_COLUMNS].assign(parte=''), {}
+        else:
+            partes = manifesto['partes']
+
+        descartar = np.union1d(changed['ID'].to_numpy(), np.asarray(list(removed_ids), dtype=np.int64))
+        state = state[~state['ID'].isin(descartar)]
+        vivas = set(state['parte'].unique())
+        partes = {parte: linhas for parte, linhas in partes.items() if parte in vivas}
+
+        # Compacta quando há partes demais ou mais linhas mortas que vivas:
+        # as linhas vigentes e as do delta vão juntas para uma parte nova
+        compactar = len(partes) >= _MAX_PARTS or sum(partes.values()) + len(changed) > 2 * (len(state) + len(changed))
+        if compactar:
+            linhas = {nome: pd.concat([_read_live(derived_dir, state, nome), novas[nome]], ignore_index=True)
+                      for nome in PART_TABLES}
+        else:
+            linhas = {nome: novas[nome] for nome in PART_TABLES}
+        total = len(linhas[PART_TABLES[0]])
+        parte = _write_part(derived_dir, linhas) if total else None
+        if compactar:
+            state, partes = state.assign(parte=parte), {}
+        if parte is not None:
+            partes[parte] = total
+
+        state = pd.concat([state, changed[STATE_COLUMNS].assign(parte=parte)], ignore_index=True)
+        state['parte'] = state['parte'].astype('category')
+        manifesto = {
+            'versao': numero + 1,
+            'partes': partes,
+            'linhas': len(state),
+            'origem': source_version,
+            'referencia': reference_date.isoformat(),
+        }
+        _publish(derived_dir, numero + 1, state, _global_columns(state, reference_date), manifesto)
+    return {'atualizadas': len(changed), 'removidas': int(np.isin(descartar, changed['ID'], invert=True).sum())}
+
+
+def refresh(csv_path: str = DEFAULT_DATA_PATH, derived_dir: str = None,
+            reference_date: pd.Timestamp = None) -> dict:
+    """
+    Atualiza as tabelas derivadas a partir de uma exportação completa.
+
+    Compara um hash por linha com o estado anterior e aplica somente as
+    linhas novas, alteradas ou removidas. Na primeira execução, constrói tudo.
+    Se a exportação e o dia de referência são os da versão publicada, nada é
+    lido nem regravado.
+
+    Retorna:
+      - dict: Contagens de linhas novas, alteradas, removidas e inalteradas.
+    """
+    derived_dir = derived_dir or default_derived_dir(csv_path)
+    reference_date = reference_date or pd.Timestamp.now()
+    origem = stored_fingerprint(ensure_snapshot(csv_path))
+    publicada = _current_version(derived_dir)
+    if publicada is not None:
+        manifesto = publicada[2]
+        if (manifesto.get('origem') == origem
+                and pd.Timestamp(manifesto['referencia']).normalize() == reference_date.normalize()):
+            return {'novas': 0, 'alteradas': 0, 'removidas': 0, 'inalteradas': manifesto['linhas']}
+
+    dados = load_columns(csv_path, SOURCE_COLUMNS)
+    if publicada is None:
+        apply_delta(derived_dir, dados, reference_date=reference_date, source_version=origem)
+        return {'novas': len(dados), 'alteradas': 0, 'removidas': 0, 'inalteradas': 0}
+
+    state = pd.read_parquet(os.path.join(publicada[1], _STATE_FILE), columns=['ID', 'row_hash'])
+    hashes = _row_hash(dados)
+    anterior = pd.Series(state['row_hash'].to_numpy(), index=state['ID'].to_numpy())
+    hash_anterior = anterior.reindex(dados['ID'].to_numpy()).to_numpy()
+    existentes = dados['ID'].isin(anterior.index).to_numpy()
+    alteradas = existentes & (hash_anterior != hashes.to_numpy())
+    novas = ~existentes
+    removidas = np.setdiff1d(anterior.index.to_numpy(), dados['ID'].to_numpy())
+
+    apply_delta(derived_dir, dados[novas | alteradas], removidas, reference_date, origem)
+    return {
+        'novas': int(novas.sum()),
+        'alteradas': int(alteradas.sum()),
+        'removidas': len(removidas),
+        'inalteradas': int(existentes.sum() - alteradas.sum()),
+    }
+
+
+def load_table(name: str, csv_path: str = DEFAULT_DATA_PATH, derived_dir: str = None) -> pd.DataFrame:
+    """
+    Lê uma das tabelas materializadas, na versão publicada.
+
+    As linhas não têm ordem garantida (como uma tabela SQL lida sem ORDER BY).
+    """
+    if name not in TABLES:
+        raise ValueError(f"Tabela '{name}' desconhecida. Use uma de {TABLES}.")
+    derived_dir = derived_dir or default_derived_dir(csv_path)
+    publicada = _current_version(derived_dir)
+    if publicada is None:
+        raise FileNotFoundError(f"Nenhuma versão das tabelas derivadas publicada em '{derived_dir}'.")
+    pasta = publicada[1]
+    if name not in PART_TABLES:
+        return pd.read_parquet(os.path.join(pasta, f"{name}.parquet"))
+    return _read_live(derived_dir, pd.read_parquet(os.path.join(pasta, _STATE_FILE), columns=['ID', 'parte']), name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Atualiza as tabelas derivadas de forma incremental.")
+    parser.add_argument('csv_path', nargs='?', default=DEFAULT_DATA_PATH, help="CSV processado")
+    parser.add_argument('--destino', default=None, help="Pasta das tabelas derivadas")
+    args = parser.parse_args()
+
+    resumo = refresh(args.csv_path, args.destino)
+    print("Tabelas derivadas atualizadas: " + ", ".join(f"{chave}={valor}" for chave, valor in resumo.items()))
+
+
+if __name__ == "__main__":
+    main()
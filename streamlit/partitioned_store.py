@@ -0,0 +1,333 @@
+"""
+Dataset particionado em disco, no modelo de sql/optimization_examples.
+
+Grava o dataset processado em Parquet com diretórios no estilo Hive:
+
+    <csv sem extensão>_particionado/
+        CURRENT                              versão mais recente (trocado com os.replace)
+        v-<impressão digital do CSV>/
+            enrollment_year=2013/deal_usage_ratio_group=High/part-0.parquet
+            ...
+            _manifest.json
+
+  - enrollment_year: ano de Dt_Customer (índice de analise_temporal.sql);
+  - deal_usage_ratio_group: High/Medium/Low pela média ± desvio padrão de
+    NumDealsPurchases (partições de comportamento_de_compra.sql).
+
+Dentro de cada partição as linhas são ordenadas por Income e divididas em
+row groups, cada um com estatísticas de mínimo/máximo no próprio Parquet. O
+manifesto guarda, por partição, o número de linhas e o mínimo/máximo de
+Income, Year_Birth e Recency. A leitura descarta primeiro as partições (pelo
+caminho e pelo manifesto) e depois os row groups (pelas estatísticas) que não
+cruzam os filtros, então recortes estreitos leem só uma fração dos bytes.
+
+Cada versão do CSV ganha o seu próprio diretório, montado em uma pasta
+temporária única e publicado com um rename; o ponteiro CURRENT é trocado em
+seguida. Leitores pedem a versão que querem (a publicada pelo refresher) e
+nunca veem um diretório ausente ou misturado. A regravação só acontece em
+`ensure_partitioned`, sob um lock, e a versão anterior é mantida para
+sessões que ainda a leem.
+
+Uso:
+    python partitioned_store.py ../data/processed/marketing_campaign_atualizado.csv
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_store import DEFAULT_DATA_PATH, SharedDataset, csv_fingerprint
+
+PARTITION_COLUMNS = ['enrollment_year', 'deal_usage_ratio_group']
+DEAL_GROUPS = ('High', 'Medium', 'Low')
+STAT_COLUMNS = ['Income', 'Year_Birth', 'Recency']
+SORT_COLUMN = 'Income'
+ROW_GROUP_SIZE = 16_384
+
+# Origem das linhas filtradas nos dashboards: snapshot mapeado em memória ou dataset particionado
+STORAGES = ('snapshot', 'particionado')
+
+_MANIFEST = '_manifest.json'
+_POINTER = 'CURRENT'
+# Versões mantidas em disco (a publicada e a anterior, ainda lida por sessões em andamento)
+_KEEP_VERSIONS = 2
+
+_write_lock = threading.Lock()
+
+
+def get_storage(dashboard: str) -> str:
+    """Origem dos dados configurada para um dashboard (MARKETING_STORAGE_<DASHBOARD> ou MARKETING_STORAGE)."""
+    storage = os.environ.get(f"MARKETING_STORAGE_{dashboard.upper()}",
+                             os.environ.get('MARKETING_STORAGE', 'snapshot'))
+    if storage not in STORAGES:
+        raise ValueError(f"Origem de dados inválida: '{storage}'. Use uma de {STORAGES}.")
+    return storage
+
+
+def partitioned_path(csv_path: str) -> str:
+    """Pasta do dataset particionado, ao lado do CSV."""
+    return os.path.splitext(csv_path)[0] + '_particionado'
+
+
+def _version_dir(fingerprint: str) -> str:
+    return f"v-{fingerprint}"
+
+
+def deal_usage_groups(deals: pd.Series) -> np.ndarray:
+    """
+    Grupo de uso de descontos (deal_usage_ratio_group) de cada cliente.
+
+    'High' acima de média + desvio padrão, 'Low' abaixo de média − desvio
+    padrão e 'Medium' no restante, como em comportamento_de_compra.sql.
+    """
+    media, desvio = deals.mean(), deals.std()
+    return np.select([deals > media + desvio, deals < media - desvio], ['High', 'Low'], default='Medium')
+
+
+def _stat_range(valores: pd.Series) -> list:
+    valores = valores.dropna()
+    if valores.empty:
+        return [None, None]
+    return [float(valores.min()), float(valores.max())]
+
+
+def write_partitioned(csv_path: str = DEFAULT_DATA_PATH, destination: str = None,
+                      row_group_size: int = ROW_GROUP_SIZE) -> dict:
+    """
+    Grava uma nova versão do dataset particionado a partir do snapshot tipado.
+
+    A versão é montada em uma pasta temporária única (várias threads ou
+    processos podem gravar ao mesmo tempo), publicada com um rename para
+    `v-<impressão digital>` e só então apontada em CURRENT (os.replace).
+
+    Retorna:
+      - dict: Manifesto gravado (versão do CSV e estatísticas de cada partição).
+    """
+    destino = destination or partitioned_path(csv_path)
+    os.makedirs(destino, exist_ok=True)
+    # Impressão digital do snapshot efetivamente lido (o CSV pode mudar durante a gravação)
+    dataset = SharedDataset(csv_path)
+    fingerprint = dataset.version
+    df = dataset.table.to_pandas()
+    chaves = pd.DataFrame({
+        'enrollment_year': df['Dt_Customer'].dt.year,
+        'deal_usage_ratio_group': deal_usage_groups(df['NumDealsPurchases']),
+    })
+
+    temporario = tempfile.mkdtemp(prefix='.tmp-', dir=destino)
+    try:
+        particoes = []
+        for (ano, grupo), posicoes in chaves.groupby(PARTITION_COLUMNS, dropna=True).indices.items():
+            relativo = os.path.join(f"enrollment_year={int(ano)}", f"deal_usage_ratio_group={grupo}")
+            os.makedirs(os.path.join(temporario, relativo))
+            particao = df.iloc[posicoes].sort_values(SORT_COLUMN, ignore_index=True)
+            arquivo = os.path.join(relativo, 'part-0.parquet')
+            pq.write_table(pa.Table.from_pandas(particao, preserve_index=False),
+                           os.path.join(temporario, arquivo), row_group_size=row_group_size)
+            particoes.append({
+                'enrollment_year': int(ano),
+                'deal_usage_ratio_group': grupo,
+                'arquivo': arquivo,
+                'linhas': len(particao),
+                'estatisticas': {coluna: _stat_range(particao[coluna]) for coluna in STAT_COLUMNS
+                                 if coluna in particao.columns},
+            })
+
+        manifesto = {'fingerprint': fingerprint, 'particoes': particoes}
+        with open(os.path.join(temporario, _MANIFEST), 'w', encoding='utf-8') as arquivo:
+            json.dump(manifesto, arquivo)
+
+        versao = os.path.join(destino, _version_dir(fingerprint))
+        if os.path.isdir(versao):
+            # Mesma versão já publicada por outro processo: o conteúdo é o mesmo
+            shutil.rmtree(temporario)
+        else:
+            os.rename(temporario, versao)
+    except BaseException:
+        shutil.rmtree(temporario, ignore_errors=True)
+        raise
+
+    ponteiro = os.path.join(destino, _POINTER)
+    with tempfile.NamedTemporaryFile('w', dir=destino, prefix='.tmp-', delete=False, encoding='utf-8') as arquivo:
+        arquivo.write(_version_dir(fingerprint))
+    os.replace(arquivo.name, ponteiro)
+    _remove_old_versions(destino, _version_dir(fingerprint))
+    return manifesto
+
+
+def _remove_old_versions(destino: str, atual: str):
+    versoes = [nome for nome in os.listdir(destino) if nome.startswith('v-') and nome != atual]
+    versoes.sort(key=lambda nome: os.path.getmtime(os.path.join(destino, nome)), reverse=True)
+    for nome in versoes[_KEEP_VERSIONS - 1:]:
+        shutil.rmtree(os.path.join(destino, nome), ignore_errors=True)
+
+
+def read_manifest(csv_path: str = DEFAULT_DATA_PATH, version: str = None):
+    """
+    Manifesto de uma versão do dataset particionado.
+
+    Parâmetros:
+      - csv_path (str): Caminho do CSV processado.
+      - version (str, opcional): Impressão digital do CSV; se None, a versão apontada em CURRENT.
+
+    Retorna:
+      - dict: Manifesto, ou None se a versão ainda não foi gravada.
+    """
+    pasta = partitioned_path(csv_path)
+    try:
+        if version is None:
+            with open(os.path.join(pasta, _POINTER), encoding='utf-8') as arquivo:
+                diretorio = arquivo.read().strip()
+        else:
+            diretorio = _version_dir(version)
+        with open(os.path.join(pasta, diretorio, _MANIFEST), encoding='utf-8') as arquivo:
+            manifesto = json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+    manifesto['diretorio'] = os.path.join(pasta, diretorio)
+    return manifesto
+
+
+def ensure_partitioned(csv_path: str = DEFAULT_DATA_PATH) -> dict:
+    """
+    Grava uma nova versão apenas se o CSV mudou desde a última gravação.
+
+    Chamado fora do caminho das requisições (aquecedor do refresher); o lock
+    evita que duas threads do processo regravem a mesma versão ao mesmo tempo.
+    """
+    with _write_lock:
+        manifesto = read_manifest(csv_path)
+        if manifesto is None or manifesto.get('fingerprint') != csv_fingerprint(csv_path):
+            write_partitioned(csv_path)
+            manifesto = read_manifest(csv_path)
+        return manifesto
+
+
+def _overlaps(minimo, maximo, faixa) -> bool:
+    # Sem estatísticas (coluna toda nula ou ausente) não dá para descartar
+    if minimo is None or maximo is None:
+        return True
+    return maximo >= faixa[0] and minimo <= faixa[1]
+
+
+def _with_partition_columns(tabela: pa.Table, particao: dict) -> pa.Table:
+    """Acrescenta as colunas de partição (guardadas apenas no caminho) à tabela lida."""
+    n = tabela.num_rows
+    tabela = tabela.append_column('enrollment_year', pa.array(np.full(n, particao['enrollment_year'], dtype=np.int16)))
+    return tabela.append_column('deal_usage_ratio_group', pa.array([particao['deal_usage_ratio_group']] * n, pa.string()))
+
+
+def load_partitioned(csv_path: str = DEFAULT_DATA_PATH, columns: list = None, years: tuple = None,
+                     deal_groups=None, ranges: dict = None, equals: dict = None, version: str = None) -> tuple:
+    """
+    Lê apenas as partições e row groups que cruzam os filtros.
+
+    Parâmetros:
+      - csv_path (str): Caminho do CSV processado.
+      - columns (list, opcional): Colunas desejadas (podem incluir as de partição). Se None, todas.
+      - years (tuple, opcional): (ano inicial, ano final) de cadastro, inclusivo.
+      - deal_groups (iterable, opcional): Grupos de uso de descontos ('High', 'Medium', 'Low').
+      - ranges (dict, opcional): Coluna -> (mínimo, máximo), inclusivo. Usa o manifesto
+        (colunas de STAT_COLUMNS) e as estatísticas dos row groups (qualquer coluna).
+      - equals (dict, opcional): Coluna -> valor; aplicado apenas às linhas lidas.
+      - version (str, opcional): Impressão digital do CSV a ler (a versão publicada pelo
+        refresher). Sem ela, garante a versão do CSV atual (pode regravar o dataset).
+
+    Retorna:
+      - tuple: (DataFrame com as linhas que atendem aos filtros, resumo com partições,
+        row groups e bytes lidos em relação ao total das colunas pedidas).
+
+    Levanta:
+      - ValueError: Se a versão pedida ainda não foi gravada.
+    """
+    manifesto = ensure_partitioned(csv_path) if version is None else read_manifest(csv_path, version)
+    if manifesto is None:
+        raise ValueError(f"Dataset particionado da versão '{version}' ainda não foi gravado.")
+    pasta = manifesto['diretorio']
+    ranges = ranges or {}
+    equals = equals or {}
+
+    resumo = {'particoes': 0, 'particoes_total': len(manifesto['particoes']),
+              'row_groups': 0, 'row_groups_total': 0, 'bytes_lidos': 0, 'bytes_total': 0}
+    tabelas, vazia = [], None
+    for particao in manifesto['particoes']:
+        arquivo = pq.ParquetFile(os.path.join(pasta, particao['arquivo']))
+        metadados = arquivo.metadata
+        nomes = arquivo.schema_arrow.names
+        # As colunas filtradas também são lidas, para o filtro exato linha a linha
+        leitura = [c for c in (columns or nomes) if c in nomes]
+        leitura += [c for c in dict.fromkeys(list(ranges) + list(equals)) if c in nomes and c not in leitura]
+        indices_colunas = [nomes.index(c) for c in leitura]
+
+        def tamanho(i):
+            grupo = metadados.row_group(i)
+            return sum(grupo.column(j).total_compressed_size for j in indices_colunas)
+
+        resumo['row_groups_total'] += metadados.num_row_groups
+        resumo['bytes_total'] += sum(tamanho(i) for i in range(metadados.num_row_groups))
+        if vazia is None:
+            vazia = _with_partition_columns(arquivo.schema_arrow.empty_table().select(leitura), particao)
+
+        # 1. Poda de partições: caminho (ano, grupo) e estatísticas do manifesto
+        if years is not None and not years[0] <= particao['enrollment_year'] <= years[1]:
+            continue
+        if deal_groups is not None and particao['deal_usage_ratio_group'] not in deal_groups:
+            continue
+        if not all(_overlaps(*particao['estatisticas'][c], faixa)
+                   for c, faixa in ranges.items() if c in particao['estatisticas']):
+            continue
+
+        # 2. Poda de row groups: mínimo/máximo gravados no Parquet
+        grupos = []
+        for i in range(metadados.num_row_groups):
+            manter = True
+            for coluna, faixa in ranges.items():
+                if coluna not in nomes:
+                    continue
+                estatisticas = metadados.row_group(i).column(nomes.index(coluna)).statistics
+                if estatisticas is not None and estatisticas.has_min_max:
+                    manter &= _overlaps(estatisticas.min, estatisticas.max, faixa)
+            if manter:
+                grupos.append(i)
+        if not grupos:
+            continue
+
+        resumo['particoes'] += 1
+        resumo['row_groups'] += len(grupos)
+        resumo['bytes_lidos'] += sum(tamanho(i) for i in grupos)
+        tabelas.append(_with_partition_columns(arquivo.read_row_groups(grupos, columns=leitura), particao))
+
+    # Categorias diferentes entre partições são unificadas na conversão para pandas
+    df = pa.concat_tables(tabelas or [vazia]).to_pandas()
+    df['deal_usage_ratio_group'] = df['deal_usage_ratio_group'].astype(pd.CategoricalDtype(DEAL_GROUPS))
+
+    # 3. Filtro exato das linhas lidas
+    mascara = np.ones(len(df), dtype=bool)
+    for coluna, faixa in ranges.items():
+        mascara &= df[coluna].between(faixa[0], faixa[1]).to_numpy()
+    for coluna, valor in equals.items():
+        mascara &= (df[coluna] == valor).to_numpy()
+    df = df[mascara].reset_index(drop=True)
+    return df[[c for c in (columns or df.columns) if c in df.columns]], resumo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grava o dataset particionado por ano de cadastro e uso de descontos.")
+    parser.add_argument('csv_path', nargs='?', default=DEFAULT_DATA_PATH, help="CSV processado")
+    args = parser.parse_args()
+
+    manifesto = ensure_partitioned(args.csv_path)
+    print(f"{len(manifesto['particoes'])} partições em '{manifesto['diretorio']}'")
+    for particao in manifesto['particoes']:
+        print(f"  - {particao['arquivo']}: {particao['linhas']} linhas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Agregação no servidor para gráficos com muitos pontos.
+
+Em vez de enviar todas as linhas ao navegador, os box plots recebem apenas
+quartis, limites e uma amostra limitada de outliers, e o gráfico de dispersão
+recebe uma amostra estratificada ou uma grade de densidade 2D. O tamanho do
+payload fica limitado independentemente do número de clientes.
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+
+def box_statistics(keys, values, max_outliers: int = 100) -> pd.DataFrame:
+    """
+    Calcula as estatísticas de box plot (método de Tukey) para cada grupo.
+
+    Parâmetros:
+      - keys (array-like): Grupo de cada linha.
+      - values (array-like): Valores numéricos.
+      - max_outliers (int): Máximo de outliers enviados por grupo; acima disso,
+        os outliers são subamostrados de forma uniforme incluindo os extremos.
+
+    Retorna:
+      - pd.DataFrame: Uma linha por grupo com q1, mediana, q3, limites e outliers.
+    """
+    keys = pd.Series(keys)
+    codigos, grupos = pd.factorize(keys, sort=True)
+    valores = np.asarray(values, dtype=np.float64)
+    validos = (codigos >= 0) & ~np.isnan(valores)
+    codigos = codigos[validos]
+    valores = valores[validos]
+
+    # Ordena por grupo e valor uma única vez; cada grupo vira uma fatia contígua
+    ordem = np.lexsort((valores, codigos))
+    valores = valores[ordem]
+    limites = np.searchsorted(codigos[ordem], np.arange(len(grupos) + 1))
+
+    linhas = []
+    for i, grupo in enumerate(np.asarray(grupos)):
+        fatia = valores[limites[i]:limites[i + 1]]
+        if len(fatia) == 0:
+            continue
+        q1, mediana, q3 = np.quantile(fatia, [0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        # Bigodes vão até o valor observado mais extremo dentro de 1.5 * IQR
+        inferior = fatia[np.searchsorted(fatia, q1 - 1.5 * iqr, side='left')]
+        superior = fatia[np.searchsorted(fatia, q3 + 1.5 * iqr, side='right') - 1]
+        outliers = np.concatenate([fatia[fatia < inferior], fatia[fatia > superior]])
+        if len(outliers) > max_outliers:
+            outliers = np.sort(outliers)[np.linspace(0, len(outliers) - 1, max_outliers).astype(int)]
+        linhas.append({
+            'grupo': grupo,
+            'n': len(fatia),
+            'q1': q1,
+            'median': mediana,
+            'q3': q3,
+            'lowerfence': inferior,
+            'upperfence': superior,
+            'outliers': outliers,
+        })
+
+    return pd.DataFrame(linhas, columns=['grupo', 'n', 'q1', 'median', 'q3',
+                                         'lowerfence', 'upperfence', 'outliers'])
+
+
+def box_figure(stats: pd.DataFrame, title: str, x_label: str, y_label: str,
+               colors: list) -> go.Figure:
+    """
+    Monta um box plot a partir de estatísticas pré-calculadas (`box_statistics`).
+    """
+    fig = go.Figure()
+    for i, linha in enumerate(stats.itertuples(index=False)):
+        cor = colors[i % len(colors)]
+        fig.add_trace(go.Box(
+            name=str(linha.grupo),
+            x=[linha.grupo],
+            q1=[linha.q1],
+            median=[linha.median],
+            q3=[linha.q3],
+            lowerfence=[linha.lowerfence],
+            upperfence=[linha.upperfence],
+            marker_color=cor,
+            legendgroup=str(linha.grupo),
+        ))
+        if len(linha.outliers):
+            fig.add_trace(go.Scatter(
+                x=[linha.grupo] * len(linha.outliers),
+                y=linha.outliers,
+                mode='markers',
+                marker=dict(color=cor, size=4),
+                legendgroup=str(linha.grupo),
+                showlegend=False,
+                name=str(linha.grupo),
+            ))
+
+    fig.update_layout(title=title, xaxis_title=x_label, yaxis_title=y_label,
+                      legend_title_text=x_label)
+    return fig
+
+
+def stratified_sample(df: pd.DataFrame, group_column: str, max_points: int,
+                      seed: int = 0) -> pd.DataFrame:
+    """
+    Amostra estratificada por grupo com no máximo `max_points` linhas.
+
+    Cada grupo recebe uma cota proporcional ao seu tamanho (mínimo de uma
+    linha), preservando a composição visual do gráfico original.
+    """
+    if len(df) <= max_points:
+        return df
+    grupos = df[group_column].astype('category')
+    codigos = grupos.cat.codes.to_numpy()
+    tamanhos = np.bincount(codigos[codigos >= 0], minlength=len(grupos.cat.categories))
+    cotas = np.maximum(tamanhos * max_points // len(df), 1)
+    rng = np.random.default_rng(seed)
+
+    selecionadas = []
+    for codigo, cota in enumerate(cotas):
+        posicoes = np.flatnonzero(codigos == codigo)
+        selecionadas.append(rng.choice(posicoes, size=min(cota, len(posicoes)), replace=False))
+    return df.iloc[np.sort(np.concatenate(selecionadas))]
+
+
+def density_figure(x, y, title: str, x_label: str, y_label: str,
+                   bins: int = 60, colorscale: str = 'Reds') -> go.Figure:
+    """
+    Densidade 2D (grade bins × bins) no lugar de um gráfico de dispersão bruto.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    validos = ~(np.isnan(x) | np.isnan(y))
+    contagens, bordas_x, bordas_y = np.histogram2d(x[validos], y[validos], bins=bins)
+
+    fig = go.Figure(go.Heatmap(
+        x=(bordas_x[:-1] + bordas_x[1:]) / 2,
+        y=(bordas_y[:-1] + bordas_y[1:]) / 2,
+        z=np.where(contagens.T > 0, contagens.T, np.nan),
+        colorscale=colorscale,
+        colorbar=dict(title='Clientes'),
+    ))
+    fig.update_layout(title=title, xaxis_title=x_label, yaxis_title=y_label)
+    return fig
@@ -0,0 +1,315 @@
+"""
+Esboços de quantis (KLL) por grupo para box plots e percentis.
+
+Um esboço KLL guarda poucas centenas de valores em níveis de peso 2^h e
+responde a qualquer quantil com erro de rank limitado (≈1,7/k; cerca de 1%
+com k=200), usando memória que não depende do número de linhas. Esboços
+construídos em blocos ou partições diferentes podem ser mesclados, e o
+resultado tem a mesma garantia de erro.
+
+Os esboços de cada estado civil para a renda e todas as colunas Mnt* são
+construídos em blocos a partir do snapshot Arrow e gravados ao lado dele
+(`<csv>.sketches.json`); são refeitos apenas quando o CSV muda.
+
+Uso:
+    python quantile_sketch.py
+    python quantile_sketch.py ../data/processed/marketing_campaign_atualizado.csv --k 400
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+from data_store import DEFAULT_DATA_PATH, csv_fingerprint, ensure_snapshot
+
+DEFAULT_K = 200
+GROUP_COLUMN = 'Marital_Status'
+SKETCH_COLUMNS = ['Income', 'MntWines', 'MntFruits', 'MntMeatProducts',
+                  'MntFishProducts', 'MntSweetProducts', 'MntGoldProds']
+PERCENTILES = (0.05, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99)
+
+
+class KLLSketch:
+    """
+    Esboço de quantis KLL mesclável.
+
+    Parâmetros:
+      - k (int): Capacidade do nível mais alto; controla o erro (≈1,7/k).
+      - seed (int): Semente da escolha dos itens mantidos em cada compactação.
+    """
+
+    def __init__(self, k: int = DEFAULT_K, seed: int = 0):
+        self.k = k
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        # Níveis mais baixos (itens de menor peso) guardam menos itens
+        return max(int(np.ceil(self.k * (2 / 3) ** (len(self.levels) - 1 - level))), 2)
+
+    def _compress(self):
+        compactou = True
+        while compactou:
+            compactou = False
+            for h in range(len(self.levels)):
+                nivel = self.levels[h]
+                if len(nivel) <= self._capacity(h):
+                    continue
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                # Ordena o nível e promove metade dos itens (alternados) com o dobro do peso;
+                # com quantidade ímpar, o menor item fica no nível atual
+                nivel = np.sort(nivel)
+                impar = len(nivel) % 2
+                promovidos = nivel[impar + self._rng.integers(2)::2]
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promovidos])
+                self.levels[h] = nivel[:impar]
+                compactou = True
+
+    def update(self, values) -> 'KLLSketch':
+        """Acrescenta valores ao esboço (valores nulos são ignorados)."""
+        valores = np.asarray(values, dtype=np.float64)
+        valores = valores[~np.isnan(valores)]
+        if len(valores) == 0:
+            return self
+        self.n += len(valores)
+        self.min = min(self.min, float(valores.min()))
+        self.max = max(self.max, float(valores.max()))
+        self.levels[0] = np.concatenate([self.levels[0], valores])
+        self._compress()
+        return self
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """Incorpora outro esboço (de outro bloco ou partição) a este."""
+        if other.k != self.k:
+            raise ValueError(f"Esboços com k diferentes não podem ser mesclados ({self.k} e {other.k}).")
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, nivel in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], nivel])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def items(self) -> tuple:
+        """Itens guardados, em ordem crescente, e o peso de cada um."""
+        valores = np.concatenate(self.levels)
+        pesos = np.concatenate([np.full(len(nivel), 2 ** h, dtype=np.int64) for h, nivel in enumerate(self.levels)])
+        ordem = np.argsort(valores, kind='stable')
+        return valores[ordem], pesos[ordem]
+
+    def quantile(self, q):
+        """
+        Quantil(is) aproximado(s); q=0 e q=1 devolvem o mínimo e o máximo exatos.
+
+        Retorna:
+          - float ou np.ndarray: Um valor para cada q (NaN se o esboço estiver vazio).
+        """
+        qs = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        if self.n == 0:
+            resultado = np.full(len(qs), np.nan)
+        else:
+            valores, pesos = self.items()
+            acumulado = np.cumsum(pesos)
+            posicoes = np.searchsorted(acumulado, qs * acumulado[-1], side='left')
+            resultado = valores[np.minimum(posicoes, len(valores) - 1)]
+            resultado = np.where(qs <= 0, self.min, np.where(qs >= 1, self.max, resultado))
+        return float(resultado[0]) if np.ndim(q) == 0 else resultado
+
+    def to_dict(self) -> dict:
+        return {'k': self.k, 'n': self.n, 'min': self.min, 'max': self.max,
+                'levels': [nivel.tolist() for nivel in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'KLLSketch':
+        esboco = cls(data['k'])
+        esboco.n = data['n']
+        esboco.min = data['min']
+        esboco.max = data['max']
+        esboco.levels = [np.asarray(nivel, dtype=np.float64) for nivel in data['levels']]
+        return esboco
+
+
+def update_group_sketches(sketches: dict, chunk: pd.DataFrame, group_column: str = GROUP_COLUMN,
+                          k: int = DEFAULT_K) -> dict:
+    """
+    Atualiza, no lugar, os esboços de cada coluna e grupo com um bloco de linhas.
+
+    Parâmetros:
+      - sketches (dict): Coluna -> {grupo -> KLLSketch}; as colunas do dict são as atualizadas.
+      - chunk (pd.DataFrame): Bloco com a coluna de grupo e as colunas de valores.
+      - group_column (str): Coluna que define os grupos.
+      - k (int): Parâmetro dos esboços criados para grupos novos.
+
+    Retorna:
+      - dict: O próprio `sketches`.
+    """
+    posicoes = chunk.groupby(group_column, observed=True, sort=False).indices
+    for coluna, por_grupo in sketches.items():
+        valores = chunk[coluna].to_numpy(dtype=np.float64, na_value=np.nan)
+        for grupo, linhas in posicoes.items():
+            por_grupo.setdefault(str(grupo), KLLSketch(k)).update(valores[linhas])
+    return sketches
+
+
+def build_group_sketches(chunks, value_columns=SKETCH_COLUMNS, group_column: str = GROUP_COLUMN,
+                         k: int = DEFAULT_K) -> dict:
+    """
+    Constrói os esboços por grupo percorrendo uma sequência de blocos.
+
+    Retorna:
+      - dict: Coluna -> {grupo -> KLLSketch}.
+    """
+    esbocos = {coluna: {} for coluna in value_columns}
+    for bloco in chunks:
+        update_group_sketches(esbocos, bloco, group_column, k)
+    return esbocos
+
+
+def merge_group_sketches(left: dict, right: dict) -> dict:
+    """Mescla os esboços de `right` em `left` (coluna a coluna, grupo a grupo)."""
+    for coluna, por_grupo in right.items():
+        destino = left.setdefault(coluna, {})
+        for grupo, esboco in por_grupo.items():
+            if grupo in destino:
+                destino[grupo].merge(esboco)
+            else:
+                destino[grupo] = KLLSketch.from_dict(esboco.to_dict())
+    return left
+
+
+def sketches_path(csv_path: str) -> str:
+    """Caminho dos esboços gravados ao lado do CSV e do snapshot."""
+    return os.path.splitext(csv_path)[0] + '.sketches.json'
+
+
+def save_sketches(sketches: dict, path: str, fingerprint: str, k: int = DEFAULT_K):
+    """Grava os esboços em JSON (escrita atômica)."""
+    conteudo = {
+        'fingerprint': fingerprint,
+        'k': k,
+        'sketches': {coluna: {grupo: esboco.to_dict() for grupo, esboco in por_grupo.items()}
+                     for coluna, por_grupo in sketches.items()},
+    }
+    temporario = f"{path}.{os.getpid()}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(conteudo, arquivo)
+    os.replace(temporario, path)
+
+
+def _read_sketches(path: str):
+    try:
+        with open(path, encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+
+def ensure_sketches(csv_path: str = DEFAULT_DATA_PATH, chunk_rows: int = 500_000,
+                    k: int = DEFAULT_K) -> dict:
+    """
+    Carrega os esboços gravados ou os reconstrói se o CSV mudou.
+
+    A reconstrução percorre o snapshot mapeado em memória em blocos de
+    `chunk_rows` linhas, lendo apenas a coluna de grupo e as de valores.
+
+    Retorna:
+      - dict: Coluna -> {grupo -> KLLSketch}.
+    """
+    destino = sketches_path(csv_path)
+    fingerprint = csv_fingerprint(csv_path)
+    gravado = _read_sketches(destino)
+    if gravado is not None and gravado.get('fingerprint') == fingerprint and gravado.get('k') == k:
+        return {coluna: {grupo: KLLSketch.from_dict(dados) for grupo, dados in por_grupo.items()}
+                for coluna, por_grupo in gravado['sketches'].items()}
+
+    tabela = feather.read_table(ensure_snapshot(csv_path), memory_map=True)
+    colunas = [coluna for coluna in SKETCH_COLUMNS if coluna in tabela.schema.names]
+    tabela = tabela.select([GROUP_COLUMN] + colunas)
+    blocos = (tabela.slice(inicio, chunk_rows).to_pandas() for inicio in range(0, tabela.num_rows, chunk_rows))
+    esbocos = build_group_sketches(blocos, colunas, GROUP_COLUMN, k)
+    save_sketches(esbocos, destino, fingerprint, k)
+    return esbocos
+
+
+def sketch_box_statistics(group_sketches: dict, groups=None, max_outliers: int = 100) -> pd.DataFrame:
+    """
+    Estatísticas de box plot (método de Tukey) a partir dos esboços de cada grupo.
+
+    Quartis e mediana vêm dos esboços; os bigodes vão até o item guardado
+    mais extremo dentro de 1.5 * IQR (ou até o mínimo/máximo exatos), e os
+    outliers são os itens guardados fora dos bigodes. O formato é o mesmo de
+    `plot_aggregation.box_statistics`, para uso com `box_figure`.
+
+    Parâmetros:
+      - group_sketches (dict): Grupo -> KLLSketch de uma coluna.
+      - groups (list, opcional): Grupos a incluir. Se None, todos.
+      - max_outliers (int): Máximo de outliers enviados por grupo.
+    """
+    linhas = []
+    for grupo in sorted(group_sketches if groups is None else groups):
+        esboco = group_sketches.get(grupo)
+        if esboco is None or esboco.n == 0:
+            continue
+        q1, mediana, q3 = esboco.quantile([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        valores, _ = esboco.items()
+        limite_inferior, limite_superior = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+        inferior = esboco.min if esboco.min >= limite_inferior else valores[valores >= limite_inferior].min()
+        superior = esboco.max if esboco.max <= limite_superior else valores[valores <= limite_superior].max()
+        outliers = np.unique(np.concatenate([valores[valores < inferior], valores[valores > superior],
+                                             [v for v in (esboco.min, esboco.max) if v < inferior or v > superior]]))
+        if len(outliers) > max_outliers:
+            outliers = outliers[np.linspace(0, len(outliers) - 1, max_outliers).astype(int)]
+        linhas.append({
+            'grupo': grupo,
+            'n': esboco.n,
+            'q1': q1,
+            'median': mediana,
+            'q3': q3,
+            'lowerfence': inferior,
+            'upperfence': superior,
+            'outliers': outliers,
+        })
+
+    return pd.DataFrame(linhas, columns=['grupo', 'n', 'q1', 'median', 'q3',
+                                         'lowerfence', 'upperfence', 'outliers'])
+
+
+def percentile_table(group_sketches: dict, percentiles=PERCENTILES, groups=None) -> pd.DataFrame:
+    """
+    Percentis de cada grupo a partir dos esboços.
+
+    Retorna:
+      - pd.DataFrame: Uma linha por grupo, com a contagem e uma coluna por percentil (p5, p25, ...).
+    """
+    grupos = sorted(group_sketches if groups is None else groups)
+    linhas = {grupo: [group_sketches[grupo].n, *group_sketches[grupo].quantile(percentiles)]
+              for grupo in grupos if grupo in group_sketches}
+    colunas = ['n'] + [f"p{100 * p:g}" for p in percentiles]
+    return pd.DataFrame.from_dict(linhas, orient='index', columns=colunas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Constrói os esboços de quantis por estado civil.")
+    parser.add_argument('csv_path', nargs='?', default=DEFAULT_DATA_PATH, help="CSV processado")
+    parser.add_argument('--k', type=int, default=DEFAULT_K, help="Parâmetro de precisão dos esboços")
+    args = parser.parse_args()
+
+    esbocos = ensure_sketches(args.csv_path, k=args.k)
+    print(f"Esboços em '{sketches_path(args.csv_path)}'")
+    for coluna, por_grupo in esbocos.items():
+        print(f"\n{coluna}:")
+        print(percentile_table(por_grupo).round(1).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Atualização dos dados em segundo plano, com troca atômica de versão.
+
+Uma thread por CSV observa o arquivo (tamanho e data de modificação, por
+polling). Quando um novo CSV é gravado e para de mudar, a thread:
+  1. reconstrói o snapshot tipado (ensure_snapshot, gravado de forma atômica);
+  2. executa os aquecedores registrados pelos dashboards com a versão gravada
+     no snapshot (carregadores com cache, índices e pré-agregados);
+  3. só então publica essa versão, com um número sequencial, se o snapshot
+     não foi trocado de novo durante o aquecimento.
+
+As sessões leem a versão publicada no início de cada rerun e chamam os
+carregadores com ela: como tudo já foi construído para essa versão, nenhuma
+sessão espera a ingestão nem enxerga um dataset montado pela metade. Se a
+reconstrução falhar, a versão anterior continua publicada e o erro fica em
+`status()`. O contrato dos aquecedores está em `SnapshotRefresher.register`.
+
+O intervalo de verificação (s) vem de MARKETING_REFRESH_INTERVAL (padrão 5;
+0 desativa a observação, mantendo apenas a versão inicial).
+"""
+import os
+import threading
+import time
+import traceback
+from collections import namedtuple
+
+from data_store import DEFAULT_DATA_PATH, csv_fingerprint, ensure_snapshot, stored_fingerprint
+
+DEFAULT_INTERVAL_SECONDS = 5.0
+
+# Versão publicada: número sequencial no processo, impressão digital do CSV e horário da troca
+DataVersion = namedtuple('DataVersion', ['number', 'fingerprint', 'published_at'])
+
+_refreshers = {}
+_refreshers_lock = threading.Lock()
+
+
+class SnapshotRefresher:
+    """
+    Observa um CSV e publica novas versões dos dados já aquecidas.
+
+    Parâmetros:
+      - csv_path (str): CSV processado observado.
+      - interval (float): Segundos entre verificações (0 = sem thread de observação).
+    """
+
+    def __init__(self, csv_path: str, interval: float = DEFAULT_INTERVAL_SECONDS):
+        self.csv_path = csv_path
+        self.interval = interval
+        self._warmers = {}
+        self._ready = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pending = None
+        self.last_error = None
+        # A primeira versão é preparada na criação (a ingestão inicial não tem versão anterior)
+        self._version = DataVersion(1, stored_fingerprint(ensure_snapshot(csv_path)), time.time())
+        self._thread = None
+        if interval > 0:
+            self._thread = threading.Thread(target=self._watch, name=f"refresher:{csv_path}", daemon=True)
+            self._thread.start()
+
+    def current(self) -> DataVersion:
+        """Versão publicada (troca atômica: uma única referência)."""
+        return self._version
+
+    def register(self, name: str, warmer):
+        """
+        Registra um aquecedor chamado com a impressão digital de cada nova versão.
+
+        Os dashboards registram aqui os carregadores com cache que recebem a
+        versão como argumento, para que sejam preenchidos antes da publicação.
+        Registrar de novo com o mesmo nome substitui o anterior. No primeiro
+        registro de um nome, o aquecedor também é executado com a versão atual.
+
+        A cada nova versão, o aquecedor roda na thread de observação, fora de
+        uma sessão do Streamlit. Por isso os carregadores que ele chama não
+        usam `st.*`: ficam com `show_spinner=False` e deixam as exceções para
+        quem chama (a sessão exibe o spinner e o `st.error`). Uma exceção no
+        aquecimento mantém a versão anterior publicada e fica em `status()`.
+        """
+        with self._lock:
+            novo = name not in self._ready
+            self._warmers[name] = warmer
+            if novo:
+                self._ready[name] = threading.Event()
+            pronto = self._ready[name]
+        if novo:
+            # A versão inicial é publicada antes de qualquer registro: o primeiro registro
+            # a prepara (uma vez por processo) e os demais esperam essa preparação
+            try:
+                warmer(self._version.fingerprint)
+            finally:
+                pronto.set()
+        else:
+            pronto.wait()
+
+    def check(self) -> bool:
+        """
+        Verifica o CSV uma vez e, se ele mudou e está estável, prepara e publica a nova versão.
+
+        Um CSV só é considerado estável quando a mesma impressão digital é vista
+        em duas verificações seguidas (evita ler um arquivo ainda sendo copiado).
+
+        Retorna:
+          - bool: True se uma nova versão foi publicada.
+        """
+        try:
+            fingerprint = csv_fingerprint(self.csv_path)
+        except OSError:
+            return False
+        if fingerprint == self._version.fingerprint:
+            self._pending = None
+            return False
+        if fingerprint != self._pending:
+            self._pending = fingerprint
+            return False
+        return self._publish(fingerprint)
+
+    def _publish(self, fingerprint: str) -> bool:
+        try:
+            snapshot = ensure_snapshot(self.csv_path)
+            # A versão publicada é a do snapshot construído, não a observada antes da construção
+            construida = stored_fingerprint(snapshot)
+            if construida != fingerprint:
+                # O CSV mudou de novo durante a reconstrução: tenta na próxima verificação
+                return False
+            with self._lock:
+                aquecedores = list(self._warmers.values())
+            for aquecer in aquecedores:
+                aquecer(construida)
+            # Outro processo pode ter trocado o snapshot durante o aquecimento
+            if stored_fingerprint(snapshot) != construida:
+                return False
+        except Exception:
+            self.last_error = traceback.format_exc()
+            return False
+        self.last_error = None
+        self._pending = None
+        self._version = DataVersion(self._version.number + 1, construida, time.time())
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def stop(self):
+        """Encerra a thread de observação."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def status(self) -> dict:
+        """Versão publicada, versão em espera e último erro de reconstrução."""
+        return {
+            'versao': self._version.number,
+            'fingerprint': self._version.fingerprint,
+            'publicada_em': self._version.published_at,
+            'pendente': self._pending,
+            'erro': self.last_error,
+        }
+
+
+def get_refresher(csv_path: str = DEFAULT_DATA_PATH) -> SnapshotRefresher:
+    """Observador único do processo para cada CSV, compartilhado por todas as sessões."""
+    chave = os.path.abspath(csv_path)
+    with _refreshers_lock:
+        if chave not in _refreshers:
+            intervalo = float(os.environ.get('MARKETING_REFRESH_INTERVAL', DEFAULT_INTERVAL_SECONDS))
+            _refreshers[chave] = SnapshotRefresher(csv_path, intervalo)
+        return _refreshers[chave]
+
+
+def current_version(csv_path: str = DEFAULT_DATA_PATH) -> DataVersion:
+    """Versão dos dados publicada para o CSV."""
+    return get_refresher(csv_path).current()
+
+
+def describe(version: DataVersion) -> str:
+    """Texto curto da versão publicada, para exibir nos dashboards."""
+    return f"Versão dos dados: {version.number} (publicada às {time.strftime('%H:%M:%S', time.localtime(version.published_at))})"
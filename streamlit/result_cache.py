@@ -0,0 +1,139 @@
+"""
+Cache de resultados de análise compartilhado entre sessões.
+
+Guarda agregados, estatísticas de teste e figuras serializadas em JSON,
+com chave formada pela assinatura canônica do estado dos filtros e pela
+versão dos dados. A remoção é LRU limitada por tamanho total (em bytes) e
+por tempo de vida (TTL), e o cache expõe contadores de acertos e falhas.
+
+O cache é único por processo do servidor: todas as sessões de um dashboard
+o compartilham. Tamanho e TTL podem ser ajustados por MARKETING_CACHE_MB e
+MARKETING_CACHE_TTL (segundos).
+"""
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+import plotly.io as pio
+
+DEFAULT_MAX_MB = 256
+DEFAULT_TTL_SECONDS = 3600
+
+
+def filter_signature(namespace: str, filters: dict, version: str) -> str:
+    """
+    Assinatura canônica de um estado de filtros.
+
+    Filtros equivalentes (mesmos valores, em qualquer ordem; tuplas ou listas)
+    geram a mesma chave.
+    """
+    canonico = json.dumps({'ns': namespace, 'filtros': filters, 'versao': version},
+                          sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(canonico.encode()).hexdigest()
+
+
+class ResultCache:
+    """LRU limitado por bytes e TTL, seguro para várias sessões (threads)."""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _discard(self, key):
+        _, tamanho, _ = self._entries.pop(key)
+        self._bytes -= tamanho
+
+    def get(self, key, default=None):
+        """Valor em cache (atualiza a posição LRU) ou `default`."""
+        with self._lock:
+            entrada = self._entries.get(key)
+            if entrada is not None and entrada[2] < time.monotonic():
+                self._discard(key)
+                entrada = None
+            if entrada is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entrada[0]
+
+    def put(self, key, value, size: int = None):
+        """Guarda um valor; remove os menos usados até caber em `max_bytes`."""
+        tamanho = size if size is not None else len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        if tamanho > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (value, tamanho, time.monotonic() + self.ttl_seconds)
+            self._bytes += tamanho
+            while self._bytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Retorna o valor em cache ou calcula, guarda e retorna `compute()`."""
+        faltando = object()
+        valor = self.get(key, faltando)
+        if valor is faltando:
+            valor = compute()
+            self.put(key, valor)
+        return valor
+
+    def figure(self, key, build):
+        """
+        Figura Plotly em cache, guardada como JSON serializado.
+
+        Cada acerto devolve uma nova figura reconstruída do JSON, então as
+        sessões não compartilham (nem alteram) o mesmo objeto.
+        """
+        faltando = object()
+        texto = self.get(key, faltando)
+        if texto is faltando:
+            texto = build().to_json()
+            self.put(key, texto, size=len(texto))
+        return pio.from_json(texto)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Contadores de uso do cache."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResultCache:
+    """Cache único do processo, compartilhado por todas as sessões."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(
+                max_bytes=int(float(os.environ.get('MARKETING_CACHE_MB', DEFAULT_MAX_MB)) * 1024 * 1024),
+                ttl_seconds=float(os.environ.get('MARKETING_CACHE_TTL', DEFAULT_TTL_SECONDS)),
+            )
+        return _cache
@@ -0,0 +1,172 @@
+"""
+Esquema das colunas do dataset de campanhas (ver data/info_dataset.txt).
+
+Para cada coluna guarda o tipo mais estreito que comporta os seus valores,
+a faixa de valores válida e a descrição do dicionário de dados:
+  - indicadores 0/1 (AcceptedCmp1..5, Complain, Response): int8;
+  - anos e contagens: int16 (int8 para filhos em casa);
+  - valores gastos: int32;
+  - textos (Education, Marital_Status): category;
+  - Dt_Customer: datetime64.
+
+Os tipos estreitos não avisam quando um valor não cabe (300 vira 44 em
+int8), por isso os valores são validados contra as faixas antes da
+conversão, em `compact`.
+
+Uso (relatório de memória de um CSV):
+    python schema.py ../data/processed/marketing_campaign_atualizado.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Coluna -> tipo compacto, faixa válida (mínimo, máximo; None = limite do tipo) e descrição
+SCHEMA = {
+    'ID': {'tipo': 'int32', 'faixa': (0, None), 'descricao': "identificador do cliente"},
+    'Year_Birth': {'tipo': 'int16', 'faixa': (1880, 2030), 'descricao': "ano de nascimento do cliente"},
+    'Education': {'tipo': 'category', 'faixa': None, 'descricao': "nível de escolaridade do cliente"},
+    'Marital_Status': {'tipo': 'category', 'faixa': None, 'descricao': "estado civil do cliente"},
+    'Income': {'tipo': 'float32', 'faixa': (0, None), 'descricao': "renda anual do domicílio"},
+    'Kidhome': {'tipo': 'int8', 'faixa': (0, None), 'descricao': "número de crianças pequenas no domicílio"},
+    'Teenhome': {'tipo': 'int8', 'faixa': (0, None), 'descricao': "número de adolescentes no domicílio"},
+    'Dt_Customer': {'tipo': 'datetime64', 'faixa': None, 'descricao': "data de cadastro do cliente na empresa"},
+    'Recency': {'tipo': 'int16', 'faixa': (0, None), 'descricao': "dias desde a última compra"},
+    'MntWines': {'tipo': 'int32', 'faixa': (0, None), 'descricao': "gasto com vinhos nos últimos 2 anos"},
+    'MntFruits': {'tipo': 'int32', 'faixa': (0, None), 'descricao': "gasto com frutas nos últimos 2 anos"},
+    'MntMeatProducts': {'tipo': 'int32', 'faixa': (0, None), 'descricao': "gasto com carnes nos últimos 2 anos"},
+    'MntFishProducts': {'tipo': 'int32', 'faixa': (0, None), 'descricao': "gasto com peixes nos últimos 2 anos"},
+    'MntSweetProducts': {'tipo': 'int32', 'faixa': (0, None), 'descricao': "gasto com doces nos últimos 2 anos"},
+    'MntGoldProds': {'tipo': 'int32', 'faixa': (0, None), 'descricao': "gasto com produtos de ouro nos últimos 2 anos"},
+    'NumDealsPurchases': {'tipo': 'int16', 'faixa': (0, None), 'descricao': "compras feitas com desconto"},
+    'NumWebPurchases': {'tipo': 'int16', 'faixa': (0, None), 'descricao': "compras feitas pelo site"},
+    'NumCatalogPurchases': {'tipo': 'int16', 'faixa': (0, None), 'descricao': "compras feitas pelo catálogo"},
+    'NumStorePurchases': {'tipo': 'int16', 'faixa': (0, None), 'descricao': "compras feitas diretamente nas lojas"},
+    'NumWebVisitsMonth': {'tipo': 'int16', 'faixa': (0, None), 'descricao': "visitas ao site no último mês"},
+    'AcceptedCmp1': {'tipo': 'int8', 'faixa': (0, 1), 'descricao': "1 se aceitou a oferta da 1ª campanha"},
+    'AcceptedCmp2': {'tipo': 'int8', 'faixa': (0, 1), 'descricao': "1 se aceitou a oferta da 2ª campanha"},
+    'AcceptedCmp3': {'tipo': 'int8', 'faixa': (0, 1), 'descricao': "1 se aceitou a oferta da 3ª campanha"},
+    'AcceptedCmp4': {'tipo': 'int8', 'faixa': (0, 1), 'descricao': "1 se aceitou a oferta da 4ª campanha"},
+    'AcceptedCmp5': {'tipo': 'int8', 'faixa': (0, 1), 'descricao': "1 se aceitou a oferta da 5ª campanha"},
+    'Complain': {'tipo': 'int8', 'faixa': (0, 1), 'descricao': "1 se reclamou nos últimos 2 anos"},
+    'Z_CostContact': {'tipo': 'int8', 'faixa': (None, None), 'descricao': "custo de contato (constante)"},
+    'Z_Revenue': {'tipo': 'int8', 'faixa': (None, None), 'descricao': "receita por aceite (constante)"},
+    'Response': {'tipo': 'int8', 'faixa': (0, 1), 'descricao': "1 se aceitou a oferta da última campanha"},
+}
+
+DATE_COLUMNS = [coluna for coluna, spec in SCHEMA.items() if spec['tipo'].startswith('datetime')]
+COLUMN_DTYPES = {coluna: spec['tipo'] for coluna, spec in SCHEMA.items() if coluna not in DATE_COLUMNS}
+
+# Tipos usados na leitura do CSV: inteiros largos o bastante para a validação
+# detectar valores fora da faixa antes do estreitamento em `compact`
+READ_DTYPES = {coluna: ('int64' if tipo.startswith('int') else tipo) for coluna, tipo in COLUMN_DTYPES.items()}
+
+
+def value_range(column: str) -> tuple:
+    """
+    Faixa válida de uma coluna numérica, limitada pelo que o seu tipo comporta.
+
+    Retorna:
+      - tuple: (mínimo, máximo), ou None para colunas sem faixa (texto e datas).
+    """
+    spec = SCHEMA[column]
+    if spec['faixa'] is None:
+        return None
+    minimo, maximo = spec['faixa']
+    if spec['tipo'].startswith('int'):
+        limites = np.iinfo(spec['tipo'])
+        minimo = limites.min if minimo is None else max(minimo, limites.min)
+        maximo = limites.max if maximo is None else min(maximo, limites.max)
+    return minimo, maximo
+
+
+def validate(df: pd.DataFrame) -> list:
+    """
+    Verifica se os valores de cada coluna conhecida estão dentro da faixa.
+
+    Valores nulos são ignorados (a imputação é responsabilidade da limpeza).
+
+    Retorna:
+      - list: Uma mensagem por coluna fora da faixa (vazia se tudo estiver válido).
+    """
+    problemas = []
+    for coluna in df.columns:
+        if coluna not in SCHEMA or value_range(coluna) is None:
+            continue
+        minimo, maximo = value_range(coluna)
+        valores = df[coluna]
+        fora = pd.Series(False, index=valores.index)
+        if minimo is not None:
+            fora |= valores < minimo
+        if maximo is not None:
+            fora |= valores > maximo
+        if fora.any():
+            problemas.append(f"{coluna}: {int(fora.sum())} valores fora de [{minimo}, {maximo}] "
+                             f"(mín. {valores.min()}, máx. {valores.max()})")
+    return problemas
+
+
+def compact(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Valida as faixas e converte as colunas conhecidas para os tipos compactos.
+
+    Colunas que não constam no esquema são mantidas como estão.
+
+    Retorna:
+      - pd.DataFrame: Cópia com os tipos de COLUMN_DTYPES e DATE_COLUMNS.
+
+    Levanta:
+      - ValueError: Se alguma coluna tiver valores fora da faixa válida.
+    """
+    problemas = validate(df)
+    if problemas:
+        raise ValueError("Valores fora da faixa do esquema:\n  - " + "\n  - ".join(problemas))
+    tipos = {coluna: tipo for coluna, tipo in COLUMN_DTYPES.items() if coluna in df.columns}
+    compacto = df.astype(tipos)
+    for coluna in DATE_COLUMNS:
+        if coluna in compacto.columns and not pd.api.types.is_datetime64_any_dtype(compacto[coluna]):
+            compacto[coluna] = pd.to_datetime(compacto[coluna])
+    return compacto
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compara a memória de cada coluna antes e depois da compactação.
+
+    Parâmetros:
+      - before (pd.DataFrame): Dados com os tipos padrão do pandas.
+      - after (pd.DataFrame): Mesmos dados com os tipos compactos.
+
+    Retorna:
+      - pd.DataFrame: Por coluna, tipo e bytes antes/depois e fator de redução,
+        com uma linha 'TOTAL' ao final.
+    """
+    antes = before.memory_usage(deep=True, index=False)
+    depois = after.memory_usage(deep=True, index=False).reindex(antes.index)
+    relatorio = pd.DataFrame({
+        'tipo_antes': before.dtypes.astype(str),
+        'tipo_depois': after.dtypes.reindex(antes.index).astype(str),
+        'bytes_antes': antes,
+        'bytes_depois': depois,
+    })
+    relatorio.loc['TOTAL'] = ['', '', antes.sum(), depois.sum()]
+    relatorio['reducao'] = (relatorio['bytes_antes'] / relatorio['bytes_depois']).round(1)
+    return relatorio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Valida um CSV contra o esquema e mostra a memória economizada.")
+    parser.add_argument('csv_path', help="CSV processado")
+    args = parser.parse_args()
+
+    padrao = pd.read_csv(args.csv_path)
+    compacto = compact(padrao)
+    relatorio = memory_report(padrao, compacto)
+    print(relatorio.to_string())
+    total = relatorio.loc['TOTAL']
+    print(f"\n{total['bytes_antes'] / 2**20:.1f} MB -> {total['bytes_depois'] / 2**20:.1f} MB "
+          f"({total['reducao']}x menor)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Pontuação vetorizada do modelo de sql/advanced_queries/preditivo_simplificado.sql.
+
+Calcula a mesma probabilidade logística da consulta em NumPy, sobre lotes
+colunares, com as estatísticas de normalização (média e desvio de MntWines)
+calculadas uma única vez por versão dos dados. Vários vetores de pesos podem
+ser avaliados de uma vez com um único produto matricial, e o percentil
+(NTILE(100)) pode ser aproximado por histograma, sem ordenar a base.
+
+Uso:
+    python scoring.py --pesos 0.5 0.3 -0.4 -0.6 --lote 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_store import DEFAULT_DATA_PATH, SharedDataset
+from materialization import ntile
+
+FEATURES = ['wine_zscore', 'log_income', 'tenure_years', 'has_complained']
+DEFAULT_WEIGHTS = np.array([0.5, 0.3, -0.4, -0.6])
+
+_normalization_cache = {}
+
+
+def normalization_stats(dataset: SharedDataset) -> dict:
+    """
+    Média e desvio padrão amostral de MntWines (AVG e STDDEV da consulta).
+
+    Calculados uma vez por versão dos dados e reaproveitados entre chamadas.
+    """
+    chave = (dataset.path, dataset.version)
+    if chave not in _normalization_cache:
+        vinhos = dataset.column('MntWines')
+        _normalization_cache[chave] = {
+            'media': float(vinhos.mean(dtype=np.float64)),
+            'desvio': float(vinhos.std(dtype=np.float64, ddof=1)),
+        }
+    return _normalization_cache[chave]
+
+
+def feature_matrix(wines, income, dt_customer, complain, stats: dict,
+                   reference_date: pd.Timestamp = None) -> np.ndarray:
+    """
+    Monta a matriz (n, 4) de variáveis do modelo, na ordem de FEATURES.
+
+    - wine_zscore = (MntWines - média) / desvio
+    - log_income = LOG(Income + 1), em base 10 como no PostgreSQL
+    - tenure_years = dias inteiros desde Dt_Customer / 365.25
+    - has_complained = 1 se Complain = 1
+    """
+    reference_date = np.datetime64(reference_date or pd.Timestamp.now(), 'D')
+    matriz = np.empty((len(wines), len(FEATURES)), dtype=np.float32)
+    matriz[:, 0] = (np.asarray(wines, dtype=np.float32) - stats['media']) / stats['desvio']
+    matriz[:, 1] = np.log10(np.asarray(income, dtype=np.float32) + 1)
+    dias = (reference_date - np.asarray(dt_customer).astype('datetime64[D]')).astype(np.float32)
+    matriz[:, 2] = dias / 365.25
+    matriz[:, 3] = np.asarray(complain) == 1
+    return matriz
+
+
+def score(features: np.ndarray, weights=DEFAULT_WEIGHTS) -> np.ndarray:
+    """
+    Probabilidade de resposta 1 / (1 + exp(-(features · pesos))).
+
+    Parâmetros:
+      - features (np.ndarray): Matriz (n, 4) de `feature_matrix`.
+      - weights (array-like): Pesos (4,) ou vários vetores de pesos (k, 4).
+
+    Retorna:
+      - np.ndarray: Probabilidades (n,) ou (n, k), uma coluna por vetor de pesos.
+    """
+    pesos = np.asarray(weights, dtype=np.float32)
+    z = features @ pesos.T
+    np.negative(z, out=z)
+    np.exp(z, out=z)
+    z += 1
+    np.reciprocal(z, out=z)
+    return z
+
+
+def _per_column(rank, probabilities: np.ndarray, **kwargs) -> np.ndarray:
+    resultado = np.empty(probabilities.shape, dtype=np.int8)
+    for j in range(probabilities.shape[1]):
+        resultado[:, j] = rank(probabilities[:, j], **kwargs)
+    return resultado
+
+
+def approximate_percentile_rank(probabilities: np.ndarray, bins: int = 10_000) -> np.ndarray:
+    """
+    Aproximação de NTILE(100) OVER (ORDER BY probabilidade DESC) sem ordenação.
+
+    As probabilidades são contadas em um histograma de `bins` faixas em [0, 1];
+    o percentil de cada linha vem da quantidade de linhas em faixas
+    superiores. O erro é limitado pelo número de linhas em uma mesma faixa.
+    Probabilidades ausentes (NaN, por exemplo com Income nulo) vêm primeiro,
+    como NULL em ORDER BY ... DESC no PostgreSQL, na ordem das linhas.
+    Com uma matriz (n, k), cada coluna (vetor de pesos) é ranqueada à parte.
+    """
+    probabilities = np.asarray(probabilities)
+    if probabilities.ndim == 2:
+        return _per_column(approximate_percentile_rank, probabilities, bins=bins)
+    n = len(probabilities)
+    validas = np.isfinite(probabilities)
+    nulas = n - int(validas.sum())
+    faixa = np.zeros(n, dtype=np.int64)
+    faixa[validas] = np.minimum((probabilities[validas] * bins).astype(np.int64), bins - 1)
+    contagem = np.bincount(faixa[validas], minlength=bins)
+    # Linhas nulas e linhas em faixas estritamente maiores (ordem decrescente)
+    acima = np.cumsum(contagem[::-1])[::-1] - contagem + nulas
+    posicao = acima[faixa]
+    posicao[~validas] = np.arange(nulas)
+    return (posicao * 100 // max(n, 1) + 1).astype(np.int8)
+
+
+def exact_percentile_rank(probabilities: np.ndarray) -> np.ndarray:
+    """NTILE(100) exato (exige ordenação); nulos primeiro e desempate pela posição da linha."""
+    probabilities = np.asarray(probabilities)
+    if probabilities.ndim == 2:
+        return _per_column(exact_percentile_rank, probabilities)
+    ordem = np.argsort(np.where(np.isfinite(probabilities), -probabilities, -np.inf), kind='stable')
+    posicao = np.empty(len(probabilities), dtype=np.int64)
+    posicao[ordem] = np.arange(len(probabilities))
+    return ntile(posicao, 100)
+
+
+def score_batches(dataset: SharedDataset, weights=DEFAULT_WEIGHTS, batch_size: int = 1_000_000,
+                  reference_date: pd.Timestamp = None):
+    """
+    Gera as probabilidades em lotes colunares sobre o dataset compartilhado.
+
+    As colunas são visões sem cópia do snapshot; só a matriz de variáveis de
+    cada lote é alocada.
+
+    Retorna:
+      - Gerador de (início, probabilidades) para cada lote.
+    """
+    stats = normalization_stats(dataset)
+    colunas = [dataset.column(nome) for nome in ('MntWines', 'Income', 'Dt_Customer', 'Complain')]
+    for inicio in range(0, dataset.num_rows, batch_size):
+        lote = [coluna[inicio:inicio + batch_size] for coluna in colunas]
+        yield inicio, score(feature_matrix(*lote, stats, reference_date), weights)
+
+
+def score_dataset(dataset: SharedDataset, weights=DEFAULT_WEIGHTS, batch_size: int = 1_000_000,
+                  exact: bool = False, reference_date: pd.Timestamp = None) -> pd.DataFrame:
+    """
+    Equivalente vetorizado da consulta preditivo_simplificado.sql.
+
+    Parâmetros:
+      - weights (array-like): Pesos (4,) ou vários vetores de pesos (k, 4),
+        avaliados no mesmo produto matricial.
+
+    Retorna:
+      - pd.DataFrame: CustomerID, response_probability e percentile_rank; com
+        k vetores de pesos, um par response_probability_<j>/percentile_rank_<j> por vetor.
+    """
+    pesos = np.asarray(weights, dtype=np.float32)
+    formato = (dataset.num_rows,) + pesos.shape[:-1]
+    probabilidades = np.empty(formato, dtype=np.float32)
+    for inicio, lote in score_batches(dataset, pesos, batch_size, reference_date):
+        probabilidades[inicio:inicio + len(lote)] = lote
+    rank = exact_percentile_rank if exact else approximate_percentile_rank
+    percentis = rank(probabilidades)
+
+    resultado = {'CustomerID': dataset.column('ID')}
+    if pesos.ndim == 1:
+        resultado.update(response_probability=probabilidades, percentile_rank=percentis)
+    else:
+        for j in range(pesos.shape[0]):
+            resultado[f'response_probability_{j}'] = probabilidades[:, j]
+            resultado[f'percentile_rank_{j}'] = percentis[:, j]
+    return pd.DataFrame(resultado)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pontuação vetorizada da probabilidade de resposta.")
+    parser.add_argument('csv_path', nargs='?', default=DEFAULT_DATA_PATH, help="CSV processado")
+    parser.add_argument('--pesos', type=float, nargs=4, action='append', default=None,
+                        metavar=('VINHO', 'RENDA', 'TEMPO', 'RECLAMACAO'),
+                        help="Pesos do modelo; repita para avaliar vários vetores de uma vez")
+    parser.add_argument('--lote', type=int, default=1_000_000, help="Linhas por lote")
+    parser.add_argument('--exato', action='store_true', help="Percentil exato (ordena a base)")
+    args = parser.parse_args()
+
+    pesos = DEFAULT_WEIGHTS if args.pesos is None else np.array(args.pesos)
+    if len(pesos) == 1:
+        pesos = pesos[0]
+
+    dataset = SharedDataset(args.csv_path)
+    inicio = time.perf_counter()
+    resultado = score_dataset(dataset, pesos, args.lote, args.exato)
+    duracao = time.perf_counter() - inicio
+
+    # Com vários vetores de pesos, ordena pelo primeiro
+    ordem = 'response_probability' if pesos.ndim == 1 else 'response_probability_0'
+    print(resultado.sort_values(ordem, ascending=False).head(20).to_string(index=False))
+    print(f"\n{len(resultado)} clientes pontuados em {duracao:.3f} s "
+          f"({len(resultado) / duracao:,.0f} clientes/s)")
+
+
+if __name__ == "__main__":
+    main()
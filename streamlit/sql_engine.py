@@ -0,0 +1,137 @@
+"""
+Motor SQL embutido (DuckDB) para as consultas da pasta sql/.
+
+O snapshot Arrow mapeado em memória é registrado no DuckDB sem cópia e
+exposto como `main_table`, com os aliases `DtCustomer` e `CustomerID` usados
+nas consultas. Os resultados ficam em cache, com a chave formada pelo texto
+da consulta e pela versão dos dados.
+
+Uso:
+    python sql_engine.py respostas_educacao impacto_reclamacoes --repeticoes 5
+"""
+import argparse
+import glob
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+
+import duckdb
+import pandas as pd
+
+from data_store import DEFAULT_DATA_PATH, SharedDataset, csv_fingerprint
+
+SQL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sql')
+
+MAIN_TABLE_VIEW = """
+CREATE VIEW main_table AS
+SELECT *, Dt_Customer AS DtCustomer, ID AS CustomerID
+FROM dataset
+"""
+
+# Número máximo de resultados mantidos em cache
+MAX_CACHED_RESULTS = 64
+
+_datasets = {}
+_results = OrderedDict()
+
+
+def list_queries() -> dict:
+    """Consultas disponíveis em sql/, indexadas pelo nome do arquivo sem extensão."""
+    arquivos = glob.glob(os.path.join(SQL_DIR, '**', '*.sql'), recursive=True)
+    return {os.path.splitext(os.path.basename(arquivo))[0]: arquivo for arquivo in sorted(arquivos)}
+
+
+def read_query(name: str) -> str:
+    """Texto de uma consulta de sql/ pelo nome (ex.: 'respostas_educacao')."""
+    consultas = list_queries()
+    if name not in consultas:
+        raise ValueError(f"Consulta '{name}' não encontrada. Disponíveis: {list(consultas)}")
+    with open(consultas[name], encoding='utf-8') as arquivo:
+        return arquivo.read()
+
+
+def _dataset(csv_path: str) -> SharedDataset:
+    versao = csv_fingerprint(csv_path)
+    chave = os.path.abspath(csv_path)
+    if chave not in _datasets or _datasets[chave][0] != versao:
+        _datasets[chave] = (versao, SharedDataset(csv_path))
+    return _datasets[chave][1]
+
+
+def connect(csv_path: str = DEFAULT_DATA_PATH) -> duckdb.DuckDBPyConnection:
+    """
+    Abre uma conexão DuckDB em memória com o dataset registrado como `main_table`.
+
+    A tabela Arrow é registrada diretamente, sem cópia para o DuckDB.
+    """
+    conexao = duckdb.connect()
+    conexao.register('dataset', _dataset(csv_path).table)
+    conexao.execute(MAIN_TABLE_VIEW)
+    return conexao
+
+
+def run_sql(sql: str, csv_path: str = DEFAULT_DATA_PATH, use_cache: bool = True) -> pd.DataFrame:
+    """
+    Executa um script SQL sobre `main_table` e retorna o resultado.
+
+    Scripts com `CREATE TABLE` retornam o conteúdo da última tabela criada.
+    Cada execução usa uma conexão nova, então os scripts podem ser repetidos.
+
+    Parâmetros:
+      - sql (str): Texto da consulta.
+      - csv_path (str): Caminho do CSV processado.
+      - use_cache (bool): Reaproveitar resultados da mesma consulta e versão dos dados.
+
+    Retorna:
+      - pd.DataFrame: Resultado da consulta.
+    """
+    chave = (hashlib.sha256(sql.encode()).hexdigest(), os.path.abspath(csv_path), csv_fingerprint(csv_path))
+    if use_cache and chave in _results:
+        _results.move_to_end(chave)
+        return _results[chave].copy()
+
+    conexao = connect(csv_path)
+    try:
+        resultado = conexao.execute(sql)
+        tabelas = re.findall(r'CREATE\s+TABLE\s+(\w+)', sql, flags=re.IGNORECASE)
+        df = conexao.table(tabelas[-1]).df() if tabelas else resultado.df()
+    finally:
+        conexao.close()
+
+    if use_cache:
+        _results[chave] = df
+        if len(_results) > MAX_CACHED_RESULTS:
+            _results.popitem(last=False)
+    return df.copy()
+
+
+def run_query(name: str, csv_path: str = DEFAULT_DATA_PATH, use_cache: bool = True) -> pd.DataFrame:
+    """Executa uma consulta de sql/ pelo nome."""
+    return run_sql(read_query(name), csv_path, use_cache)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Executa as consultas de sql/ localmente com DuckDB.")
+    parser.add_argument('consultas', nargs='*', help="Nomes das consultas (padrão: todas)")
+    parser.add_argument('--dados', default=DEFAULT_DATA_PATH, help="CSV processado")
+    parser.add_argument('--repeticoes', type=int, default=1, help="Execuções sem cache para medir o tempo")
+    args = parser.parse_args()
+
+    for nome in args.consultas or list(list_queries()):
+        tempos = []
+        try:
+            for _ in range(args.repeticoes):
+                inicio = time.perf_counter()
+                df = run_query(nome, args.dados, use_cache=False)
+                tempos.append(time.perf_counter() - inicio)
+        except (duckdb.Error, ValueError) as e:
+            print(f"\n=== {nome}: erro ===\n{e}")
+            continue
+        print(f"\n=== {nome} ({len(df)} linhas, melhor tempo {min(tempos) * 1000:.1f} ms) ===")
+        print(df.head(20).to_string())
+
+
+if __name__ == "__main__":
+    main()
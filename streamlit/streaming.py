@@ -0,0 +1,125 @@
+"""
+Ingestão em chunks para datasets maiores que a memória.
+
+Lê o CSV processado em blocos de tamanho limitado e acumula, de forma
+incremental, os agregados usados pelos três dashboards. Os resultados
+parciais de cada chunk são combinados de forma exata, então o resultado final
+não depende do tamanho do chunk.
+
+Uso:
+    python streaming.py ../data/processed/marketing_campaign_atualizado.csv --chunksize 500000
+"""
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from age_rollup import SPENDING_COLUMNS, age_bands
+from data_store import DEFAULT_DATA_PATH, read_typed_csv
+from filter_cube import build_complaint_cube, cube_metrics, merge_complaint_cubes
+from group_stats import group_welch_ttest, group_moments, merge_moments
+
+STREAM_COLUMNS = ['Year_Birth', 'Marital_Status', 'Income', 'Complain', 'Dt_Customer'] + SPENDING_COLUMNS
+
+
+def gold_by_birth_year(df: pd.DataFrame) -> pd.DataFrame:
+    """Contagem e soma de MntGoldProds por ano de nascimento."""
+    df = df.dropna(subset=['Year_Birth', 'MntGoldProds'])
+    return df.groupby('Year_Birth')['MntGoldProds'].agg(n='count', soma='sum').astype('int64')
+
+
+def merge_birth_year_totals(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    """Combina dois resumos por ano de nascimento (somas exatas)."""
+    return a.add(b, fill_value=0).astype('int64')
+
+
+def gold_by_age_band(por_ano: pd.DataFrame, current_year: int = None) -> pd.Series:
+    """
+    Média de MntGoldProds por faixa etária a partir do resumo por ano de nascimento.
+
+    Usa as mesmas faixas de `calculate_age_and_groups` (dashboard_gastos_ouro).
+    """
+    current_year = current_year or datetime.now().year
+    faixas = age_bands(current_year - por_ano.index.to_numpy())
+    totais = por_ano.groupby(faixas, observed=False).sum()
+    return (totais['soma'] / totais['n'].replace(0, np.nan)).rename('MntGoldProds')
+
+
+def _chunk_aggregates(chunk: pd.DataFrame) -> dict:
+    campanha = pd.DataFrame({
+        'Complain': chunk['Complain'],
+        'Ano_Inscricao': chunk['Dt_Customer'].dt.year,
+        'MntRegularProds': chunk[SPENDING_COLUMNS].sum(axis=1),
+    }).dropna()
+
+    return {
+        'linhas': len(chunk),
+        'cubo_reclamacoes': build_complaint_cube(campanha),
+        'ouro_por_ano_nascimento': gold_by_birth_year(chunk),
+        'carne_por_estado_civil': group_moments(chunk['Marital_Status'], chunk['MntMeatProducts']),
+        'renda_por_estado_civil': group_moments(chunk['Marital_Status'], chunk['Income']),
+    }
+
+
+def _merge_aggregates(a: dict, b: dict) -> dict:
+    return {
+        'linhas': a['linhas'] + b['linhas'],
+        'cubo_reclamacoes': merge_complaint_cubes(a['cubo_reclamacoes'], b['cubo_reclamacoes']),
+        'ouro_por_ano_nascimento': merge_birth_year_totals(a['ouro_por_ano_nascimento'],
+                                                           b['ouro_por_ano_nascimento']),
+        'carne_por_estado_civil': merge_moments(a['carne_por_estado_civil'], b['carne_por_estado_civil']),
+        'renda_por_estado_civil': merge_moments(a['renda_por_estado_civil'], b['renda_por_estado_civil']),
+    }
+
+
+def stream_aggregates(csv_path: str, chunksize: int = 500_000) -> dict:
+    """
+    Calcula os agregados dos dashboards lendo o CSV em chunks.
+
+    A memória usada depende apenas de `chunksize` (e do número de grupos), não
+    do tamanho do arquivo.
+
+    Parâmetros:
+      - csv_path (str): Caminho do CSV processado.
+      - chunksize (int): Número de linhas lidas por vez.
+
+    Retorna:
+      - dict: Cubo ano × reclamação, totais de ouro por ano de nascimento e
+        resumos (n, média, M2) de carne e renda por estado civil.
+    """
+    resultado = None
+    with read_typed_csv(csv_path, usecols=STREAM_COLUMNS, chunksize=chunksize) as leitor:
+        for chunk in leitor:
+            parcial = _chunk_aggregates(chunk)
+            resultado = parcial if resultado is None else _merge_aggregates(resultado, parcial)
+    if resultado is None:
+        raise ValueError("O arquivo não contém linhas de dados.")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agregados dos dashboards calculados em chunks.")
+    parser.add_argument('csv_path', nargs='?', default=DEFAULT_DATA_PATH, help="CSV processado")
+    parser.add_argument('--chunksize', type=int, default=500_000, help="Linhas por chunk")
+    args = parser.parse_args()
+
+    agregados = stream_aggregates(args.csv_path, args.chunksize)
+    cubo = agregados['cubo_reclamacoes']
+    metricas = cube_metrics(cubo, (cubo['anos'][0], cubo['anos'][-1]))
+    t_stat, p_value = group_welch_ttest(agregados['carne_por_estado_civil'], 'Single', 'Married')
+
+    print(f"Linhas processadas: {agregados['linhas']}")
+    print("\nReclamações vs gastos (MntRegularProds):")
+    print(f"  Média reclamaram: {metricas['media_reclamaram']:.2f}")
+    print(f"  Média não reclamaram: {metricas['media_nao_reclamaram']:.2f}")
+    print(f"  Valor-p: {metricas['p_value']:.4f}")
+    print("\nMédia de gastos em ouro por faixa etária:")
+    print(gold_by_age_band(agregados['ouro_por_ano_nascimento']).round(2).to_string())
+    print("\nGastos em carne por estado civil:")
+    print(agregados['carne_por_estado_civil'][['n', 'mean']].round(2).to_string())
+    print(f"  Solteiros vs casados: t = {t_stat:.2f}, p = {p_value:.4f}")
+
+
+if __name__ == "__main__":
+    main()
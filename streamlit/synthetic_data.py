@@ -0,0 +1,151 @@
+"""
+Gerador de dados sintéticos no esquema de data/info_dataset.txt.
+
+Produz clientes com as mesmas colunas do CSV processado e distribuições
+próximas às da base original (frequências de Education e Marital_Status,
+faixas de mínimo/máximo, médias de gastos e taxas de aceite), em qualquer
+escala. A geração é determinística pela semente e feita em blocos, então
+milhões de linhas não precisam caber de uma vez na memória.
+
+Uso:
+    python synthetic_data.py 1000000 --saida ../data/synthetic/clientes_1000000.csv
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# Frequências observadas na base original (notebook/data_cleaning.ipynb)
+EDUCATION_FREQUENCIES = {'Graduation': 1127, 'PhD': 486, 'Master': 370, '2n Cycle': 203, 'Basic': 54}
+MARITAL_FREQUENCIES = {'Married': 864, 'Together': 580, 'Single': 480, 'Divorced': 232,
+                       'Widow': 77, 'Alone': 3, 'Absurd': 2, 'YOLO': 2}
+
+# Média e máximo de cada categoria de gasto nos últimos 2 anos
+SPENDING_PROFILE = {
+    'MntWines': (304, 1493),
+    'MntFruits': (26, 199),
+    'MntMeatProducts': (167, 1725),
+    'MntFishProducts': (37, 259),
+    'MntSweetProducts': (27, 263),
+    'MntGoldProds': (44, 362),
+}
+# Média e máximo do número de compras por canal
+PURCHASE_PROFILE = {
+    'NumDealsPurchases': (2.3, 15),
+    'NumWebPurchases': (4.1, 27),
+    'NumCatalogPurchases': (2.7, 28),
+    'NumStorePurchases': (5.8, 13),
+    'NumWebVisitsMonth': (5.3, 20),
+}
+# Taxas de aceite das campanhas, reclamação e resposta
+FLAG_RATES = {
+    'AcceptedCmp3': 0.073,
+    'AcceptedCmp4': 0.075,
+    'AcceptedCmp5': 0.073,
+    'AcceptedCmp1': 0.064,
+    'AcceptedCmp2': 0.013,
+    'Complain': 0.009,
+    'Response': 0.149,
+}
+ENROLLMENT_PERIOD = ('2012-07-30', '2014-06-29')
+
+COLUMNS = ['ID', 'Year_Birth', 'Education', 'Marital_Status', 'Income', 'Kidhome', 'Teenhome',
+           'Dt_Customer', 'Recency', 'MntWines', 'MntFruits', 'MntMeatProducts', 'MntFishProducts',
+           'MntSweetProducts', 'MntGoldProds', 'NumDealsPurchases', 'NumWebPurchases',
+           'NumCatalogPurchases', 'NumStorePurchases', 'NumWebVisitsMonth', 'AcceptedCmp3',
+           'AcceptedCmp4', 'AcceptedCmp5', 'AcceptedCmp1', 'AcceptedCmp2', 'Complain', 'Response',
+           'Z_CostContact', 'Z_Revenue']
+
+
+def _choice(rng: np.random.Generator, frequencies: dict, n: int) -> pd.Categorical:
+    nomes = list(frequencies)
+    pesos = np.array(list(frequencies.values()), dtype=np.float64)
+    codigos = rng.choice(len(nomes), size=n, p=pesos / pesos.sum())
+    return pd.Categorical.from_codes(codigos, categories=nomes)
+
+
+def generate(rows: int, seed: int = 42, start_id: int = 0) -> pd.DataFrame:
+    """
+    Gera `rows` clientes sintéticos.
+
+    Os gastos e as compras crescem com a renda e diminuem com o número de
+    filhos, preservando as correlações usadas nas análises dos dashboards.
+
+    Parâmetros:
+      - rows (int): Número de linhas.
+      - seed (int): Semente do gerador aleatório.
+      - start_id (int): Primeiro valor da coluna ID.
+
+    Retorna:
+      - pd.DataFrame: Dados no esquema do CSV processado.
+    """
+    rng = np.random.default_rng(seed)
+    kidhome = rng.choice(3, size=rows, p=[0.58, 0.40, 0.02]).astype(np.int8)
+    teenhome = rng.choice(3, size=rows, p=[0.52, 0.46, 0.02]).astype(np.int8)
+    renda = np.clip(rng.lognormal(np.log(51000), 0.45, rows), 1730, 666666).round()
+
+    # Fator de consumo: renda acima da mediana e menos filhos gastam mais
+    fator = (renda / 51000) ** 1.5 / (1 + 0.6 * kidhome + 0.2 * teenhome)
+    fator /= fator.mean()
+
+    inicio, fim = (np.datetime64(data, 'D') for data in ENROLLMENT_PERIOD)
+    dados = {
+        'ID': np.arange(start_id, start_id + rows, dtype=np.int64),
+        'Year_Birth': np.clip(rng.normal(1969, 12, rows).round(), 1893, 1996).astype(np.int16),
+        'Education': _choice(rng, EDUCATION_FREQUENCIES, rows),
+        'Marital_Status': _choice(rng, MARITAL_FREQUENCIES, rows),
+        'Income': renda,
+        'Kidhome': kidhome,
+        'Teenhome': teenhome,
+        'Dt_Customer': inicio + rng.integers(0, (fim - inicio).astype(np.int64) + 1, rows).astype('timedelta64[D]'),
+        'Recency': rng.integers(0, 100, rows, dtype=np.int8),
+    }
+    for coluna, (media, maximo) in SPENDING_PROFILE.items():
+        gasto = rng.gamma(0.6, media / 0.6, rows) * fator
+        dados[coluna] = np.clip(gasto.round(), 0, maximo).astype(np.int32)
+    for coluna, (media, maximo) in PURCHASE_PROFILE.items():
+        escala = 1 / fator if coluna in ('NumDealsPurchases', 'NumWebVisitsMonth') else fator
+        dados[coluna] = np.clip(rng.poisson(media * np.sqrt(escala)), 0, maximo).astype(np.int8)
+    for coluna, taxa in FLAG_RATES.items():
+        dados[coluna] = (rng.random(rows) < taxa).astype(np.int8)
+    dados['Z_CostContact'] = np.full(rows, 3, dtype=np.int8)
+    dados['Z_Revenue'] = np.full(rows, 11, dtype=np.int8)
+
+    return pd.DataFrame(dados, columns=COLUMNS)
+
+
+def write_csv(path: str, rows: int, seed: int = 42, chunk_size: int = 1_000_000) -> str:
+    """
+    Grava um CSV sintético em blocos de `chunk_size` linhas.
+
+    Cada bloco usa uma semente derivada de `seed`, então o arquivo é o mesmo
+    para a mesma combinação de linhas, semente e tamanho de bloco.
+
+    Retorna:
+      - str: Caminho do arquivo gravado.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temporario = f"{path}.tmp"
+    for i, inicio in enumerate(range(0, rows, chunk_size)):
+        bloco = generate(min(chunk_size, rows - inicio), seed=seed + i, start_id=inicio)
+        bloco.to_csv(temporario, mode='w' if i == 0 else 'a', header=(i == 0), index=False,
+                     date_format='%Y-%m-%d')
+    os.replace(temporario, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um CSV sintético no esquema do dataset de marketing.")
+    parser.add_argument('linhas', type=int, help="Número de clientes")
+    parser.add_argument('--saida', default=None, help="Arquivo CSV de saída")
+    parser.add_argument('--semente', type=int, default=42, help="Semente aleatória")
+    args = parser.parse_args()
+
+    saida = args.saida or f"../data/synthetic/clientes_{args.linhas}.csv"
+    write_csv(saida, args.linhas, args.semente)
+    print(f"{args.linhas} clientes gravados em {saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos dos dashboards são importados pelo nome, a partir da pasta streamlit/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
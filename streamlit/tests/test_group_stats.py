@@ -0,0 +1,150 @@
+"""
+Testes das estatísticas de grupo mescláveis contra o scipy e contra uma única passada.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from group_stats import (combine_moments, group_moments, group_welch_ttest, merge_moments,
+                         pairwise_welch, welch_ttest)
+
+# O scipy avisa sobre perda de precisão ao calcular a variância de um grupo constante
+pytestmark = pytest.mark.filterwarnings('ignore:Precision loss:RuntimeWarning')
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(42)
+
+
+@pytest.fixture
+def grupos(rng):
+    """Grupos com tamanhos, médias e variâncias diferentes, incluindo um com variância zero."""
+    partes = {
+        'Married': rng.normal(380, 120, 400),
+        'Single': rng.normal(300, 200, 250),
+        'Divorced': rng.normal(310, 60, 40),
+        'Widow': rng.exponential(150, 12),
+        'Constante': np.full(8, 42.0),
+    }
+    chaves = np.concatenate([[nome] * len(valores) for nome, valores in partes.items()])
+    valores = np.concatenate(list(partes.values()))
+    ordem = rng.permutation(len(valores))
+    return partes, chaves[ordem], valores[ordem]
+
+
+def _resumo(valores):
+    valores = np.asarray(valores, dtype=np.float64)
+    return {'n': len(valores), 'mean': valores.mean(), 'm2': ((valores - valores.mean()) ** 2).sum()}
+
+
+def _scipy(a, b):
+    resultado = stats.ttest_ind(a, b, equal_var=False)
+    return resultado.statistic, resultado.pvalue
+
+
+@pytest.mark.parametrize('n_a, n_b, desvio_a, desvio_b', [
+    (2, 2, 1.0, 1.0),
+    (5, 300, 10.0, 0.5),
+    (30, 40, 3.0, 3.0),
+    (1000, 17, 50.0, 200.0),
+])
+def test_welch_ttest_matches_scipy(rng, n_a, n_b, desvio_a, desvio_b):
+    a = rng.normal(10, desvio_a, n_a)
+    b = rng.normal(12, desvio_b, n_b)
+    t_stat, p_value = welch_ttest(_resumo(a), _resumo(b))
+    esperado_t, esperado_p = _scipy(a, b)
+    assert t_stat == pytest.approx(esperado_t, rel=1e-9)
+    assert p_value == pytest.approx(esperado_p, rel=1e-7, abs=1e-300)
+
+
+def test_welch_ttest_with_one_constant_group_matches_scipy(rng):
+    a = np.full(10, 5.0)
+    b = rng.normal(6, 2, 25)
+    t_stat, p_value = welch_ttest(_resumo(a), _resumo(b))
+    esperado_t, esperado_p = _scipy(a, b)
+    assert t_stat == pytest.approx(esperado_t, rel=1e-9)
+    assert p_value == pytest.approx(esperado_p, rel=1e-7)
+
+
+def test_group_welch_ttest_matches_scipy(grupos):
+    partes, chaves, valores = grupos
+    momentos = group_moments(chaves, valores)
+    for a, b in [('Married', 'Single'), ('Single', 'Divorced'), ('Widow', 'Married'), ('Constante', 'Divorced')]:
+        t_stat, p_value = group_welch_ttest(momentos, a, b)
+        esperado_t, esperado_p = _scipy(partes[a], partes[b])
+        assert t_stat == pytest.approx(esperado_t, rel=1e-9)
+        assert p_value == pytest.approx(esperado_p, rel=1e-7)
+
+
+def test_pairwise_welch_matches_scipy(grupos):
+    partes, chaves, valores = grupos
+    pares = pairwise_welch(group_moments(chaves, valores))
+    assert len(pares) == len(partes) * (len(partes) - 1) // 2
+    for linha in pares.itertuples():
+        esperado_t, esperado_p = _scipy(partes[linha.grupo_a], partes[linha.grupo_b])
+        assert linha.media_a == pytest.approx(partes[linha.grupo_a].mean())
+        assert linha.t_stat == pytest.approx(esperado_t, rel=1e-9)
+        assert linha.p_value == pytest.approx(esperado_p, rel=1e-7)
+
+
+def test_groups_with_fewer_than_two_values_give_nan():
+    momentos = group_moments(['A', 'A', 'A', 'B'], [1.0, 2.0, 4.0, 3.0])
+    assert momentos.loc['B', 'n'] == 1
+    assert momentos.loc['B', 'm2'] == 0.0
+
+    assert all(np.isnan(group_welch_ttest(momentos, 'A', 'B')))
+    # Grupo ausente do resumo equivale a um grupo vazio
+    assert all(np.isnan(group_welch_ttest(momentos, 'A', 'C')))
+
+    pares = pairwise_welch(momentos)
+    assert pares[['t_stat', 'graus_liberdade', 'p_value']].isna().all(axis=None)
+
+
+def test_two_constant_groups_give_nan():
+    momentos = group_moments(['A'] * 4 + ['B'] * 5, [3.0] * 4 + [7.0] * 5)
+    assert momentos['m2'].tolist() == [0.0, 0.0]
+    assert all(np.isnan(group_welch_ttest(momentos, 'A', 'B')))
+
+
+def test_group_moments_ignore_missing_keys_and_values():
+    momentos = group_moments(pd.Series(['A', None, 'A', 'B', 'B']), [1.0, 100.0, 3.0, np.nan, 5.0])
+    assert momentos['n'].tolist() == [2, 1]
+    assert momentos['mean'].tolist() == [2.0, 5.0]
+    assert momentos['m2'].tolist() == [2.0, 0.0]
+
+
+@pytest.mark.parametrize('semente', range(5))
+def test_merge_moments_over_random_splits_matches_single_pass(grupos, semente):
+    _, chaves, valores = grupos
+    unica = group_moments(chaves, valores)
+
+    rng = np.random.default_rng(semente)
+    # Cortes aleatórios, incluindo chunks de uma linha e chunks sem alguns grupos
+    cortes = np.sort(rng.choice(np.arange(1, len(valores)), size=rng.integers(1, 40), replace=False))
+    cortes = np.concatenate([cortes, [1, 2]])
+    partes = [group_moments(k, v) for k, v in zip(np.split(chaves, np.unique(cortes)),
+                                                   np.split(valores, np.unique(cortes)))]
+    combinada = combine_moments(partes)
+
+    assert combinada.index.tolist() == unica.index.tolist()
+    assert combinada['n'].tolist() == unica['n'].tolist()
+    np.testing.assert_allclose(combinada['mean'], unica['mean'], rtol=1e-12)
+    np.testing.assert_allclose(combinada['m2'], unica['m2'], rtol=1e-9, atol=1e-9)
+
+
+def test_merge_moments_keeps_groups_from_either_side():
+    a = group_moments(['A', 'A'], [1.0, 3.0])
+    b = group_moments(['B'], [10.0])
+    combinada = merge_moments(a, b)
+    assert combinada.loc['A'].tolist() == [2, 2.0, 2.0]
+    assert combinada.loc['B'].tolist() == [1, 10.0, 0.0]
+
+
+def test_merge_with_empty_summary_is_identity(grupos):
+    _, chaves, valores = grupos
+    unica = group_moments(chaves, valores)
+    vazia = group_moments(chaves[:0], valores[:0])
+    combinada = merge_moments(vazia, unica)
+    pd.testing.assert_frame_equal(combinada, unica, check_names=False)
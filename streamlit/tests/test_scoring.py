@@ -0,0 +1,49 @@
+"""
+Testes da pontuação vetorizada com um ou vários vetores de pesos.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from data_store import SharedDataset
+from scoring import (DEFAULT_WEIGHTS, approximate_percentile_rank, exact_percentile_rank,
+                     score_dataset)
+from synthetic_data import write_csv
+
+PESOS = np.array([DEFAULT_WEIGHTS, [0.1, -0.2, 0.3, 0.4], [-0.5, 0.5, 0.0, 1.0]])
+
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory):
+    caminho = write_csv(os.path.join(tmp_path_factory.mktemp('dados'), 'sintetico.csv'), 3000, seed=7)
+    return SharedDataset(caminho)
+
+
+@pytest.mark.parametrize('exact', [False, True])
+def test_weight_matrix_matches_one_vector_at_a_time(dataset, exact):
+    referencia = np.datetime64('2024-01-01')
+    resultado = score_dataset(dataset, PESOS, batch_size=1000, exact=exact, reference_date=referencia)
+    assert len(resultado) == dataset.num_rows
+
+    for j, pesos in enumerate(PESOS):
+        sozinho = score_dataset(dataset, pesos, batch_size=1000, exact=exact, reference_date=referencia)
+        np.testing.assert_allclose(resultado[f'response_probability_{j}'], sozinho['response_probability'],
+                                   rtol=1e-6)
+        np.testing.assert_array_equal(resultado[f'percentile_rank_{j}'], sozinho['percentile_rank'])
+
+
+def test_single_vector_keeps_column_names(dataset):
+    resultado = score_dataset(dataset, DEFAULT_WEIGHTS, batch_size=1000)
+    assert list(resultado.columns) == ['CustomerID', 'response_probability', 'percentile_rank']
+
+
+def test_ranks_per_column_with_missing_probabilities_first():
+    probabilidades = np.array([[0.9, 0.1], [np.nan, 0.5], [0.2, 0.9], [0.5, np.nan]], dtype=np.float32)
+    for rank in (approximate_percentile_rank, exact_percentile_rank):
+        percentis = rank(probabilidades)
+        assert percentis.shape == probabilidades.shape
+        for j in range(probabilidades.shape[1]):
+            np.testing.assert_array_equal(percentis[:, j], rank(probabilidades[:, j]))
+        # Nulos primeiro, como NULL em ORDER BY ... DESC
+        assert percentis[1, 0] == 1 and percentis[3, 1] == 1
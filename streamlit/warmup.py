@@ -0,0 +1,112 @@
+"""
+Aquecimento dos dashboards antes de receber tráfego.
+
+Etapas:
+  1. Constrói (se preciso) o snapshot Arrow e abre o dataset compartilhado;
+  2. Carrega os módulos pesados que os dashboards importam sob demanda
+     (scipy.stats e plotly.express);
+  3. Executa cada dashboard uma vez, sem navegador, com os filtros padrão,
+     preenchendo o cache de resultados e os agregados em memória.
+
+As etapas 2 e 3 valem para o processo atual. Com `--servir`, o servidor do
+Streamlit é iniciado no mesmo processo logo após o aquecimento, e a primeira
+sessão já encontra tudo pronto.
+
+Uso:
+    python warmup.py
+    python warmup.py --servir dashboard_status.py -- --server.port 8501
+"""
+import argparse
+import importlib
+import os
+import sys
+import time
+
+from data_store import DEFAULT_DATA_PATH, SharedDataset, ensure_snapshot
+
+DASHBOARDS = ('dashboard_campaign.py', 'dashboard_gastos_ouro.py', 'dashboard_status.py', 'dashboard_cohorte.py')
+
+# Módulos importados dentro das funções que os usam, para não atrasar a abertura da página
+HEAVY_MODULES = ('scipy.stats', 'plotly.express')
+
+
+def prepare_data(csv_path: str = DEFAULT_DATA_PATH) -> SharedDataset:
+    """Garante o snapshot atualizado e o mapeia em memória."""
+    ensure_snapshot(csv_path)
+    return SharedDataset(csv_path)
+
+
+def preload_modules(names=HEAVY_MODULES):
+    """Importa os módulos carregados sob demanda pelos dashboards."""
+    for name in names:
+        importlib.import_module(name)
+
+
+def prime_dashboards(scripts=DASHBOARDS, timeout: float = 300) -> dict:
+    """
+    Executa cada dashboard uma vez com os filtros padrão, sem navegador.
+
+    Retorna:
+      - dict: Script -> lista de erros exibidos (vazia quando tudo correu bem).
+    """
+    from streamlit.testing.v1 import AppTest
+
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    erros = {}
+    for script in scripts:
+        execucao = AppTest.from_file(os.path.join(pasta, script), default_timeout=timeout).run()
+        erros[script] = [e.value for e in execucao.error] + [str(e.value) for e in execucao.exception]
+    return erros
+
+
+def warmup(csv_path: str = DEFAULT_DATA_PATH, scripts=DASHBOARDS) -> dict:
+    """
+    Executa todas as etapas do aquecimento.
+
+    Retorna:
+      - dict: Duração de cada etapa (s) e erros encontrados nos dashboards.
+    """
+    resumo = {}
+    inicio = time.perf_counter()
+    prepare_data(csv_path)
+    resumo['dados_s'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    preload_modules()
+    resumo['modulos_s'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    resumo['erros'] = prime_dashboards(scripts) if scripts else {}
+    resumo['dashboards_s'] = time.perf_counter() - inicio
+    return resumo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aquece dados, módulos e caches dos dashboards.")
+    parser.add_argument('csv_path', nargs='?', default=DEFAULT_DATA_PATH, help="CSV processado")
+    parser.add_argument('--dashboards', nargs='*', default=list(DASHBOARDS), help="Dashboards a executar")
+    parser.add_argument('--servir', default=None, metavar='DASHBOARD',
+                        help="Inicia o servidor do Streamlit neste processo após o aquecimento")
+    # Argumentos após `--` são repassados ao `streamlit run`
+    argv, extras = sys.argv[1:], []
+    if '--' in argv:
+        corte = argv.index('--')
+        argv, extras = argv[:corte], argv[corte + 1:]
+    args = parser.parse_args(argv)
+
+    resumo = warmup(args.csv_path, args.dashboards)
+    print(f"Dados: {resumo['dados_s']:.2f} s | módulos: {resumo['modulos_s']:.2f} s | "
+          f"dashboards: {resumo['dashboards_s']:.2f} s")
+    for script, erros in resumo['erros'].items():
+        if erros:
+            print(f"Erros em {script}: {erros}")
+
+    if args.servir:
+        from streamlit.web import cli
+
+        sys.argv = ['streamlit', 'run', args.servir] + extras
+        sys.exit(cli.main())
+
+
+if __name__ == "__main__":
+    main()